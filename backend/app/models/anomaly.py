@@ -0,0 +1,61 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Index, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+from .database import Base
+
+# ExpenseFlag.kind values
+FLAG_UNUSUAL_AMOUNT = "unusual_amount"
+FLAG_POSSIBLE_DUPLICATE = "possible_duplicate"
+
+class ExpenseCategoryStats(Base):
+    """Running distribution of a user's log amounts per category (Welford),
+    maintained on every expense write"""
+    __tablename__ = "expense_category_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0.0)
+    # Sum of squared deviations from the mean; variance = m2 / (count - 1)
+    m2 = Column(Float, nullable=False, default=0.0)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "category"),
+    )
+
+class ExpenseFlag(Base):
+    """An expense that looked unusual or like a duplicate when it was written"""
+    __tablename__ = "expense_flags"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # No foreign keys to expenses: the partitioned layout (partition_expenses.py)
+    # has no unique key on expenses.id alone. Flags are deleted with their expense.
+    expense_id = Column(Integer, nullable=False, index=True)
+    kind = Column(String, nullable=False)
+    # z-score for unusual amounts; hours apart for duplicates
+    score = Column(Float, nullable=False)
+    message = Column(String, nullable=False)
+    # The other expense a duplicate matches
+    related_expense_id = Column(Integer, nullable=True, index=True)
+    dismissed = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=func.now())
+
+# Serves the per-user flag listing, newest first
+Index("ix_expense_flags_user_created", ExpenseFlag.user_id, ExpenseFlag.created_at.desc())
+
+class ExpenseFlagResponse(BaseModel):
+    id: int
+    expense_id: int
+    kind: str
+    score: float
+    message: str
+    related_expense_id: Optional[int]
+    dismissed: bool
+    created_at: datetime
+    description: str
+    amount: float
+    category: str
+    date: Optional[datetime]
\ No newline at end of file
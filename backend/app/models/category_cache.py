@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+from .database import Base
+
+# user_id used for mappings shared by every user (learned from the AI)
+GLOBAL_SCOPE = 0
+
+class CategoryCacheEntry(Base):
+    """Normalized expense description -> category, globally or per user"""
+    __tablename__ = "category_cache"
+    
+    user_id = Column(Integer, nullable=False, default=GLOBAL_SCOPE)
+    description_key = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    source = Column(String, nullable=False)  # "ai" or "user"
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "description_key"),
+    )
+
+class CategoryOverrideVersion(Base):
+    """Bumped with every correction a user records, so cached lookups for
+    that user can tell whether their corrections changed"""
+    __tablename__ = "category_override_versions"
+    
+    user_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,25 +1,241 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Numeric, TypeDecorator, create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 import os
+import threading
+import time
+import uuid
+from typing import Any, Dict
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./finance_ai.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Connection pool settings, shared by the sync and async engines
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Behind PgBouncer (transaction pooling) PgBouncer owns the pool: open a
+# connection per checkout and never rely on server-side prepared statements
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
+SQLITE_WAL = os.getenv("SQLITE_WAL", "true").lower() == "true"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+class PoolStats:
+    """Checkout counts and time spent obtaining a pooled connection
+    
+    Wait time covers queueing for a free connection and opening new ones.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+    
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_avg": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+            "wait_ms_max": self.wait_max * 1000
+        }
+
+_pool_stats: Dict[str, PoolStats] = {}
+
+def _timed_pool(base, name: str):
+    """A pool class that records how long each checkout waited"""
+    stats = _pool_stats.setdefault(name, PoolStats())
+    
+    class TimedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                stats.record(time.perf_counter() - started, timed_out=True)
+                raise
+            stats.record(time.perf_counter() - started)
+            return connection
+    
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+def _is_sqlite_memory(url: str) -> bool:
+    path = url.partition("://")[2].lstrip("/")
+    return path in ("", ":memory:") or "mode=memory" in url
+
+def _engine_options(url: str, name: str, is_async: bool) -> Dict[str, Any]:
+    """create_engine keyword arguments for a URL, from the DB_* settings"""
+    options: Dict[str, Any] = {"pool_pre_ping": DB_POOL_PRE_PING}
+    connect_args: Dict[str, Any] = {}
+    dialect = url.partition("://")[0].split("+", 1)[0]
+    
+    if dialect == "sqlite":
+        connect_args["timeout"] = SQLITE_BUSY_TIMEOUT_MS / 1000
+        if not is_async:
+            connect_args["check_same_thread"] = False
+        if _is_sqlite_memory(url):
+            # In-memory databases keep SQLAlchemy's per-thread default pool
+            options["connect_args"] = connect_args
+            return options
+    
+    if DB_PGBOUNCER and dialect in ("postgresql", "postgres"):
+        options["poolclass"] = NullPool
+        if is_async:
+            connect_args.update({
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__"
+            })
+    else:
+        options.update({
+            "poolclass": _timed_pool(AsyncAdaptedQueuePool if is_async else QueuePool, name),
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE
+        })
+    
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+def _configure_sqlite(sync_engine) -> None:
+    """WAL lets readers run alongside a writer; busy_timeout makes writers
+    wait for the lock instead of failing with "database is locked"."""
+    if sync_engine.dialect.name != "sqlite":
+        return
+    use_wal = SQLITE_WAL and not _is_sqlite_memory(str(sync_engine.url))
+    
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        if use_wal:
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.close()
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL, "sync", is_async=False))
+_configure_sqlite(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _async_url(url: str) -> str:
+    """Swap the driver in a database URL for its asyncio counterpart"""
+    scheme, separator, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+# Request handlers use the async engine (aiosqlite / asyncpg) so a query
+# awaits instead of blocking the event loop; scripts keep the sync engine
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, "async", is_async=True))
+_configure_sqlite(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+def _describe_pool(name: str, pool) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        data.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "timeout_seconds": pool.timeout()
+        })
+    if name in _pool_stats:
+        data.update(_pool_stats[name].as_dict())
+    return data
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Current usage and wait times for the sync and async connection pools"""
+    return {
+        "sync": _describe_pool("sync", engine.pool),
+        "async": _describe_pool("async", async_engine.pool)
+    }
+
 Base = declarative_base()
 
+class Money(TypeDecorator):
+    """Currency amount stored as NUMERIC(precision, 2), exposed as float
+    
+    Sums and comparisons in SQL are exact on PostgreSQL; values are rounded
+    to cents on the way in and always come back as float (SQLite returns
+    whole amounts in a NUMERIC column as int).
+    """
+    
+    impl = Numeric
+    cache_ok = True
+    
+    def __init__(self, precision: int = 12):
+        super().__init__(precision=precision, scale=2, asdecimal=False)
+    
+    def process_bind_param(self, value, dialect):
+        return None if value is None else round(float(value), 2)
+    
+    def process_result_value(self, value, dialect):
+        return None if value is None else float(value)
+
+def upgrade_schema(revision: str = "head") -> None:
+    """Apply Alembic migrations up to `revision` (alembic upgrade head)"""
+    from alembic import command
+    from alembic.config import Config
+    
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    config = Config(os.path.join(backend_dir, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(backend_dir, "migrations"))
+    # Keep the application's logging setup instead of alembic.ini's
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, revision)
+
+def dialect_insert(bind):
+    """Return the dialect's INSERT construct with ON CONFLICT support, if any"""
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if bind.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from .database import Base
-from pydantic import BaseModel
+from .database import Base, Money
+from pydantic import BaseModel, field_validator
 from datetime import datetime
 from typing import Optional
 
@@ -10,11 +10,11 @@ class Expense(Base):
     __tablename__ = "expenses"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     description = Column(String, nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money(), nullable=False)
     category = Column(String, nullable=False)
-    date = Column(DateTime, default=func.now())
+    date = Column(DateTime, nullable=False, default=func.now())
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -22,6 +22,12 @@ class Expense(Base):
     # Relationships
     user = relationship("User", back_populates="expenses")
 
+# Serves the keyset-paginated expense listing (newest first, id as tie-breaker)
+# and any per-user date range; it also covers lookups by user_id alone
+Index("ix_expenses_user_date_id", Expense.user_id, Expense.date.desc(), Expense.id)
+# The same listing filtered by category, and per-user category date ranges
+Index("ix_expenses_user_category_date_id", Expense.user_id, Expense.category, Expense.date.desc(), Expense.id)
+
 # Pydantic models for API
 class ExpenseBase(BaseModel):
     description: str
@@ -39,8 +45,17 @@ class ExpenseUpdate(BaseModel):
     category: Optional[str] = None
     date: Optional[datetime] = None
     notes: Optional[str] = None
+    
+    @field_validator("description", "amount", "category", "date")
+    @classmethod
+    def not_null(cls, value):
+        # These may be left out of an update, but the columns hold no NULLs
+        if value is None:
+            raise ValueError("may be omitted but not set to null")
+        return value
 
 class ExpenseResponse(ExpenseBase):
+    date: datetime
     id: int
     created_at: datetime
     updated_at: datetime
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, DateTime, Text, ForeignKey
+from .database import Base
+
+class InsightSnapshot(Base):
+    """A user's insights as precomputed by the nightly jobs"""
+    __tablename__ = "insight_snapshots"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    period_days = Column(Integer, nullable=False)
+    # JSON object with insights, recommendations and summary
+    payload = Column(Text, nullable=False)
+    computed_at = Column(DateTime, nullable=False)
\ No newline at end of file
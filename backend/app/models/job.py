@@ -0,0 +1,65 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from sqlalchemy.sql import func
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Any, Dict, Optional
+from .database import Base
+
+# Job.status values
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+class Job(Base):
+    """A unit of background work, claimed and run by the job worker pool"""
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    payload = Column(Text, nullable=False, default="{}")  # JSON object
+    status = Column(String, nullable=False, default=JOB_QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    # Not claimed before this time; retries move it forward
+    run_at = Column(DateTime, nullable=False)
+    # Names one occurrence of a scheduled job so it is only enqueued once
+    dedupe_key = Column(String, nullable=True, unique=True)
+    # Worker holding the job and when it claimed it; a claim older than the
+    # lease is treated as a dead worker and the job is retried
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)  # JSON
+    created_at = Column(DateTime, default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+# Serves claiming (queued jobs due first) and the status filters
+Index("ix_jobs_status_run_at", Job.status, Job.run_at)
+
+class JobCreate(BaseModel):
+    kind: str
+    user_id: Optional[int] = None
+    payload: Dict[str, Any] = {}
+    run_at: Optional[datetime] = None
+    max_attempts: Optional[int] = Field(None, ge=1, le=20)
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    user_id: Optional[int]
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    locked_by: Optional[str]
+    last_error: Optional[str]
+    result: Optional[Any]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Partitioned expense storage (PostgreSQL, optional)
+Rebuilds `expenses` as a table partitioned by HASH (user_id), with each hash
+partition sub-partitioned by RANGE (date): one partition per archived year
+plus a DEFAULT partition for recent rows. A per-user query only touches that
+user's hash partition, and date-bounded queries on it prune old years too.
+
+The ORM model is unchanged: `id` still comes from expenses_id_seq, and the
+primary key becomes (id, user_id, date) because PostgreSQL requires the
+partition keys in it. Run via partition_expenses.py.
+"""
+
+from datetime import date
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+DEFAULT_HASH_PARTITIONS = 16
+
+# Same definitions as the Alembic migrations create on the plain table
+EXPENSE_INDEXES = [
+    "CREATE INDEX ix_expenses_id ON expenses (id)",
+    "CREATE INDEX ix_expenses_user_date_id ON expenses (user_id, date DESC, id)",
+    "CREATE INDEX ix_expenses_user_category_date_id ON expenses (user_id, category, date DESC, id)"
+]
+
+def is_partitioned(connection: Connection) -> bool:
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass('expenses'))"
+    )).scalar()
+
+def hash_partition_count(connection: Connection) -> int:
+    return connection.execute(text(
+        "SELECT count(*) FROM pg_inherits WHERE inhparent = to_regclass('expenses')"
+    )).scalar()
+
+def _year_partition(hash_index: int, year: int) -> str:
+    return (
+        f"CREATE TABLE expenses_p{hash_index}_y{year} PARTITION OF expenses_p{hash_index} "
+        f"FOR VALUES FROM ('{date(year, 1, 1)}') TO ('{date(year + 1, 1, 1)}')"
+    )
+
+def partition_statements(hash_partitions: int, archive_years: List[int]) -> List[str]:
+    """DDL that moves the existing plain `expenses` table into the partitioned
+    layout, in one transaction (copies every row)"""
+    statements = [
+        "LOCK TABLE expenses IN ACCESS EXCLUSIVE MODE",
+        # Keep the id sequence when the old table is dropped
+        "ALTER SEQUENCE expenses_id_seq OWNED BY NONE",
+        "CREATE TABLE expenses_partitioned ("
+        " id INTEGER NOT NULL DEFAULT nextval('expenses_id_seq'),"
+        " user_id INTEGER NOT NULL REFERENCES users (id),"
+        " description VARCHAR NOT NULL,"
+        " amount NUMERIC(12, 2) NOT NULL,"
+        " category VARCHAR NOT NULL,"
+        " date TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),"
+        " notes TEXT,"
+        " created_at TIMESTAMP WITHOUT TIME ZONE,"
+        " updated_at TIMESTAMP WITHOUT TIME ZONE,"
+        " PRIMARY KEY (id, user_id, date)"
+        ") PARTITION BY HASH (user_id)"
+    ]
+    for i in range(hash_partitions):
+        statements.append(
+            f"CREATE TABLE expenses_p{i} PARTITION OF expenses_partitioned "
+            f"FOR VALUES WITH (MODULUS {hash_partitions}, REMAINDER {i}) PARTITION BY RANGE (date)"
+        )
+        statements.extend(_year_partition(i, year) for year in archive_years)
+        statements.append(f"CREATE TABLE expenses_p{i}_recent PARTITION OF expenses_p{i} DEFAULT")
+    statements += [
+        "INSERT INTO expenses_partitioned "
+        "(id, user_id, description, amount, category, date, notes, created_at, updated_at) "
+        "SELECT id, user_id, description, amount, category, "
+        "COALESCE(date, created_at, now()), notes, created_at, updated_at FROM expenses",
+        "DROP TABLE expenses",
+        "ALTER TABLE expenses_partitioned RENAME TO expenses",
+        "ALTER TABLE expenses RENAME CONSTRAINT expenses_partitioned_pkey TO expenses_pkey",
+        "ALTER TABLE expenses RENAME CONSTRAINT expenses_partitioned_user_id_fkey TO expenses_user_id_fkey",
+        "ALTER SEQUENCE expenses_id_seq OWNED BY expenses.id",
+        *EXPENSE_INDEXES,
+        "ANALYZE expenses"
+    ]
+    return statements
+
+def archive_year_statements(hash_partitions: int, year: int) -> List[str]:
+    """DDL that moves `year` out of every DEFAULT partition into its own
+    range partition (run once a year has ended)"""
+    statements = []
+    start, end = date(year, 1, 1), date(year + 1, 1, 1)
+    for i in range(hash_partitions):
+        statements += [
+            f"ALTER TABLE expenses_p{i} DETACH PARTITION expenses_p{i}_recent",
+            _year_partition(i, year),
+            f"INSERT INTO expenses_p{i}_y{year} SELECT * FROM expenses_p{i}_recent "
+            f"WHERE date >= '{start}' AND date < '{end}'",
+            f"DELETE FROM expenses_p{i}_recent WHERE date >= '{start}' AND date < '{end}'",
+            f"ALTER TABLE expenses_p{i} ATTACH PARTITION expenses_p{i}_recent DEFAULT"
+        ]
+    return statements
\ No newline at end of file
@@ -0,0 +1,58 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Index, PrimaryKeyConstraint
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+from .database import Base
+
+class RecurringSeries(Base):
+    """A user's expenses sharing one normalized description, with the recent
+    history the detector needs and what it found; maintained by the
+    recurring payment scan"""
+    __tablename__ = "recurring_series"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    description_key = Column(String, nullable=False)
+    # Most recent raw description and category, for display
+    description = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    occurrences = Column(Integer, nullable=False)
+    # JSON [[epoch seconds, amount], ...] of the latest charges, oldest first
+    history = Column(Text, nullable=False)
+    is_recurring = Column(Boolean, nullable=False, default=False)
+    cadence = Column(String, nullable=True)  # weekly, biweekly, monthly, quarterly, yearly
+    period_days = Column(Float, nullable=True)
+    typical_amount = Column(Float, nullable=True)
+    confidence = Column(Float, nullable=False, default=0.0)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    next_expected = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "description_key"),
+    )
+
+# Serves the per-user listing of detected recurring payments
+Index("ix_recurring_series_user_recurring", RecurringSeries.user_id, RecurringSeries.is_recurring)
+
+class RecurringScanState(Base):
+    """How far the recurring payment scan has got for a user"""
+    __tablename__ = "recurring_scan_state"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    # Highest expense id folded into recurring_series; 0 means rebuild from scratch
+    last_expense_id = Column(Integer, nullable=False, default=0)
+    last_run_at = Column(DateTime, nullable=True)
+
+class RecurringPaymentResponse(BaseModel):
+    description: str
+    category: str
+    cadence: str
+    period_days: float
+    typical_amount: float
+    monthly_cost: float
+    occurrences: int
+    confidence: float
+    first_seen: datetime
+    last_seen: datetime
+    next_expected: Optional[datetime]
+    active: bool
\ No newline at end of file
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from .database import Base
+
+class RevokedToken(Base):
+    """A JWT (by its jti) that must no longer be accepted, e.g. after logout"""
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String, primary_key=True)
+    user_id = Column(Integer, nullable=True, index=True)
+    # Rows can be dropped once the token would have expired anyway
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, default=func.now(), index=True)
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, PrimaryKeyConstraint
+from .database import Base, Money
+
+class ExpenseDailyRollup(Base):
+    """Per-user spend per day and category, maintained on every expense write"""
+    __tablename__ = "expense_daily_rollups"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    category = Column(String, nullable=False)
+    total_amount = Column(Money(14), nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "day", "category"),
+    )
@@ -1,39 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Optional
 import json
 
-from ..models.database import get_db
+from ..models.database import get_async_db, pool_stats
+from ..models.job import Job, JobCreate, JobResponse, JOB_CANCELLED, JOB_FAILED, JOB_QUEUED
 from ..models.user import User, UserResponse, UserCreate
-from ..utils.security import get_admin_user, log_security_event, Auth
+from ..services.category_cache import categorization_cache
+from ..services.forecasting import forecast_service
+from ..services.jobs import enqueue, job_counts, job_kinds, job_pool, job_response
+from ..services.recurring import recurring_scanner
+from ..utils.log import logging_stats
+from ..utils.rate_limit import rate_limiter
+from ..utils.response_cache import analytics_cache
+from ..utils.security import get_admin_user, jwt_cache_stats, log_security_event, password_hash_pool, Auth
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.get("/users", response_model=List[UserResponse])
 async def get_all_users(
     admin_user: dict = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all users (admin only)"""
     log_security_event("ADMIN_USER_LIST", admin_user.get("user_id"), "Admin viewed user list")
     
-    users = db.query(User).all()
+    users = (await db.scalars(select(User))).all()
     return users
 
 @router.post("/users/{user_id}/toggle-admin")
 async def toggle_user_admin(
     user_id: int,
     admin_user: dict = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Toggle admin status for a user (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     user.is_admin = not user.is_admin
-    db.commit()
+    await db.commit()
     
     log_security_event(
         "ADMIN_STATUS_CHANGED", 
@@ -47,15 +57,15 @@ async def toggle_user_admin(
 async def toggle_user_active(
     user_id: int,
     admin_user: dict = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Toggle active status for a user (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     user.is_active = not user.is_active
-    db.commit()
+    await db.commit()
     
     log_security_event(
         "USER_STATUS_CHANGED", 
@@ -69,16 +79,16 @@ async def toggle_user_active(
 async def create_admin_user(
     user_data: UserCreate,
     admin_user: dict = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new admin user (admin only)"""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
     
     # Create new admin user
-    hashed_password = User.hash_password(user_data.password)
+    hashed_password = await Auth.hash_password_async(user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -88,8 +98,8 @@ async def create_admin_user(
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     log_security_event(
         "ADMIN_USER_CREATED", 
@@ -102,13 +112,14 @@ async def create_admin_user(
 @router.get("/stats")
 async def get_admin_stats(
     admin_user: dict = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get admin dashboard stats"""
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    admin_users = db.query(User).filter(User.is_admin == True).count()
-    verified_users = db.query(User).filter(User.is_verified == True).count()
+    count_users = select(func.count()).select_from(User)
+    total_users = await db.scalar(count_users)
+    active_users = await db.scalar(count_users.where(User.is_active == True))
+    admin_users = await db.scalar(count_users.where(User.is_admin == True))
+    verified_users = await db.scalar(count_users.where(User.is_verified == True))
     
     return {
         "total_users": total_users,
@@ -116,4 +127,151 @@ async def get_admin_stats(
         "admin_users": admin_users,
         "verified_users": verified_users,
         "inactive_users": total_users - active_users
-    } 
\ No newline at end of file
+    }
+
+@router.get("/metrics")
+async def get_admin_metrics(
+    admin_user: dict = Depends(get_admin_user)
+):
+    """Get runtime cache and performance counters"""
+    return {
+        "categorization_cache": categorization_cache.stats(),
+        "logging": logging_stats(),
+        "database_pools": pool_stats(),
+        "password_hashing": password_hash_pool.stats(),
+        "jwt_cache": jwt_cache_stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "analytics_cache": analytics_cache.stats(),
+        "forecasting": forecast_service.stats(),
+        "recurring_payments": recurring_scanner.stats(),
+        "jobs": job_pool.stats()
+    }
+
+@router.get("/jobs", response_model=List[JobResponse])
+async def list_jobs(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    kind: Optional[str] = None,
+    user_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    admin_user: dict = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List background jobs, newest first (admin only)"""
+    query = select(Job)
+    if status_filter:
+        query = query.where(Job.status == status_filter)
+    if kind:
+        query = query.where(Job.kind == kind)
+    if user_id is not None:
+        query = query.where(Job.user_id == user_id)
+    jobs = (await db.scalars(query.order_by(Job.id.desc()).limit(limit))).all()
+    return [job_response(job) for job in jobs]
+
+@router.get("/jobs/stats")
+async def get_job_stats(
+    admin_user: dict = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Job counts by kind and status, and this process's worker pool"""
+    return {
+        "counts": await db.run_sync(job_counts),
+        "workers": job_pool.stats(),
+        "kinds": {kind: {"per_user": registered.per_user} for kind, registered in job_kinds().items()}
+    }
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    admin_user: dict = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a background job (admin only)"""
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+@router.post("/jobs", response_model=JobResponse, status_code=status.HTTP_201_CREATED)
+async def create_job(
+    job_data: JobCreate,
+    admin_user: dict = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue a background job (admin only)"""
+    kind = job_kinds().get(job_data.kind)
+    if kind is None:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {job_data.kind}")
+    if kind.per_user:
+        if job_data.user_id is None:
+            raise HTTPException(status_code=400, detail=f"Job kind {job_data.kind} needs a user_id")
+        if not await db.get(User, job_data.user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+    
+    job_id = await db.run_sync(
+        enqueue,
+        job_data.kind,
+        job_data.user_id,
+        job_data.payload,
+        job_data.run_at,
+        job_data.max_attempts
+    )
+    await db.commit()
+    job_pool.wake()
+    
+    log_security_event(
+        "ADMIN_JOB_CREATED",
+        admin_user.get("user_id"),
+        f"Queued {job_data.kind} job {job_id}"
+    )
+    
+    return job_response(await db.get(Job, job_id))
+
+async def _transition_job(db: AsyncSession, job_id: int, from_statuses, values: dict) -> Job:
+    """Update a job only if it is still in one of from_statuses, so an admin
+    action cannot overwrite a worker that claimed it in the meantime"""
+    updated = await db.execute(
+        update(Job).where(Job.id == job_id, Job.status.in_(from_statuses)).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    job = await db.get(Job, job_id, populate_existing=True)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if updated.rowcount != 1:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job
+
+@router.post("/jobs/{job_id}/retry", response_model=JobResponse)
+async def retry_job(
+    job_id: int,
+    admin_user: dict = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue a failed or cancelled job again with fresh attempts (admin only)"""
+    job = await _transition_job(db, job_id, (JOB_FAILED, JOB_CANCELLED), {
+        "status": JOB_QUEUED,
+        "attempts": 0,
+        "run_at": datetime.now(),
+        "finished_at": None
+    })
+    job_pool.wake()
+    
+    log_security_event("ADMIN_JOB_RETRIED", admin_user.get("user_id"), f"Retried job {job_id}")
+    
+    return job_response(job)
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: int,
+    admin_user: dict = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Cancel a job that has not started yet (admin only)"""
+    job = await _transition_job(db, job_id, (JOB_QUEUED,), {
+        "status": JOB_CANCELLED,
+        "finished_at": datetime.now()
+    })
+    
+    log_security_event("ADMIN_JOB_CANCELLED", admin_user.get("user_id"), f"Cancelled job {job_id}")
+    
+    return job_response(job)
\ No newline at end of file
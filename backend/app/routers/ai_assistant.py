@@ -1,14 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
-from ..models.database import get_db
-from ..models.expense import Expense
-from ..services.ai_service import get_financial_insights, chat_with_assistant
+from ..models.database import get_async_db
+from ..models.recurring import RecurringPaymentResponse
+from ..models.rollup import ExpenseDailyRollup
+from ..services.ai_service import chat_with_assistant
+from ..services.forecasting import ForecastUnavailable, forecast_service
+from ..services.insights import compute_insights, load_snapshot
+from ..services.recurring import list_recurring
+from ..utils.log import get_logger
+from ..utils.response_cache import analytics_cache, user_scope
 from ..utils.security import get_current_user
 
+logger = get_logger("ai_assistant")
+
 router = APIRouter(prefix="/ai", tags=["ai-assistant"])
 
 class ChatMessage(BaseModel):
@@ -23,32 +32,37 @@ class InsightsResponse(BaseModel):
     recommendations: List[str]
     summary: Dict[str, Any]
 
+class DailyInsightsResponse(InsightsResponse):
+    period_days: int
+    computed_at: datetime
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     message: ChatMessage, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Chat with the AI financial assistant"""
     
-    # Get recent expenses for context
+    # Get recent spending per category from the daily rollups for context
     thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_expenses = db.query(Expense).filter(
-        Expense.user_id == current_user["user_id"],
-        Expense.date >= thirty_days_ago
-    ).all()
+    rows = (await db.execute(select(
+        ExpenseDailyRollup.category,
+        func.sum(ExpenseDailyRollup.total_amount),
+        func.sum(ExpenseDailyRollup.expense_count)
+    ).where(
+        ExpenseDailyRollup.user_id == current_user["user_id"],
+        ExpenseDailyRollup.day >= thirty_days_ago.date()
+    ).group_by(ExpenseDailyRollup.category))).all()
     
     # Create context from recent expenses
     context = {}
-    if recent_expenses:
-        total_spent = sum(expense.amount for expense in recent_expenses)
-        categories = {}
-        for expense in recent_expenses:
-            categories[expense.category] = categories.get(expense.category, 0) + expense.amount
+    if rows:
+        categories = {category: total for category, total, _ in rows}
         
         context = {
-            "total_spent_30_days": total_spent,
-            "expense_count": len(recent_expenses),
+            "total_spent_30_days": sum(categories.values()),
+            "expense_count": sum(count for _, _, count in rows),
             "top_categories": dict(sorted(categories.items(), key=lambda x: x[1], reverse=True)[:3])
         }
     
@@ -59,57 +73,56 @@ async def chat(
 @router.get("/insights", response_model=InsightsResponse)
 async def get_insights(
     days: int = 30,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get AI-powered financial insights based on recent expenses"""
-    
-    # Get expenses from the specified number of days for the current user
-    start_date = datetime.now() - timedelta(days=days)
-    expenses = db.query(Expense).filter(
-        Expense.user_id == current_user["user_id"],
-        Expense.date >= start_date
-    ).all()
-    
-    if not expenses:
-        return InsightsResponse(
-            insights=["No expenses found for the specified period"],
-            recommendations=["Start tracking your expenses to get personalized insights"],
-            summary={"total_expenses": 0, "expense_count": 0, "period_days": days}
+    return InsightsResponse(**await compute_insights(db, current_user["user_id"], days))
+
+@router.get("/insights/daily", response_model=DailyInsightsResponse)
+async def get_daily_insights(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """The insights precomputed for the user by the nightly jobs"""
+    snapshot = await load_snapshot(db, current_user["user_id"])
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No precomputed insights yet")
+    return DailyInsightsResponse(**snapshot)
+
+@router.get("/forecast")
+async def get_forecast(
+    request: Request,
+    budget: Optional[float] = Query(None, gt=0),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Project this month's spending per category and overall, and the burn of an optional monthly budget"""
+    user_id = current_user["user_id"]
+    # The projection changes with the date, so the day is part of the cache key
+    params = {"as_of": datetime.now().date().isoformat(), "budget": budget or ""}
+    try:
+        return await analytics_cache.respond(
+            request, user_scope(user_id), "forecast", params,
+            lambda: forecast_service.forecast_month(db, user_id, budget)
         )
-    
-    # Prepare expense data for AI analysis
-    expenses_data = []
-    for expense in expenses:
-        expenses_data.append({
-            "description": expense.description,
-            "amount": expense.amount,
-            "category": expense.category,
-            "date": expense.date.isoformat()
-        })
-    
-    # Get AI insights
-    ai_insights = await get_financial_insights(expenses_data)
-    
-    # Calculate summary statistics
-    total_amount = sum(expense.amount for expense in expenses)
-    categories = {}
-    for expense in expenses:
-        categories[expense.category] = categories.get(expense.category, 0) + expense.amount
-    
-    summary = {
-        "total_expenses": total_amount,
-        "expense_count": len(expenses),
-        "period_days": days,
-        "average_daily_spend": total_amount / days if days > 0 else 0,
-        "category_breakdown": categories,
-        "top_category": max(categories.items(), key=lambda x: x[1])[0] if categories else "None"
-    }
-    
-    return InsightsResponse(
-        insights=ai_insights.get("insights", []),
-        recommendations=ai_insights.get("recommendations", []),
-        summary=summary
+    except ForecastUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+@router.get("/recurring", response_model=List[RecurringPaymentResponse])
+async def get_recurring_payments(
+    request: Request,
+    include_inactive: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Detected subscriptions and other recurring payments, next due first"""
+    user_id = current_user["user_id"]
+    # Whether a payment is still active depends on the date
+    params = {"as_of": datetime.now().date().isoformat(), "include_inactive": include_inactive}
+    return await analytics_cache.respond(
+        request, user_scope(user_id), "recurring", params,
+        lambda: list_recurring(db, user_id, include_inactive)
     )
 
 @router.post("/categorize")
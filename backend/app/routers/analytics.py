@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from starlette.concurrency import run_in_threadpool
 
-from ..models.database import get_db
+from ..models.database import get_async_db
 from ..models.expense import Expense
+from ..models.rollup import ExpenseDailyRollup
+from ..services.analytics_engine import (
+    ROLLING_WINDOWS, amount_histogram, category_stats, load_expense_arrays,
+    rolling_sums, summary_stats, weekday_hour_heatmap, window_start
+)
+from ..services.expense_queries import RecentExpense, fetch
+from ..utils.response_cache import analytics_cache, user_scope
+from ..utils.security import get_current_user
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -30,18 +40,43 @@ class AnalyticsOverview(BaseModel):
 
 @router.get("/overview", response_model=AnalyticsOverview)
 async def get_analytics_overview(
+    request: Request,
     months: int = Query(6, ge=1, le=12),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
 ):
     """Get comprehensive analytics overview"""
+    user_id = current_user["user_id"]
+    return await analytics_cache.respond(
+        request, user_scope(user_id), "overview", {"months": months},
+        lambda: _compute_overview(db, user_id, months)
+    )
+
+async def _compute_overview(db: AsyncSession, user_id: int, months: int) -> AnalyticsOverview:
+    # Bucket each row into its 30-day window with a CASE over bound
+    # parameters, so the same GROUP BY runs unchanged on SQLite and PostgreSQL
+    now = datetime.now()
+    start_date = now - timedelta(days=months * 30)
+    month_starts = [now - timedelta(days=(i + 1) * 30) for i in range(months)]
+    month_bucket = case(
+        *[
+            (and_(Expense.date >= month_start, Expense.date <= now), i)
+            for i, month_start in enumerate(month_starts)
+        ],
+        else_=None
+    ).label("month_bucket")
     
-    # Get expenses from the specified number of months
-    start_date = datetime.now() - timedelta(days=months * 30)
-    expenses = db.query(Expense).filter(
+    rows = (await db.execute(select(
+        Expense.category,
+        month_bucket,
+        func.sum(Expense.amount),
+        func.count(Expense.id)
+    ).where(
+        Expense.user_id == user_id,
         Expense.date >= start_date
-    ).all()
+    ).group_by(Expense.category, month_bucket))).all()
     
-    if not expenses:
+    if not rows:
         return AnalyticsOverview(
             total_expenses=0,
             expense_count=0,
@@ -49,20 +84,20 @@ async def get_analytics_overview(
             monthly_trends=[]
         )
     
-    # Calculate category analysis
+    # Fold the (category, month) groups into per-category and per-month totals
     category_data = {}
-    total_amount = sum(expense.amount for expense in expenses)
+    month_data = {i: {'total': 0, 'count': 0} for i in range(months)}
+    for category, bucket, amount, count in rows:
+        if category not in category_data:
+            category_data[category] = {'total': 0, 'count': 0}
+        category_data[category]['total'] += amount or 0
+        category_data[category]['count'] += count
+        if bucket is not None:
+            month_data[bucket]['total'] += amount or 0
+            month_data[bucket]['count'] += count
     
-    for expense in expenses:
-        if expense.category not in category_data:
-            category_data[expense.category] = {
-                'total': 0,
-                'count': 0,
-                'amounts': []
-            }
-        category_data[expense.category]['total'] += expense.amount
-        category_data[expense.category]['count'] += 1
-        category_data[expense.category]['amounts'].append(expense.amount)
+    total_amount = sum(data['total'] for data in category_data.values())
+    expense_count = sum(data['count'] for data in category_data.values())
     
     categories = []
     for category, data in category_data.items():
@@ -79,88 +114,113 @@ async def get_analytics_overview(
     
     # Calculate monthly trends
     monthly_trends = []
-    for i in range(months):
-        month_start = datetime.now() - timedelta(days=(i + 1) * 30)
-        month_end = datetime.now() - timedelta(days=i * 30)
-        
-        month_expenses = [
-            expense for expense in expenses
-            if month_start <= expense.date <= month_end
-        ]
-        
-        month_total = sum(expense.amount for expense in month_expenses)
+    for i, month_start in enumerate(month_starts):
+        month_total = month_data[i]['total']
         monthly_trends.append(TrendAnalysis(
             period=month_start.strftime("%B %Y"),
             total_amount=month_total,
-            expense_count=len(month_expenses),
+            expense_count=month_data[i]['count'],
             average_daily_spend=month_total / 30 if month_total > 0 else 0
         ))
     
     return AnalyticsOverview(
         total_expenses=total_amount,
-        expense_count=len(expenses),
+        expense_count=expense_count,
         categories=categories,
         monthly_trends=monthly_trends
     )
 
 @router.get("/category/{category}")
 async def get_category_analysis(
+    request: Request,
     category: str,
     days: int = Query(90, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
 ):
     """Get detailed analysis for a specific category"""
+    user_id = current_user["user_id"]
+    return await analytics_cache.respond(
+        request, user_scope(user_id), "category", {"category": category, "days": days},
+        lambda: _compute_category_analysis(db, user_id, category, days)
+    )
+
+async def _compute_category_analysis(db: AsyncSession, user_id: int, category: str, days: int) -> Dict[str, Any]:
+    # Totals come from the daily rollups; the distribution comes from one
+    # scan of the category's amounts, and the ten most recent rows
+    start_day = (datetime.now() - timedelta(days=days)).date()
+    total_amount, expense_count = (await db.execute(select(
+        func.sum(ExpenseDailyRollup.total_amount),
+        func.sum(ExpenseDailyRollup.expense_count)
+    ).where(
+        ExpenseDailyRollup.user_id == user_id,
+        ExpenseDailyRollup.category == category,
+        ExpenseDailyRollup.day >= start_day
+    ))).one()
     
-    start_date = datetime.now() - timedelta(days=days)
-    expenses = db.query(Expense).filter(
-        Expense.category == category,
-        Expense.date >= start_date
-    ).all()
-    
-    if not expenses:
+    if not expense_count:
         return {"message": f"No expenses found for category '{category}' in the last {days} days"}
     
-    total_amount = sum(expense.amount for expense in expenses)
-    amounts = [expense.amount for expense in expenses]
+    start_date = datetime.combine(start_day, time.min)
+    arrays = await load_expense_arrays(db, user_id, start_date, category)
+    stats = await run_in_threadpool(summary_stats, arrays.amounts)
+    recent_expenses = await fetch(db, RecentExpense, RecentExpense.select().where(
+        Expense.user_id == user_id,
+        Expense.category == category,
+        Expense.date >= start_date
+    ).order_by(Expense.date.desc(), Expense.id.asc()).limit(10))
     
     return {
         "category": category,
         "period_days": days,
         "total_amount": total_amount,
-        "expense_count": len(expenses),
-        "average_amount": total_amount / len(expenses),
-        "min_amount": min(amounts),
-        "max_amount": max(amounts),
+        "expense_count": expense_count,
+        "average_amount": total_amount / expense_count,
+        "min_amount": stats["min"],
+        "max_amount": stats["max"],
+        "median_amount": stats["median"],
+        "std_amount": stats["std"],
+        "percentiles": stats["percentiles"],
         "recent_expenses": [
             {
                 "description": expense.description,
                 "amount": expense.amount,
                 "date": expense.date.isoformat()
             }
-            for expense in sorted(expenses, key=lambda x: x.date, reverse=True)[:10]
+            for expense in recent_expenses
         ]
     }
 
 @router.get("/trends/daily")
 async def get_daily_trends(
+    request: Request,
     days: int = Query(30, ge=7, le=90),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
 ):
     """Get daily spending trends"""
-    
+    user_id = current_user["user_id"]
+    return await analytics_cache.respond(
+        request, user_scope(user_id), "trends/daily", {"days": days},
+        lambda: _compute_daily_trends(db, user_id, days)
+    )
+
+async def _compute_daily_trends(db: AsyncSession, user_id: int, days: int) -> Dict[str, Any]:
     start_date = datetime.now() - timedelta(days=days)
-    expenses = db.query(Expense).filter(
-        Expense.date >= start_date
-    ).all()
+    rows = (await db.execute(select(
+        ExpenseDailyRollup.day,
+        func.sum(ExpenseDailyRollup.total_amount),
+        func.sum(ExpenseDailyRollup.expense_count)
+    ).where(
+        ExpenseDailyRollup.user_id == user_id,
+        ExpenseDailyRollup.day >= start_date.date()
+    ).group_by(ExpenseDailyRollup.day))).all()
     
     # Group by date
-    daily_data = {}
-    for expense in expenses:
-        date_str = expense.date.strftime("%Y-%m-%d")
-        if date_str not in daily_data:
-            daily_data[date_str] = {"total": 0, "count": 0}
-        daily_data[date_str]["total"] += expense.amount
-        daily_data[date_str]["count"] += 1
+    daily_data = {
+        day.strftime("%Y-%m-%d"): {"total": total, "count": count}
+        for day, total, count in rows
+    }
     
     # Fill in missing dates with zero
     trend_data = []
@@ -173,4 +233,83 @@ async def get_daily_trends(
             "expense_count": data["count"]
         })
     
-    return {"trends": trend_data} 
\ No newline at end of file
+    return {"trends": trend_data} 
+
+@router.get("/trends/rolling")
+async def get_rolling_trends(
+    request: Request,
+    days: int = Query(30, ge=7, le=365),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get daily spending with 7- and 30-day rolling sums"""
+    user_id = current_user["user_id"]
+    return await analytics_cache.respond(
+        request, user_scope(user_id), "trends/rolling", {"days": days},
+        lambda: _compute_rolling_trends(db, user_id, days)
+    )
+
+async def _compute_rolling_trends(db: AsyncSession, user_id: int, days: int) -> Dict[str, Any]:
+    # Load the extra lead-in days so the first windows are complete
+    start_date = window_start(days)
+    arrays = await load_expense_arrays(db, user_id, start_date - timedelta(days=max(ROLLING_WINDOWS) - 1))
+    trends = await run_in_threadpool(rolling_sums, arrays, start_date.date(), days)
+    return {"windows": list(ROLLING_WINDOWS), "trends": trends}
+
+@router.get("/distribution")
+async def get_spending_distribution(
+    request: Request,
+    days: int = Query(90, ge=1, le=365),
+    category: Optional[str] = None,
+    bins: int = Query(20, ge=2, le=100),
+    log_scale: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get amount statistics (median, percentiles, standard deviation) and a histogram"""
+    user_id = current_user["user_id"]
+    params = {"days": days, "category": category or "", "bins": bins, "log_scale": log_scale}
+    return await analytics_cache.respond(
+        request, user_scope(user_id), "distribution", params,
+        lambda: _compute_distribution(db, user_id, days, category, bins, log_scale)
+    )
+
+async def _compute_distribution(
+    db: AsyncSession,
+    user_id: int,
+    days: int,
+    category: Optional[str],
+    bins: int,
+    log_scale: bool
+) -> Dict[str, Any]:
+    arrays = await load_expense_arrays(db, user_id, window_start(days), category)
+    
+    def compute() -> Dict[str, Any]:
+        return {
+            "period_days": days,
+            "category": category,
+            "summary": summary_stats(arrays.amounts),
+            "categories": category_stats(arrays) if category is None else [],
+            "histogram": amount_histogram(arrays.amounts, bins, log_scale)
+        }
+    return await run_in_threadpool(compute)
+
+@router.get("/heatmap")
+async def get_spending_heatmap(
+    request: Request,
+    days: int = Query(90, ge=1, le=365),
+    category: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get spending by weekday and hour of day"""
+    user_id = current_user["user_id"]
+    return await analytics_cache.respond(
+        request, user_scope(user_id), "heatmap", {"days": days, "category": category or ""},
+        lambda: _compute_heatmap(db, user_id, days, category)
+    )
+
+async def _compute_heatmap(db: AsyncSession, user_id: int, days: int, category: Optional[str]) -> Dict[str, Any]:
+    arrays = await load_expense_arrays(db, user_id, window_start(days), category)
+    heatmap = await run_in_threadpool(weekday_hour_heatmap, arrays)
+    return {"period_days": days, "category": category, **heatmap}
\ No newline at end of file
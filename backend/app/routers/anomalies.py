@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime, timedelta
+
+from ..models.anomaly import ExpenseFlag, ExpenseFlagResponse, FLAG_POSSIBLE_DUPLICATE, FLAG_UNUSUAL_AMOUNT
+from ..models.database import get_async_db
+from ..services.anomalies import flags_query
+from ..utils.fast_json import rows_to_dicts
+from ..utils.security import get_current_user
+
+router = APIRouter(prefix="/anomalies", tags=["anomalies"])
+
+FLAG_RESPONSE_FIELDS = list(ExpenseFlagResponse.model_fields)
+
+@router.get("/", response_model=List[ExpenseFlagResponse])
+async def get_flags(
+    kind: Optional[str] = None,
+    days: int = Query(90, ge=1, le=365),
+    include_dismissed: bool = False,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get expenses flagged as unusual or as likely duplicates"""
+    if kind is not None and kind not in (FLAG_UNUSUAL_AMOUNT, FLAG_POSSIBLE_DUPLICATE):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown kind. Must be one of: {FLAG_UNUSUAL_AMOUNT}, {FLAG_POSSIBLE_DUPLICATE}"
+        )
+    
+    query = flags_query(current_user["user_id"], datetime.now() - timedelta(days=days), include_dismissed)
+    if kind is not None:
+        query = query.where(ExpenseFlag.kind == kind)
+    rows = (await db.execute(query.limit(limit))).all()
+    return rows_to_dicts(FLAG_RESPONSE_FIELDS, rows)
+
+@router.post("/{flag_id}/dismiss")
+async def dismiss_flag(
+    flag_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Mark a flag as reviewed so it no longer shows up or feeds insights"""
+    flag = await db.scalar(select(ExpenseFlag).where(
+        ExpenseFlag.id == flag_id,
+        ExpenseFlag.user_id == current_user["user_id"]
+    ))
+    if not flag:
+        raise HTTPException(status_code=404, detail="Flag not found")
+    
+    flag.dismissed = True
+    await db.commit()
+    
+    return {"message": "Flag dismissed"}
\ No newline at end of file
@@ -5,11 +5,15 @@ Simple login/register functionality
 
 from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel, EmailStr
-from app.utils.security import Auth, Validation, get_current_user, is_password_strong_enough, log_security_event
+from app.utils.security import Auth, Validation, get_current_user, is_password_strong_enough, log_security_event, revocation_list
 from app.models.user import User, UserCreate, UserLogin, UserResponse
-from app.models.database import get_db
-from sqlalchemy.orm import Session
+from app.models.database import get_async_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
+from app.utils.log import get_logger
+
+logger = get_logger("auth")
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -23,7 +27,7 @@ class MessageResponse(BaseModel):
     message: str
 
 @router.post("/register", response_model=TokenResponse)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     
     # Validate password strength
@@ -35,7 +39,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -43,7 +47,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = Auth.hash_password(user_data.password)
+    hashed_password = await Auth.hash_password_async(user_data.password)
     db_user = User(
         email=user_data.email,
         full_name=user_data.full_name,
@@ -51,8 +55,8 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     # Create token
     token = Auth.create_token({"id": db_user.id, "email": db_user.email, "is_admin": db_user.is_admin})
@@ -66,15 +70,14 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
 
 @router.post("/login", response_model=TokenResponse)
-async def login(login_data: UserLogin, db: Session = Depends(get_db)):
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login user"""
     
-    print(f"🔐 Login attempt for email: {login_data.email}")
+    logger.debug("Login attempt", extra={"email": login_data.email})
     
     # Find user
-    user = db.query(User).filter(User.email == login_data.email).first()
+    user = await db.scalar(select(User).where(User.email == login_data.email))
     if not user:
-        print(f"❌ User not found for email: {login_data.email}")
         log_security_event("LOGIN_FAILED", None, f"Email not found: {login_data.email}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -89,8 +92,8 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
         )
     
     # Verify password
-    if not Auth.verify_password(login_data.password, user.hashed_password):
-        print(f"❌ Invalid password for user: {user.email}")
+    is_valid, new_hash = await Auth.verify_and_update_password_async(login_data.password, user.hashed_password)
+    if not is_valid:
         # Increment failed attempts
         user.failed_login_attempts += 1
         
@@ -99,7 +102,7 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
             user.locked_until = datetime.utcnow() + timedelta(minutes=15)
             log_security_event("ACCOUNT_LOCKED", user.id, "Too many failed login attempts")
         
-        db.commit()
+        await db.commit()
         
         log_security_event("LOGIN_FAILED", user.id, "Invalid password")
         raise HTTPException(
@@ -107,16 +110,19 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
             detail="Invalid email or password"
         )
     
+    # Store a rehashed password if the bcrypt cost factor has changed
+    if new_hash:
+        user.hashed_password = new_hash
+    
     # Reset failed attempts on successful login
     user.failed_login_attempts = 0
     user.locked_until = None
     user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     # Create token
     token = Auth.create_token({"id": user.id, "email": user.email, "is_admin": user.is_admin})
     
-    print(f"✅ Login successful for user: {user.email}")
     log_security_event("LOGIN_SUCCESS", user.id, f"Email: {user.email}")
     
     return TokenResponse(
@@ -125,10 +131,10 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
     )
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_current_user_info(current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Get current user information"""
     
-    user = db.query(User).filter(User.id == current_user["user_id"]).first()
+    user = await db.get(User, current_user["user_id"])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -138,8 +144,17 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user),
     return UserResponse.from_orm(user)
 
 @router.post("/logout", response_model=MessageResponse)
-async def logout(current_user: dict = Depends(get_current_user)):
-    """Logout user (client should delete token)"""
+async def logout(current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """Logout user and revoke the token used for this request"""
+    
+    # Tokens issued before revocation support carry no jti; they simply expire
+    if current_user.get("jti"):
+        await revocation_list.revoke(
+            db,
+            current_user["jti"],
+            current_user["user_id"],
+            datetime.utcfromtimestamp(current_user["exp"])
+        )
     
     log_security_event("LOGOUT", current_user["user_id"], f"Email: {current_user['email']}")
     
@@ -1,18 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
 from datetime import datetime
+import base64
 
-from ..models.database import get_db
+from ..models.database import SessionLocal, get_async_db
 from ..models.expense import Expense, ExpenseCreate, ExpenseUpdate, ExpenseResponse
+from ..services.expense_io import (
+    EXPORT_EXTENSIONS, EXPORT_MEDIA_TYPES, IMPORT_FORMATS,
+    import_expenses, iter_csv_rows, iter_lines, iter_ndjson_rows, stream_export
+)
+from ..services.anomalies import SCORED_FIELDS, observe_expense_added, observe_expense_removed
+from ..services.category_cache import categorization_cache
+from ..services.recurring import SCANNED_FIELDS, recurring_scanner, reset_recurring_scan
+from ..services.rollups import record_expense_added, record_expense_removed
+from ..utils.fast_json import FastJSONResponse, rows_to_dicts
+from ..utils.response_cache import analytics_cache, user_scope
 from ..utils.security import get_current_user
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
+# Response header carrying the cursor for the next page of GET /expenses
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# GET /expenses selects just these columns, in ExpenseResponse's field order,
+# so the tuples serialize to the same objects the response model would produce
+EXPENSE_RESPONSE_FIELDS = list(ExpenseResponse.model_fields)
+EXPENSE_RESPONSE_COLUMNS = [getattr(Expense, field) for field in EXPENSE_RESPONSE_FIELDS]
+
+async def _invalidate_analytics(user_id: int):
+    """Make this user's cached analytics stale"""
+    await analytics_cache.invalidate(user_scope(user_id))
+
+def _encode_cursor(expense) -> str:
+    """Build an opaque cursor from the (date, id) of the last row on a page"""
+    raw = f"{expense.date.isoformat()}|{expense.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor produced by _encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        date_part, id_part = raw.rsplit("|", 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.post("/", response_model=ExpenseResponse)
 async def create_expense(
     expense: ExpenseCreate, 
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new expense with AI-powered categorization"""
@@ -21,7 +62,7 @@ async def create_expense(
     # Auto-categorize if no category provided or if category is "Other"
     category = expense.category
     if not category or category.lower() in ["other", ""]:
-        category = await categorize_expense(expense.description)
+        category = await categorize_expense(expense.description, current_user["user_id"])
     
     db_expense = Expense(
         user_id=current_user["user_id"],
@@ -33,41 +74,130 @@ async def create_expense(
     )
     
     db.add(db_expense)
-    db.commit()
-    db.refresh(db_expense)
+    await db.run_sync(record_expense_added, db_expense)
+    # Score against the user's history for this category before it joins it
+    await db.run_sync(observe_expense_added, db_expense)
+    await db.commit()
+    await _invalidate_analytics(current_user["user_id"])
+    # Fold the new expense into the recurring payment series after responding
+    background_tasks.add_task(recurring_scanner.scan_user, current_user["user_id"])
+    await db.refresh(db_expense)
     
     return db_expense
 
+@router.post("/import")
+async def import_expenses_bulk(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: Optional[str] = Query(None, description="csv or ndjson; inferred from Content-Type when omitted"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Bulk import expenses from a CSV or NDJSON request body
+    
+    The body is parsed as it streams in and written in batches. Rows that fail
+    validation are skipped and reported with their row number.
+    """
+    
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "json" in content_type else "csv"
+    format = format.lower()
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format. Must be one of: {', '.join(IMPORT_FORMATS)}"
+        )
+    
+    lines = iter_lines(request.stream())
+    rows = iter_csv_rows(lines) if format == "csv" else iter_ndjson_rows(lines)
+    
+    try:
+        return await import_expenses(db, current_user["user_id"], rows)
+    finally:
+        # Batches commit as they go, so invalidate even if the body fails midway
+        await _invalidate_analytics(current_user["user_id"])
+        background_tasks.add_task(recurring_scanner.scan_user, current_user["user_id"])
+
 @router.get("/", response_model=List[ExpenseResponse])
 async def get_expenses(
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, le=1000),
+    limit: int = Query(100, ge=1, le=1000),
     category: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get expenses with optional filtering"""
+    """Get expenses with optional filtering
+    
+    Pass the X-Next-Cursor header of a page back as `cursor` to fetch the next
+    page by keyset instead of skip, which keeps deep pages as cheap as the first.
+    """
     
-    query = db.query(Expense).filter(Expense.user_id == current_user["user_id"])
+    query = select(*EXPENSE_RESPONSE_COLUMNS).where(Expense.user_id == current_user["user_id"])
     
     if category:
-        query = query.filter(Expense.category == category)
+        query = query.where(Expense.category == category)
     
-    expenses = query.order_by(Expense.date.desc()).offset(skip).limit(limit).all()
-    return expenses
+    # Matches ix_expenses_user_date_id: newest first, ties broken by id
+    query = query.order_by(Expense.date.desc(), Expense.id.asc())
+    
+    if cursor:
+        cursor_date, cursor_id = _decode_cursor(cursor)
+        # The redundant upper bound gives every planner a seekable range on
+        # the index; PostgreSQL cannot derive one from the OR alone
+        query = query.where(Expense.date <= cursor_date, or_(
+            Expense.date < cursor_date,
+            and_(Expense.date == cursor_date, Expense.id > cursor_id)
+        ))
+    else:
+        query = query.offset(skip)
+    
+    rows = (await db.execute(query.limit(limit))).all()
+    
+    headers = {}
+    if rows and len(rows) == limit:
+        headers[NEXT_CURSOR_HEADER] = _encode_cursor(rows[-1])
+    
+    # Plain column tuples encoded directly: no ORM identity map, per-row
+    # model validation or jsonable_encoder pass on pages of up to 1000 rows
+    return FastJSONResponse(rows_to_dicts(EXPENSE_RESPONSE_FIELDS, rows), headers=headers)
+
+@router.get("/export")
+async def export_expenses(
+    format: str = Query("csv", description="csv, ndjson or columnar"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream the user's full expense history in one response"""
+    
+    format = format.lower()
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format. Must be one of: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+    
+    # The export generator opens its own sync session; StreamingResponse
+    # iterates it in a worker thread, so it never blocks the event loop
+    filename = f"expenses.{EXPORT_EXTENSIONS[format]}"
+    return StreamingResponse(
+        stream_export(SessionLocal, current_user["user_id"], format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.get("/{expense_id}", response_model=ExpenseResponse)
 async def get_expense(
     expense_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get a specific expense by ID"""
     
-    expense = db.query(Expense).filter(
+    expense = await db.scalar(select(Expense).where(
         Expense.id == expense_id,
         Expense.user_id == current_user["user_id"]
-    ).first()
+    ))
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
@@ -77,50 +207,86 @@ async def get_expense(
 async def update_expense(
     expense_id: int, 
     expense_update: ExpenseUpdate, 
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Update an existing expense"""
     
-    expense = db.query(Expense).filter(
+    expense = await db.scalar(select(Expense).where(
         Expense.id == expense_id,
         Expense.user_id == current_user["user_id"]
-    ).first()
+    ))
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
     update_data = expense_update.dict(exclude_unset=True)
+    
+    # Move the expense between rollup buckets (and, if its amount or
+    # description changed, anomaly statistics) in the same transaction
+    rescore = any(field in update_data for field in SCORED_FIELDS)
+    await db.run_sync(record_expense_removed, expense)
+    if rescore:
+        await db.run_sync(observe_expense_removed, expense)
+    previous_category = expense.category
     for field, value in update_data.items():
         setattr(expense, field, value)
+    await db.run_sync(record_expense_added, expense)
+    if rescore:
+        await db.run_sync(observe_expense_added, expense)
+    # The stored recurring payment history may hold the old values
+    rescan = any(field in update_data for field in SCANNED_FIELDS)
+    if rescan:
+        await db.run_sync(reset_recurring_scan, expense.user_id)
+    
+    # Remember the user's correction so the same merchant is categorized
+    # their way next time
+    if "category" in update_data and expense.category != previous_category:
+        await db.run_sync(
+            categorization_cache.record_override,
+            expense.user_id,
+            expense.description,
+            expense.category
+        )
     
-    db.commit()
-    db.refresh(expense)
+    await db.commit()
+    await _invalidate_analytics(current_user["user_id"])
+    if rescan:
+        background_tasks.add_task(recurring_scanner.scan_user, current_user["user_id"])
+    await db.refresh(expense)
     
     return expense
 
 @router.delete("/{expense_id}")
 async def delete_expense(
     expense_id: int, 
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Delete an expense"""
     
-    expense = db.query(Expense).filter(
+    expense = await db.scalar(select(Expense).where(
         Expense.id == expense_id,
         Expense.user_id == current_user["user_id"]
-    ).first()
+    ))
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
-    db.delete(expense)
-    db.commit()
+    # Flags go before the expense row they refer to
+    await db.run_sync(observe_expense_removed, expense)
+    await db.delete(expense)
+    await db.run_sync(record_expense_removed, expense)
+    await db.run_sync(reset_recurring_scan, expense.user_id)
+    await db.commit()
+    await _invalidate_analytics(current_user["user_id"])
+    background_tasks.add_task(recurring_scanner.scan_user, current_user["user_id"])
     
     return {"message": "Expense deleted successfully"}
 
 @router.get("/categories/list")
 async def get_categories(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all available expense categories"""
@@ -1,8 +1,18 @@
 import os
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Mapping, Optional, Sequence, Set, Tuple
 from datetime import datetime, timedelta
 import json
 
+from starlette.concurrency import run_in_threadpool
+
+from .category_cache import categorization_cache, normalize_description
+from .keyword_categorizer import categorize_by_keywords_batch, chat_intent_rules
+from .ml_categorizer import ML_CATEGORIZER_MIN_CONFIDENCE, predict_categories
+from ..utils.log import get_logger
+
+logger = get_logger("ai")
+
 # Try to import OpenAI, make it optional for now
 try:
     import openai
@@ -10,7 +20,7 @@ try:
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
-    print("OpenAI not available. Install 'openai' package for AI features.")
+    logger.warning("OpenAI not available. Install 'openai' package for AI features.")
 
 # Common expense categories
 EXPENSE_CATEGORIES = [
@@ -19,57 +29,197 @@ EXPENSE_CATEGORIES = [
     "Groceries", "Gas", "Insurance", "Investment", "Other"
 ]
 
-async def categorize_expense(description: str) -> str:
-    """Use AI to categorize an expense based on its description"""
+# OpenAI client settings
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "15"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+# Categorization micro-batching: concurrent requests arriving within the
+# window are sent to the model as a single multi-item prompt
+CATEGORIZE_BATCH_SIZE = int(os.getenv("CATEGORIZE_BATCH_SIZE", "25"))
+CATEGORIZE_BATCH_WINDOW_MS = float(os.getenv("CATEGORIZE_BATCH_WINDOW_MS", "20"))
+
+_openai_client = None
+_openai_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+def _ai_enabled() -> bool:
+    return OPENAI_AVAILABLE and bool(openai.api_key)
+
+def get_openai_client():
+    """Shared async OpenAI client with timeouts and retries configured"""
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = openai.AsyncOpenAI(
+            api_key=openai.api_key,
+            base_url=OPENAI_BASE_URL,
+            timeout=OPENAI_TIMEOUT_SECONDS,
+            max_retries=OPENAI_MAX_RETRIES
+        )
+    return _openai_client
+
+async def _chat_completion(**kwargs):
+    """Run a chat completion without blocking the event loop"""
+    async with _openai_semaphore:
+        return await get_openai_client().chat.completions.create(**kwargs)
+
+def _validate_category(category: Any) -> str:
+    if isinstance(category, str) and category.strip() in EXPENSE_CATEGORIES:
+        return category.strip()
+    return "Other"
+
+async def _request_categories(descriptions: List[str]) -> List[str]:
+    """Categorize several descriptions with one model call"""
+    numbered = "\n".join(f"{i + 1}. {description}" for i, description in enumerate(descriptions))
+    response = await _chat_completion(
+        model=OPENAI_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": f"""You are a financial categorization assistant. 
+                Categorize each numbered expense description into one of these categories: {', '.join(EXPENSE_CATEGORIES)}.
+                Return ONLY a JSON array with one category name per description, in the same order."""
+            },
+            {
+                "role": "user",
+                "content": f"Categorize these expenses:\n{numbered}"
+            }
+        ],
+        max_tokens=20 + 12 * len(descriptions),
+        temperature=0.1
+    )
     
-    if not OPENAI_AVAILABLE or not openai.api_key:
-        # Fallback to simple keyword matching
-        description_lower = description.lower()
-        
-        if any(word in description_lower for word in ['grocery', 'food', 'restaurant', 'coffee', 'lunch', 'dinner']):
-            return "Food & Dining"
-        elif any(word in description_lower for word in ['gas', 'fuel', 'uber', 'taxi', 'bus', 'train']):
-            return "Transportation"
-        elif any(word in description_lower for word in ['electric', 'water', 'rent', 'mortgage', 'phone', 'internet']):
-            return "Bills & Utilities"
-        elif any(word in description_lower for word in ['shopping', 'store', 'amazon', 'clothes']):
-            return "Shopping"
-        else:
-            return "Other"
+    content = response.choices[0].message.content.strip()
+    if len(descriptions) == 1 and not content.startswith("["):
+        # Tolerate a bare category name for single items
+        return [_validate_category(content)]
     
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"""You are a financial categorization assistant. 
-                    Categorize the expense description into one of these categories: {', '.join(EXPENSE_CATEGORIES)}.
-                    Return ONLY the category name, nothing else."""
-                },
-                {
-                    "role": "user",
-                    "content": f"Categorize this expense: {description}"
-                }
-            ],
-            max_tokens=50,
-            temperature=0.1
-        )
+    categories = json.loads(content)
+    if not isinstance(categories, list) or len(categories) != len(descriptions):
+        raise ValueError(f"Expected {len(descriptions)} categories, got {content[:100]}")
+    return [_validate_category(category) for category in categories]
+
+class CategorizationBatcher:
+    """Coalesces concurrent categorization requests into multi-item prompts
+    
+    Requests wait at most window_seconds (or until max_batch_size is reached)
+    before being flushed together as one model call.
+    """
+    
+    def __init__(self, max_batch_size: int, window_seconds: float):
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks; holding them here
+        # keeps in-flight batches from being garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def categorize(self, description: str) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((description, future))
         
-        category = response.choices[0].message.content.strip()
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
         
-        # Validate the category is in our list
-        if category in EXPENSE_CATEGORIES:
-            return category
-        else:
-            return "Other"
-            
-    except Exception as e:
-        print(f"Error categorizing expense: {e}")
-        return "Other"
+        return await future
+    
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        # One prompt line per normalized description
+        representatives = {}
+        for description, _ in batch:
+            representatives.setdefault(normalize_description(description) or description, description)
+        keys = list(representatives)
+        categories = {}
+        try:
+            answers = await _request_categories([representatives[key] for key in keys])
+            categories = dict(zip(keys, answers))
+        except Exception as e:
+            logger.error("Error categorizing expenses", extra={"error": str(e), "batch_size": len(keys)})
+        finally:
+            # None tells the caller the model could not answer for this item;
+            # a cancelled batch answers None rather than leaving callers waiting
+            for description, future in batch:
+                if not future.done():
+                    future.set_result(categories.get(normalize_description(description) or description))
+    
+    async def close(self, timeout: float = 10) -> None:
+        """Flush waiting requests and let in-flight batches finish for up to
+        timeout seconds, then cancel them"""
+        self._flush()
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+categorization_batcher = CategorizationBatcher(
+    max_batch_size=CATEGORIZE_BATCH_SIZE,
+    window_seconds=CATEGORIZE_BATCH_WINDOW_MS / 1000
+)
+
+async def categorize_expense(description: str, user_id: Optional[int] = None) -> str:
+    """Use AI to categorize an expense based on its description"""
+    
+    return (await categorize_expenses([description], user_id))[0]
+
+async def categorize_expenses(descriptions: List[str], user_id: Optional[int] = None) -> List[str]:
+    """Categorize many descriptions, asking once per distinct description
+    
+    Known descriptions are answered from the categorization cache (including
+    the user's own corrections), then by the local model when it is confident;
+    only the rest reach the LLM.
+    """
+    
+    unique = list(dict.fromkeys(descriptions))
+    categories = await run_in_threadpool(categorization_cache.lookup_many, unique, user_id)
+    pending = [description for description in unique if description not in categories]
+    
+    # The local model answers whatever it is confident about
+    predictions = predict_categories(pending) if pending else {}
+    for description, (category, confidence) in predictions.items():
+        if confidence >= ML_CATEGORIZER_MIN_CONFIDENCE:
+            categories[description] = category
+    pending = [description for description in pending if description not in categories]
+    
+    if pending and _ai_enabled():
+        answers = await asyncio.gather(*(categorization_batcher.categorize(d) for d in pending))
+        learned = {d: category for d, category in zip(pending, answers) if category is not None}
+        if learned:
+            await run_in_threadpool(categorization_cache.store_many, learned)
+        categories.update(learned)
+    
+    fallback = [description for description in pending if description not in categories]
+    for description, category in zip(fallback, categorize_by_keywords_batch(fallback)):
+        categories[description] = category
+    
+    return [categories[description] for description in descriptions]
 
-async def get_financial_insights(expenses_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Generate AI-powered financial insights from expense data"""
+async def get_financial_insights(
+    expenses_data: List[Dict[str, Any]],
+    days: int = 30,
+    forecast: Optional[Dict[str, Any]] = None,
+    flags: Sequence[Mapping[str, Any]] = (),
+    recurring: Sequence[Mapping[str, Any]] = ()
+) -> Dict[str, Any]:
+    """Generate AI-powered financial insights from expense data over the last
+    `days` days, plus a month-end forecast, anomaly flags and active recurring
+    payments when given"""
     
     if not expenses_data:
         return {"insights": ["No expenses found"], "recommendations": ["Start tracking expenses"]}
@@ -92,10 +242,58 @@ async def get_financial_insights(expenses_data: List[Dict[str, Any]]) -> Dict[st
         insights.append(f"Your highest spending category is {top_category[0]} at ${top_category[1]:.2f}")
     
     # Daily average
-    days = 30  # Assume last 30 days
-    daily_avg = total_amount / days
+    daily_avg = total_amount / days if days > 0 else 0
     insights.append(f"Your daily average spending is ${daily_avg:.2f}")
     
+    # Month-end projection
+    if forecast:
+        projection = f"At your current pace you will spend about ${forecast['projected_total']:.2f} this month"
+        # Too little history gives no spread to quote
+        if forecast["projected_high"] > forecast["projected_low"]:
+            projection += f" (likely ${forecast['projected_low']:.2f}-${forecast['projected_high']:.2f})"
+        insights.append(projection)
+        growing = [
+            entry for entry in forecast["categories"]
+            if entry["projected_remaining"] > 0 and entry["projected_total"] > forecast["projected_total"] * 0.3
+        ]
+        for entry in growing[:1]:
+            recommendations.append(
+                f"{entry['category']} is projected to reach ${entry['projected_total']:.2f} by month-end - "
+                f"watch it over the next {forecast['days_remaining']} days"
+            )
+    
+    # Unusual charges and likely duplicates flagged when they were entered
+    unusual = [flag for flag in flags if flag["kind"] == "unusual_amount"]
+    duplicates = [flag for flag in flags if flag["kind"] == "possible_duplicate"]
+    if unusual:
+        largest = max(unusual, key=lambda flag: flag["score"])
+        insights.append(
+            f"{len(unusual)} unusually large charge{'s' if len(unusual) > 1 else ''} this period, "
+            f"e.g. {largest['description']}: {largest['message']}"
+        )
+    for flag in duplicates[:2]:
+        recommendations.append(
+            f"Check for a double charge: {flag['description']} (${flag['amount']:.2f}) was entered twice"
+        )
+    
+    # Subscriptions and other repeating charges
+    if recurring:
+        monthly = sum(payment["monthly_cost"] for payment in recurring)
+        insights.append(
+            f"You have {len(recurring)} recurring payment{'s' if len(recurring) > 1 else ''} "
+            f"costing about ${monthly:.2f} a month"
+        )
+        soon = datetime.now() + timedelta(days=7)
+        upcoming = [
+            payment for payment in recurring
+            if payment["next_expected"] is not None and payment["next_expected"] <= soon
+        ]
+        for payment in upcoming[:2]:
+            recommendations.append(
+                f"{payment['description']} (${payment['typical_amount']:.2f}) is due around "
+                f"{payment['next_expected']:%b %d} - cancel it first if you no longer use it"
+            )
+    
     # Recommendations based on patterns
     if total_amount > 1000:
         recommendations.append("Consider setting a monthly budget to track your spending")
@@ -113,14 +311,14 @@ async def get_financial_insights(expenses_data: List[Dict[str, Any]]) -> Dict[st
 async def chat_with_assistant(message: str, context: Dict[str, Any] = None) -> str:
     """Chat with the AI assistant about finances"""
     
-    if not OPENAI_AVAILABLE or not openai.api_key:
+    if not _ai_enabled():
         # Provide basic responses without AI
-        message_lower = message.lower()
+        intent = chat_intent_rules.classify(message)
         
-        if any(word in message_lower for word in ['budget', 'save', 'saving']):
+        if intent == "budget":
             return "Great question about budgeting! I recommend tracking your expenses regularly and setting spending limits for each category. A good rule of thumb is the 50/30/20 rule: 50% for needs, 30% for wants, and 20% for savings."
         
-        elif any(word in message_lower for word in ['spend', 'spending', 'expense']):
+        elif intent == "spending":
             return "To manage spending effectively, try categorizing your expenses and look for patterns. Focus on reducing variable expenses like dining out or entertainment if you need to cut costs."
         
         else:
@@ -140,8 +338,8 @@ async def chat_with_assistant(message: str, context: Dict[str, Any] = None) -> s
         system_prompt += f"\n\nUser's financial context: {json.dumps(context)}"
     
     try:
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = await _chat_completion(
+            model=OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": message}
@@ -153,5 +351,5 @@ async def chat_with_assistant(message: str, context: Dict[str, Any] = None) -> s
         return response.choices[0].message.content.strip()
         
     except Exception as e:
-        print(f"Error in chat: {e}")
+        logger.error("Error in chat", extra={"error": str(e)})
         return "I'm having trouble responding right now. Please try again later." 
\ No newline at end of file
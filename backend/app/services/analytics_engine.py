@@ -0,0 +1,186 @@
+"""
+Vectorized analytics engine
+Loads a user's (date, amount, category) columns into NumPy arrays once and
+computes distribution statistics, rolling sums, weekday/hour heatmaps and
+amount histograms with array operations instead of Python loops over rows.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.expense import Expense
+
+PERCENTILES = (10, 25, 50, 75, 90, 95, 99)
+ROLLING_WINDOWS = (7, 30)
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+# 1970-01-01 (day 0 of datetime64) was a Thursday
+_EPOCH_WEEKDAY = 3
+
+def _money(value: float) -> float:
+    return round(float(value), 2)
+
+class ExpenseArrays:
+    """Parallel column arrays for a set of expenses: amounts (float64),
+    timestamps (datetime64[s]) and categories as integer codes into
+    category_names"""
+    
+    __slots__ = ("amounts", "timestamps", "category_codes", "category_names")
+    
+    def __init__(self, amounts: np.ndarray, timestamps: np.ndarray, category_codes: np.ndarray, category_names: List[str]):
+        self.amounts = amounts
+        self.timestamps = timestamps
+        self.category_codes = category_codes
+        self.category_names = category_names
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[datetime, float, str]]) -> "ExpenseArrays":
+        """Build from (date, amount, category) tuples"""
+        # One pass per column; NumPy's own datetime parsing is far slower
+        # than subtracting the epoch in Python
+        rows = rows if isinstance(rows, list) else list(rows)
+        count = len(rows)
+        codes = {}
+        return cls(
+            np.fromiter((row[1] for row in rows), dtype=np.float64, count=count),
+            np.fromiter(((row[0] - _EPOCH) // _SECOND for row in rows), dtype=np.int64, count=count)
+            .astype("datetime64[s]"),
+            np.fromiter((codes.setdefault(row[2], len(codes)) for row in rows), dtype=np.intp, count=count),
+            list(codes)
+        )
+    
+    def __len__(self) -> int:
+        return len(self.amounts)
+    
+    def day_numbers(self) -> np.ndarray:
+        """Days since 1970-01-01"""
+        return self.timestamps.astype("datetime64[D]").astype(np.int64)
+
+async def load_expense_arrays(
+    db: AsyncSession,
+    user_id: int,
+    start_date: datetime,
+    category: Optional[str] = None
+) -> ExpenseArrays:
+    """One index range scan (user_id, date) into column arrays"""
+    query = select(Expense.date, Expense.amount, Expense.category).where(
+        Expense.user_id == user_id,
+        Expense.date >= start_date
+    )
+    if category is not None:
+        query = query.where(Expense.category == category)
+    result = await db.execute(query)
+    return ExpenseArrays.from_rows(result.all())
+
+def summary_stats(amounts: np.ndarray, percentiles: Sequence[int] = PERCENTILES) -> Dict[str, Any]:
+    """Count, total, mean, median, standard deviation, extremes and percentiles"""
+    if len(amounts) == 0:
+        return {
+            "count": 0, "total": 0.0, "mean": 0.0, "median": 0.0, "std": 0.0,
+            "min": 0.0, "max": 0.0, "percentiles": {f"p{p}": 0.0 for p in percentiles}
+        }
+    values = np.percentile(amounts, percentiles)
+    return {
+        "count": int(len(amounts)),
+        "total": _money(amounts.sum()),
+        "mean": _money(amounts.mean()),
+        "median": _money(np.median(amounts)),
+        "std": _money(amounts.std()),
+        "min": _money(amounts.min()),
+        "max": _money(amounts.max()),
+        "percentiles": {f"p{p}": _money(value) for p, value in zip(percentiles, values)}
+    }
+
+def category_stats(arrays: ExpenseArrays) -> List[Dict[str, Any]]:
+    """summary_stats per category, largest total first"""
+    order = np.argsort(arrays.category_codes, kind="stable")
+    codes = arrays.category_codes[order]
+    amounts = arrays.amounts[order]
+    # Sorted by code, each category is one contiguous slice
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    stats = [
+        {"category": arrays.category_names[group_codes[0]], **summary_stats(group)}
+        for group_codes, group in zip(np.split(codes, bounds), np.split(amounts, bounds))
+        if len(group)
+    ]
+    stats.sort(key=lambda entry: entry["total"], reverse=True)
+    return stats
+
+def daily_totals(arrays: ExpenseArrays, first_day: date, days: int) -> np.ndarray:
+    """Spending per calendar day for `days` days from first_day (zeros for empty days)"""
+    offsets = arrays.day_numbers() - (first_day - date(1970, 1, 1)).days
+    in_range = (offsets >= 0) & (offsets < days)
+    return np.bincount(offsets[in_range], weights=arrays.amounts[in_range], minlength=days)
+
+def rolling_sums(
+    arrays: ExpenseArrays,
+    first_day: date,
+    days: int,
+    windows: Sequence[int] = ROLLING_WINDOWS
+) -> List[Dict[str, Any]]:
+    """Daily totals with trailing rolling sums; arrays must cover
+    max(windows) - 1 days before first_day so the early windows are full"""
+    lead = max(windows) - 1
+    totals = daily_totals(arrays, first_day - timedelta(days=lead), days + lead)
+    cumulative = np.concatenate(([0.0], np.cumsum(totals)))
+    end = np.arange(lead + 1, lead + days + 1)
+    rolling = {window: cumulative[end] - cumulative[end - window] for window in windows}
+    return [
+        {
+            "date": (first_day + timedelta(days=i)).isoformat(),
+            "total_amount": _money(totals[lead + i]),
+            **{f"rolling_{window}d": _money(rolling[window][i]) for window in windows}
+        }
+        for i in range(days)
+    ]
+
+def weekday_hour_heatmap(arrays: ExpenseArrays) -> Dict[str, Any]:
+    """7x24 grids (Monday first) of spending and expense counts"""
+    seconds = arrays.timestamps.astype(np.int64)
+    weekday = (seconds // 86400 + _EPOCH_WEEKDAY) % 7
+    hour = seconds % 86400 // 3600
+    cells = weekday * 24 + hour
+    totals = np.bincount(cells, weights=arrays.amounts, minlength=168).reshape(7, 24)
+    counts = np.bincount(cells, minlength=168).reshape(7, 24)
+    return {
+        "weekdays": WEEKDAYS,
+        "hours": list(range(24)),
+        "total_amount": np.round(totals, 2).tolist(),
+        "expense_count": counts.tolist(),
+        "weekday_totals": np.round(totals.sum(axis=1), 2).tolist(),
+        "hour_totals": np.round(totals.sum(axis=0), 2).tolist()
+    }
+
+def amount_histogram(amounts: np.ndarray, bins: int = 20, log_scale: bool = False) -> List[Dict[str, Any]]:
+    """Amount buckets with expense counts and spending per bucket; log_scale
+    uses geometric bucket widths, which suits long-tailed amounts"""
+    positive = amounts[amounts > 0]
+    if len(positive) == 0:
+        return []
+    low, high = positive.min(), positive.max()
+    if log_scale and high > low:
+        edges = np.geomspace(low, high, bins + 1)
+    else:
+        edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+    counts, _ = np.histogram(positive, bins=edges)
+    totals, _ = np.histogram(positive, bins=edges, weights=positive)
+    return [
+        {
+            "lower": _money(edges[i]),
+            "upper": _money(edges[i + 1]),
+            "expense_count": int(counts[i]),
+            "total_amount": _money(totals[i])
+        }
+        for i in range(bins)
+    ]
+
+def window_start(days: int, now: Optional[datetime] = None) -> datetime:
+    """Midnight at the start of the last `days` calendar days (today included)"""
+    today = (now or datetime.now()).date()
+    return datetime.combine(today - timedelta(days=days - 1), time.min)
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Streaming anomaly detection
+Scores each expense as it is written against the user's running
+distribution of amounts in its category, and checks it for a likely
+duplicate (same amount and description a short time apart).
+
+The distribution is Welford's running mean and sum of squared deviations
+over log amounts (spending is right-skewed), one expense_category_stats row
+per user and category. Each write touches that row plus one bounded range
+of ix_expenses_user_date_id, never the user's history. Removing an expense
+reverses its contribution exactly, so update_expense (remove, then add) and
+delete_expense keep the state equal to what a rebuild would produce.
+"""
+
+import math
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Select, delete, or_, select
+from sqlalchemy.orm import Session
+
+from .category_cache import normalize_description
+from ..models.anomaly import ExpenseCategoryStats, ExpenseFlag, FLAG_POSSIBLE_DUPLICATE, FLAG_UNUSUAL_AMOUNT
+from ..models.database import dialect_insert
+from ..models.expense import Expense
+
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.0"))
+# Charges in a category are only scored once it has this many
+ANOMALY_MIN_SAMPLES = int(os.getenv("ANOMALY_MIN_SAMPLES", "8"))
+DUPLICATE_WINDOW_HOURS = float(os.getenv("DUPLICATE_WINDOW_HOURS", "48"))
+
+# Lower bound on the standard deviation (in log amount, ~10%) so categories
+# of near-identical charges do not flag every small price change
+MIN_STD = 0.1
+# Fields whose change means an updated expense is scored again
+SCORED_FIELDS = ("description", "amount", "category", "date")
+
+Moments = Tuple[int, float, float]
+
+def _value(amount: float) -> float:
+    # Signed log: defined for refunds and other negative amounts too
+    return math.copysign(math.log1p(abs(amount)), amount)
+
+def _amount(value: float) -> float:
+    """Inverse of _value"""
+    return math.copysign(math.expm1(abs(value)), value)
+
+def welford_add(count: int, mean: float, m2: float, x: float) -> Moments:
+    count += 1
+    delta = x - mean
+    mean += delta / count
+    return count, mean, m2 + delta * (x - mean)
+
+def welford_remove(count: int, mean: float, m2: float, x: float) -> Moments:
+    """Inverse of welford_add"""
+    if count <= 1:
+        return 0, 0.0, 0.0
+    new_mean = (count * mean - x) / (count - 1)
+    return count - 1, new_mean, max(m2 - (x - mean) * (x - new_mean), 0.0)
+
+def welford_merge(a: Moments, b: Moments) -> Moments:
+    """Combine the moments of two disjoint sets (Chan et al.)"""
+    count = a[0] + b[0]
+    if count == 0:
+        return 0, 0.0, 0.0
+    delta = b[1] - a[1]
+    mean = a[1] + delta * b[0] / count
+    return count, mean, a[2] + b[2] + delta * delta * a[0] * b[0] / count
+
+def _moments(values: Iterable[float]) -> Moments:
+    moments = (0, 0.0, 0.0)
+    for value in values:
+        moments = welford_add(*moments, _value(value))
+    return moments
+
+def _locked_stats(db: Session, user_id: int, category: str) -> ExpenseCategoryStats:
+    """The user's stats row for a category, created empty if missing and
+    locked for the rest of the transaction (FOR UPDATE, where supported)"""
+    query = select(ExpenseCategoryStats).where(
+        ExpenseCategoryStats.user_id == user_id,
+        ExpenseCategoryStats.category == category
+    ).with_for_update()
+    stats = db.scalars(query).first()
+    if stats is not None:
+        return stats
+    
+    upsert = dialect_insert(db.get_bind())
+    if upsert is None:
+        stats = ExpenseCategoryStats(user_id=user_id, category=category, count=0, mean=0.0, m2=0.0)
+        db.add(stats)
+        return stats
+    # A concurrent first write to the same category may have created it
+    db.execute(upsert(ExpenseCategoryStats).values(
+        user_id=user_id, category=category, count=0, mean=0.0, m2=0.0
+    ).on_conflict_do_nothing(index_elements=["user_id", "category"]))
+    return db.scalars(query).one()
+
+def _store(stats: ExpenseCategoryStats, moments: Moments) -> None:
+    stats.count, stats.mean, stats.m2 = moments
+
+def z_score(stats: ExpenseCategoryStats, amount: float) -> Optional[float]:
+    """How many standard deviations above the category's typical log amount"""
+    if stats.count < ANOMALY_MIN_SAMPLES:
+        return None
+    std = max(math.sqrt(stats.m2 / (stats.count - 1)), MIN_STD)
+    return (_value(amount) - stats.mean) / std
+
+def _find_duplicate(db: Session, expense: Expense) -> Optional[Tuple[int, float]]:
+    """(id, hours apart) of another expense with the same amount and
+    description within DUPLICATE_WINDOW_HOURS, if any"""
+    if expense.date is None:
+        return None
+    window = timedelta(hours=DUPLICATE_WINDOW_HOURS)
+    candidates = db.execute(select(Expense.id, Expense.description, Expense.date).where(
+        Expense.user_id == expense.user_id,
+        Expense.date >= expense.date - window,
+        Expense.date <= expense.date + window,
+        Expense.amount == expense.amount,
+        Expense.id != expense.id
+    ).order_by(Expense.date.desc()).limit(20)).all()
+    
+    key = normalize_description(expense.description)
+    matches = [
+        (abs((date - expense.date).total_seconds()) / 3600, expense_id)
+        for expense_id, description, date in candidates
+        if normalize_description(description) == key
+    ]
+    if not matches:
+        return None
+    hours, expense_id = min(matches)
+    return expense_id, hours
+
+def observe_expense_added(db: Session, expense: Expense) -> List[ExpenseFlag]:
+    """Score a new (or just updated) expense, flag it if needed, and add it
+    to the category statistics, inside the caller's transaction"""
+    # The expense needs its id for the flags and the duplicate check
+    db.flush()
+    stats = _locked_stats(db, expense.user_id, expense.category)
+    
+    flags = []
+    score = z_score(stats, expense.amount)
+    if score is not None and score >= ANOMALY_Z_THRESHOLD:
+        flags.append(ExpenseFlag(
+            user_id=expense.user_id,
+            expense_id=expense.id,
+            kind=FLAG_UNUSUAL_AMOUNT,
+            score=round(score, 2),
+            message=(
+                f"${expense.amount:.2f} is unusually high for {expense.category} "
+                f"(typically about ${_amount(stats.mean):.2f})"
+            )
+        ))
+    
+    duplicate = _find_duplicate(db, expense)
+    if duplicate is not None:
+        related_id, hours = duplicate
+        flags.append(ExpenseFlag(
+            user_id=expense.user_id,
+            expense_id=expense.id,
+            kind=FLAG_POSSIBLE_DUPLICATE,
+            score=round(hours, 2),
+            message=f"Same amount and description as another expense {hours:.0f} hours apart",
+            related_expense_id=related_id
+        ))
+    
+    _store(stats, welford_add(stats.count, stats.mean, stats.m2, _value(expense.amount)))
+    db.add_all(flags)
+    return flags
+
+def observe_expense_removed(db: Session, expense: Expense, drop_flags: bool = True) -> None:
+    """Take an expense (with its current values) out of the statistics and,
+    unless drop_flags is False, drop the flags on or pointing at it; call
+    before deleting or changing it"""
+    stats = _locked_stats(db, expense.user_id, expense.category)
+    moments = welford_remove(stats.count, stats.mean, stats.m2, _value(expense.amount))
+    if moments[0] == 0:
+        db.delete(stats)
+    else:
+        _store(stats, moments)
+    
+    if not drop_flags:
+        return
+    db.execute(delete(ExpenseFlag).where(or_(
+        ExpenseFlag.expense_id == expense.id,
+        ExpenseFlag.related_expense_id == expense.id
+    )))
+
+def observe_expenses_imported(db: Session, user_id: int, rows: Iterable[Dict]) -> None:
+    """Merge a bulk-inserted batch into the statistics without scoring it"""
+    amounts = defaultdict(list)
+    for row in rows:
+        amounts[row["category"]].append(row["amount"])
+    for category, values in amounts.items():
+        stats = _locked_stats(db, user_id, category)
+        _store(stats, welford_merge((stats.count, stats.mean, stats.m2), _moments(values)))
+
+def flags_query(user_id: int, since: datetime, include_dismissed: bool = False) -> Select:
+    """A user's flags with their expense, newest first, in ExpenseFlagResponse field order"""
+    query = select(
+        ExpenseFlag.id,
+        ExpenseFlag.expense_id,
+        ExpenseFlag.kind,
+        ExpenseFlag.score,
+        ExpenseFlag.message,
+        ExpenseFlag.related_expense_id,
+        ExpenseFlag.dismissed,
+        ExpenseFlag.created_at,
+        Expense.description,
+        Expense.amount,
+        Expense.category,
+        Expense.date
+    ).join(Expense, (Expense.id == ExpenseFlag.expense_id) & (Expense.user_id == ExpenseFlag.user_id)).where(
+        ExpenseFlag.user_id == user_id,
+        ExpenseFlag.created_at >= since
+    )
+    if not include_dismissed:
+        query = query.where(ExpenseFlag.dismissed.is_(False))
+    return query.order_by(ExpenseFlag.created_at.desc(), ExpenseFlag.id.desc())
+
+def rebuild_anomaly_stats(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute the category statistics from raw expenses, for one user or
+    everyone; flags are kept. Returns the number of rows written. The caller
+    commits."""
+    clear = delete(ExpenseCategoryStats)
+    source = select(Expense.user_id, Expense.category, Expense.amount)
+    if user_id is not None:
+        clear = clear.where(ExpenseCategoryStats.user_id == user_id)
+        source = source.where(Expense.user_id == user_id)
+    db.execute(clear)
+    
+    moments: Dict[Tuple[int, str], Moments] = defaultdict(lambda: (0, 0.0, 0.0))
+    for row_user_id, category, amount in db.execute(source.execution_options(yield_per=10000)):
+        key = (row_user_id, category)
+        moments[key] = welford_add(*moments[key], _value(amount))
+    
+    db.add_all(
+        ExpenseCategoryStats(user_id=key[0], category=key[1], count=count, mean=mean, m2=m2)
+        for key, (count, mean, m2) in moments.items()
+    )
+    return len(moments)
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""
+Categorization cache
+Two tiers in front of the categorizer: an in-process LRU with TTL, backed
+by the category_cache table. User corrections are stored per user and take
+precedence over the shared mappings learned from the AI.
+
+Every correction also bumps the user's override version, and a user's
+cached answers (their correction, or that they have none) are kept under
+the version they were read at. A user's lookup reads that one version row
+and is then answered from memory, shared mapping included, while a
+correction recorded by another process applies immediately instead of
+after the TTL.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models.category_cache import CategoryCacheEntry, CategoryOverrideVersion, GLOBAL_SCOPE
+from ..models.database import SessionLocal, dialect_insert
+from ..utils.cache import TTLCache
+from ..utils.log import get_logger
+
+logger = get_logger("category_cache")
+
+CATEGORY_CACHE_SIZE = int(os.getenv("CATEGORY_CACHE_SIZE", "10000"))
+CATEGORY_CACHE_TTL_SECONDS = float(os.getenv("CATEGORY_CACHE_TTL_SECONDS", "3600"))
+
+SOURCE_AI = "ai"
+SOURCE_USER = "user"
+
+_NOISE = re.compile(r"[\d#*_/\\.,:;!?()\[\]{}'\"-]+")
+_SPACES = re.compile(r"\s+")
+
+# Cached for a user key the user has not corrected
+_NO_OVERRIDE = object()
+
+def normalize_description(description: str) -> str:
+    """Reduce a description to a merchant-like key
+    
+    "UBER *TRIP 8841" and "Uber trip" both become "uber trip".
+    """
+    key = _NOISE.sub(" ", description.lower())
+    return _SPACES.sub(" ", key).strip()
+
+class CategorizationCache:
+    """In-process LRU over a database-backed description -> category map"""
+    
+    def __init__(self, session_factory=SessionLocal, max_size: int = 10000, ttl_seconds: float = 3600):
+        self.session_factory = session_factory
+        self.memory = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overrides = 0
+    
+    def _override_version(self, db: Session, user_id: int) -> Optional[int]:
+        try:
+            return db.scalar(
+                select(CategoryOverrideVersion.version).where(CategoryOverrideVersion.user_id == user_id)
+            ) or 0
+        except Exception as e:
+            db.rollback()
+            logger.error("Error reading categorization override version", extra={"error": str(e)})
+            return None
+    
+    def _memory_get(self, user_id: Optional[int], version: Optional[int], key: str) -> Optional[str]:
+        if user_id:
+            if version is None:
+                return None
+            override = self.memory.get((user_id, version, key))
+            if override is not _NO_OVERRIDE:
+                return override
+        return self.memory.get((GLOBAL_SCOPE, key))
+    
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+    
+    def lookup_many(self, descriptions: Iterable[str], user_id: Optional[int] = None) -> Dict[str, str]:
+        """Return cached categories for whichever descriptions are known"""
+        keys = {}
+        for description in descriptions:
+            key = normalize_description(description)
+            if key:
+                keys.setdefault(key, []).append(description)
+        if not keys:
+            return {}
+        
+        db = self.session_factory()
+        try:
+            version = self._override_version(db, user_id) if user_id else None
+            found = {}
+            missing = {}
+            for key, matches in keys.items():
+                category = self._memory_get(user_id, version, key)
+                if category is not None:
+                    found.update(dict.fromkeys(matches, category))
+                else:
+                    missing[key] = matches
+            
+            self._count("memory_hits", len(found))
+            if not missing:
+                return found
+            
+            scopes = [GLOBAL_SCOPE] if not user_id else [GLOBAL_SCOPE, user_id]
+            try:
+                rows = db.execute(
+                    select(
+                        CategoryCacheEntry.user_id,
+                        CategoryCacheEntry.description_key,
+                        CategoryCacheEntry.category
+                    ).where(
+                        CategoryCacheEntry.user_id.in_(scopes),
+                        CategoryCacheEntry.description_key.in_(list(missing))
+                    )
+                ).all()
+            except Exception as e:
+                logger.error("Error reading categorization cache", extra={"error": str(e)})
+                return found
+        finally:
+            db.close()
+        
+        # A user's own correction wins over the shared mapping
+        resolved = {}
+        for scope, key, category in sorted(rows, key=lambda row: row[0] != GLOBAL_SCOPE):
+            resolved[key] = (scope, category)
+        
+        for key, (scope, category) in resolved.items():
+            if scope == GLOBAL_SCOPE:
+                self.memory.set((GLOBAL_SCOPE, key), category)
+            for description in missing[key]:
+                found[description] = category
+        if version is not None:
+            # Read after the version: a correction committed in between is
+            # cached under the version it already superseded
+            for key in missing:
+                scope, category = resolved.get(key, (GLOBAL_SCOPE, None))
+                self.memory.set((user_id, version, key), category if scope != GLOBAL_SCOPE else _NO_OVERRIDE)
+        
+        self._count("db_hits", len(resolved))
+        self._count("misses", len(missing) - len(resolved))
+        return found
+    
+    def lookup(self, description: str, user_id: Optional[int] = None) -> Optional[str]:
+        return self.lookup_many([description], user_id).get(description)
+    
+    def _upsert(self, db: Session, user_id: int, key: str, category: str, source: str):
+        upsert = dialect_insert(db.get_bind())
+        if upsert is not None:
+            stmt = upsert(CategoryCacheEntry).values(
+                user_id=user_id,
+                description_key=key,
+                category=category,
+                source=source
+            )
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["user_id", "description_key"],
+                set_={"category": stmt.excluded.category, "source": stmt.excluded.source}
+            ))
+            return
+        
+        entry = db.get(CategoryCacheEntry, (user_id, key))
+        if entry is None:
+            db.add(CategoryCacheEntry(user_id=user_id, description_key=key, category=category, source=source))
+        else:
+            entry.category = category
+            entry.source = source
+    
+    def _bump_override_version(self, db: Session, user_id: int):
+        upsert = dialect_insert(db.get_bind())
+        if upsert is not None:
+            stmt = upsert(CategoryOverrideVersion).values(user_id=user_id, version=1)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={"version": CategoryOverrideVersion.version + 1}
+            ))
+            return
+        
+        row = db.get(CategoryOverrideVersion, user_id)
+        if row is None:
+            db.add(CategoryOverrideVersion(user_id=user_id, version=1))
+        else:
+            row.version += 1
+    
+    def store_many(self, categories: Dict[str, str], source: str = SOURCE_AI) -> None:
+        """Remember categories produced by the categorizer for every user"""
+        entries = {}
+        for description, category in categories.items():
+            key = normalize_description(description)
+            if key:
+                entries[key] = category
+        if not entries:
+            return
+        
+        db = self.session_factory()
+        try:
+            for key, category in entries.items():
+                self._upsert(db, GLOBAL_SCOPE, key, category, source)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error("Error storing categorization cache", extra={"error": str(e)})
+            return
+        finally:
+            db.close()
+        
+        for key, category in entries.items():
+            self.memory.set((GLOBAL_SCOPE, key), category)
+        self._count("stores", len(entries))
+    
+    def record_override(self, db: Session, user_id: int, description: str, category: str) -> None:
+        """Remember a user's correction inside the caller's transaction
+        
+        Nothing is cached here: the bumped version makes every process,
+        this one included, read the correction once the caller commits.
+        """
+        key = normalize_description(description)
+        if not key:
+            return
+        self._upsert(db, user_id, key, category, SOURCE_USER)
+        self._bump_override_version(db, user_id)
+        self._count("overrides")
+    
+    def stats(self) -> Dict[str, object]:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_size": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "overrides": self.overrides,
+            "hit_rate": (self.memory_hits + self.db_hits) / lookups if lookups else 0.0
+        }
+
+categorization_cache = CategorizationCache(
+    max_size=CATEGORY_CACHE_SIZE,
+    ttl_seconds=CATEGORY_CACHE_TTL_SECONDS
+)
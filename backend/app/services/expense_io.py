@@ -0,0 +1,462 @@
+"""
+Bulk expense import and export
+Streams CSV or NDJSON uploads row by row, validates each row with
+ExpenseCreate and writes them in chunks with executemany. Exports stream
+a user's history back out as CSV, NDJSON or a compact columnar format.
+"""
+
+import codecs
+import csv
+import io
+import json
+import struct
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.expense import Expense, ExpenseCreate
+from .anomalies import observe_expenses_imported
+from .rollups import apply_rollup_delta
+
+IMPORT_FORMATS = ["csv", "ndjson"]
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+# Longest CSV record (quoted line breaks included) held while it is read
+MAX_RECORD_CHARS = 128 * 1024
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "columnar": "application/vnd.rebel-budget.columnar"
+}
+EXPORT_EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "columnar": "rbc"}
+
+# Same fields, in the same order, as ExpenseResponse
+EXPORT_COLUMNS = ["id", "description", "amount", "category", "date", "notes", "created_at", "updated_at"]
+
+# Optional columns where an empty CSV cell means "not provided"
+OPTIONAL_FIELDS = ["category", "date", "notes"]
+
+# (row number, parsed row or None, error message or None)
+ParsedRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines without buffering the whole body"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    first = True
+    
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        if first and buffer:
+            buffer = buffer.lstrip("\ufeff")
+            first = False
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+# Where a CSV line leaves the record: between fields, inside an unquoted
+# field, inside a quoted field, or just after a quote in a quoted field
+_FIELD_START, _UNQUOTED, _QUOTED, _QUOTE_IN_QUOTED = range(4)
+
+def _quote_state(line: str, state: int) -> int:
+    """Carry the quote state across one line, as the csv module reads it:
+    only a field that opens with a quote is quoted, and any other quote is
+    a literal character"""
+    if '"' not in line and state != _QUOTED:
+        return _FIELD_START
+    for char in line:
+        if state == _QUOTED:
+            if char == '"':
+                state = _QUOTE_IN_QUOTED
+        elif char == ",":
+            state = _FIELD_START
+        elif state == _FIELD_START:
+            state = _QUOTED if char == '"' else _UNQUOTED
+        elif state == _QUOTE_IN_QUOTED:
+            # A doubled quote is an escaped one; anything else closes the field
+            state = _QUOTED if char == '"' else _UNQUOTED
+    # A line break ends the record unless a quoted field is still open
+    return _QUOTED if state == _QUOTED else _FIELD_START
+
+async def iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRow]:
+    """Parse CSV records with a header row; quoted fields may span lines"""
+    header = None
+    pending: List[str] = []
+    pending_chars = 0
+    overflowed = False
+    state = _FIELD_START
+    row_number = 0
+    
+    async for line in lines:
+        state = _quote_state(line, state)
+        if overflowed:
+            # Skip the rest of an oversized record without holding it
+            overflowed = state == _QUOTED
+            continue
+        pending.append(line)
+        pending_chars += len(line) + 1
+        if state == _QUOTED:
+            if pending_chars > MAX_RECORD_CHARS:
+                pending, pending_chars, overflowed = [], 0, True
+                if header is not None:
+                    row_number += 1
+                    yield row_number, None, f"Record longer than {MAX_RECORD_CHARS} characters"
+            continue
+        record = next(csv.reader(["\n".join(pending)]))
+        pending, pending_chars = [], 0
+        
+        if header is None:
+            header = [field.strip().lower() for field in record]
+            continue
+        if not any(field.strip() for field in record):
+            continue
+        
+        row_number += 1
+        if len(record) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(record)}"
+            continue
+        yield row_number, dict(zip(header, record)), None
+    
+    if pending:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+async def iter_ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRow]:
+    """Parse one JSON object per line"""
+    row_number = 0
+    
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "Expected a JSON object"
+            continue
+        yield row_number, data, None
+
+def _validate_row(data: Dict[str, Any]) -> ExpenseCreate:
+    for field in OPTIONAL_FIELDS:
+        if isinstance(data.get(field), str) and not data[field].strip():
+            data.pop(field)
+    data.setdefault("category", "")
+    return ExpenseCreate(**data)
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+async def _categorize_batch(batch: List[ExpenseCreate], user_id: int) -> None:
+    """Fill in missing categories, asking once per distinct description"""
+    from .ai_service import categorize_expenses
+    
+    pending = [
+        expense
+        for expense in batch
+        if not expense.category or expense.category.lower() == "other"
+    ]
+    if not pending:
+        return
+    
+    categories = await categorize_expenses([expense.description for expense in pending], user_id)
+    for expense, category in zip(pending, categories):
+        expense.category = category
+
+def _insert_batch(db: Session, user_id: int, batch: List[ExpenseCreate]) -> None:
+    """Insert a chunk with one executemany and fold it into the rollups and
+    anomaly statistics"""
+    now = datetime.now()
+    rows = [
+        {
+            "user_id": user_id,
+            "description": expense.description,
+            "amount": expense.amount,
+            "category": expense.category,
+            "date": expense.date or now,
+            "notes": expense.notes
+        }
+        for expense in batch
+    ]
+    db.execute(insert(Expense), rows)
+    
+    buckets = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        bucket = buckets[(row["date"].date(), row["category"])]
+        bucket[0] += row["amount"]
+        bucket[1] += 1
+    for (day, category), (amount, count) in buckets.items():
+        apply_rollup_delta(db, user_id, day, category, amount, count)
+    observe_expenses_imported(db, user_id, rows)
+
+async def import_expenses(db: AsyncSession, user_id: int, rows: AsyncIterator[ParsedRow]) -> Dict[str, Any]:
+    """Validate, categorize and insert parsed rows in chunks
+    
+    Each chunk is committed on its own; rows that fail parsing or validation
+    are reported by row number and skipped.
+    """
+    imported = 0
+    failed = 0
+    errors = []
+    batch = []
+    
+    def record_error(row_number: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "error": message})
+    
+    async def flush():
+        nonlocal imported, batch
+        if not batch:
+            return
+        expenses = [expense for _, expense in batch]
+        try:
+            await _categorize_batch(expenses, user_id)
+            await db.run_sync(_insert_batch, user_id, expenses)
+            await db.commit()
+            imported += len(expenses)
+        except Exception as e:
+            await db.rollback()
+            for row_number, _ in batch:
+                record_error(row_number, f"Insert failed: {e}")
+        batch = []
+    
+    async for row_number, data, error in rows:
+        if error:
+            record_error(row_number, error)
+            continue
+        try:
+            batch.append((row_number, _validate_row(data)))
+        except ValidationError as e:
+            record_error(row_number, _format_validation_error(e))
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    
+    await flush()
+    
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors)
+    }
+
+# Export
+
+def _export_query(user_id: int):
+    return select(
+        Expense.id,
+        Expense.description,
+        Expense.amount,
+        Expense.category,
+        Expense.date,
+        Expense.notes,
+        Expense.created_at,
+        Expense.updated_at
+    ).where(
+        Expense.user_id == user_id
+    ).order_by(
+        Expense.date.desc(), Expense.id.asc()
+    ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+def iter_export_batches(db: Session, user_id: int) -> Iterator[Sequence[Tuple]]:
+    """Yield a user's expenses as column tuples, one batch at a time
+    
+    yield_per streams the result through a server-side cursor where the driver
+    supports one, so memory stays flat regardless of the number of rows.
+    """
+    result = db.execute(_export_query(user_id))
+    for partition in result.partitions():
+        yield partition
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def encode_csv(batches: Iterator[Sequence[Tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        for row in batch:
+            writer.writerow([
+                row.id, row.description, row.amount, row.category,
+                _isoformat(row.date), row.notes,
+                _isoformat(row.created_at), _isoformat(row.updated_at)
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def encode_ndjson(batches: Iterator[Sequence[Tuple]]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = []
+        for row in batch:
+            lines.append(json.dumps({
+                "id": row.id,
+                "description": row.description,
+                "amount": row.amount,
+                "category": row.category,
+                "date": _isoformat(row.date),
+                "notes": row.notes,
+                "created_at": _isoformat(row.created_at),
+                "updated_at": _isoformat(row.updated_at)
+            }))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+# Columnar format
+#
+# A stream is the magic "RBC1" followed by blocks of up to EXPORT_BATCH_SIZE
+# rows and a terminating zero row count. All integers are little-endian.
+# Each block is:
+#   u32 row count
+#   id            int64[n]
+#   date          int64[n]  microseconds since the Unix epoch, NULL_TIMESTAMP for null
+#   created_at    int64[n]
+#   updated_at    int64[n]
+#   amount        float64[n]
+#   category      u16 dictionary size, then (u16 length, utf-8 bytes) per entry,
+#                 then u16 dictionary code per row
+#   description   uint32 byte length per row, then the concatenated utf-8 bytes
+#   notes         same as description, with NULL_LENGTH marking null
+
+COLUMNAR_MAGIC = b"RBC1"
+NULL_TIMESTAMP = -(2 ** 63)
+NULL_LENGTH = 0xFFFFFFFF
+_EPOCH = datetime(1970, 1, 1)
+
+def _to_micros(value: Optional[datetime]) -> int:
+    if value is None:
+        return NULL_TIMESTAMP
+    delta = value.replace(tzinfo=None) - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def _from_micros(value: int) -> Optional[datetime]:
+    if value == NULL_TIMESTAMP:
+        return None
+    return _EPOCH + timedelta(microseconds=value)
+
+def _pack_strings(values: Sequence[Optional[str]]) -> bytes:
+    encoded = [v.encode("utf-8") if v is not None else None for v in values]
+    lengths = [len(v) if v is not None else NULL_LENGTH for v in encoded]
+    return struct.pack(f"<{len(lengths)}I", *lengths) + b"".join(v for v in encoded if v)
+
+def _pack_block(batch: Sequence[Tuple]) -> bytes:
+    n = len(batch)
+    ids, descriptions, amounts, categories, dates, notes, created, updated = zip(*batch)
+    
+    dictionary = list(dict.fromkeys(categories))
+    codes = {category: i for i, category in enumerate(dictionary)}
+    encoded_dictionary = [category.encode("utf-8") for category in dictionary]
+    
+    parts = [
+        struct.pack("<I", n),
+        struct.pack(f"<{n}q", *ids),
+        struct.pack(f"<{n}q", *map(_to_micros, dates)),
+        struct.pack(f"<{n}q", *map(_to_micros, created)),
+        struct.pack(f"<{n}q", *map(_to_micros, updated)),
+        struct.pack(f"<{n}d", *amounts),
+        struct.pack("<H", len(dictionary)),
+    ]
+    for entry in encoded_dictionary:
+        parts.append(struct.pack("<H", len(entry)) + entry)
+    parts.append(struct.pack(f"<{n}H", *(codes[category] for category in categories)))
+    parts.append(_pack_strings(descriptions))
+    parts.append(_pack_strings(notes))
+    return b"".join(parts)
+
+def encode_columnar(batches: Iterator[Sequence[Tuple]]) -> Iterator[bytes]:
+    yield COLUMNAR_MAGIC
+    for batch in batches:
+        if batch:
+            yield _pack_block(batch)
+    yield struct.pack("<I", 0)
+
+def _read_exact(fp: BinaryIO, size: int) -> bytes:
+    data = fp.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated columnar stream")
+    return data
+
+def _unpack_strings(fp: BinaryIO, n: int) -> List[Optional[str]]:
+    lengths = struct.unpack(f"<{n}I", _read_exact(fp, 4 * n))
+    data = _read_exact(fp, sum(length for length in lengths if length != NULL_LENGTH))
+    values, offset = [], 0
+    for length in lengths:
+        if length == NULL_LENGTH:
+            values.append(None)
+            continue
+        values.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    return values
+
+def read_columnar(fp: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Decode a columnar export back into expense dicts"""
+    if _read_exact(fp, 4) != COLUMNAR_MAGIC:
+        raise ValueError("Not a Rebel Budget columnar export")
+    
+    while True:
+        (n,) = struct.unpack("<I", _read_exact(fp, 4))
+        if n == 0:
+            return
+        ids = struct.unpack(f"<{n}q", _read_exact(fp, 8 * n))
+        dates = struct.unpack(f"<{n}q", _read_exact(fp, 8 * n))
+        created = struct.unpack(f"<{n}q", _read_exact(fp, 8 * n))
+        updated = struct.unpack(f"<{n}q", _read_exact(fp, 8 * n))
+        amounts = struct.unpack(f"<{n}d", _read_exact(fp, 8 * n))
+        (dictionary_size,) = struct.unpack("<H", _read_exact(fp, 2))
+        dictionary = []
+        for _ in range(dictionary_size):
+            (length,) = struct.unpack("<H", _read_exact(fp, 2))
+            dictionary.append(_read_exact(fp, length).decode("utf-8"))
+        codes = struct.unpack(f"<{n}H", _read_exact(fp, 2 * n))
+        descriptions = _unpack_strings(fp, n)
+        notes = _unpack_strings(fp, n)
+        
+        for i in range(n):
+            yield {
+                "id": ids[i],
+                "description": descriptions[i],
+                "amount": amounts[i],
+                "category": dictionary[codes[i]],
+                "date": _from_micros(dates[i]),
+                "notes": notes[i],
+                "created_at": _from_micros(created[i]),
+                "updated_at": _from_micros(updated[i])
+            }
+
+EXPORT_ENCODERS = {
+    "csv": encode_csv,
+    "ndjson": encode_ndjson,
+    "columnar": encode_columnar
+}
+
+def stream_export(session_factory, user_id: int, format: str) -> Iterator[bytes]:
+    """Encode a user's expenses in the requested format
+    
+    Opens its own session so the cursor stays valid for as long as the
+    response is streaming.
+    """
+    db = session_factory()
+    try:
+        yield from EXPORT_ENCODERS[format](iter_export_batches(db, user_id))
+    finally:
+        db.close()
@@ -0,0 +1,77 @@
+"""
+Read-only projection queries
+Selects just the columns a report needs into small __slots__ records instead
+of hydrating ORM entities. Records are not tracked by the session (no
+identity map, no change detection, no unused notes/timestamps in memory),
+so analytics and AI context builders can scan many rows cheaply.
+"""
+
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.expense import Expense
+from ..models.rollup import ExpenseDailyRollup
+
+P = TypeVar("P", bound="Projection")
+
+class Projection:
+    """Base for read-only records; subclasses list their fields in __slots__
+    and the matching columns, in the same order, in _columns"""
+    
+    __slots__ = ()
+    _columns: tuple = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if len(cls.__slots__) != len(cls._columns):
+            raise TypeError(f"{cls.__name__} needs one column per slot")
+        # Slot descriptors set values directly, bypassing the read-only __setattr__
+        cls._setters = tuple(cls.__dict__[name].__set__ for name in cls.__slots__)
+    
+    def __init__(self, *values):
+        for set_value, value in zip(self._setters, values):
+            set_value(self, value)
+    
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+    
+    def as_tuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def select(cls) -> Select:
+        """SELECT of this record's columns; add where/order_by/limit as usual"""
+        return select(*cls._columns)
+
+class RecentExpense(Projection):
+    """An expense as listed in reports"""
+    
+    __slots__ = ("description", "amount", "date")
+    _columns = (Expense.description, Expense.amount, Expense.date)
+
+class DailyCategoryTotal(Projection):
+    """One day's spending in one category, from the daily rollups"""
+    
+    __slots__ = ("day", "category", "total_amount", "expense_count")
+    _columns = (
+        ExpenseDailyRollup.day,
+        ExpenseDailyRollup.category,
+        ExpenseDailyRollup.total_amount,
+        ExpenseDailyRollup.expense_count
+    )
+
+async def fetch(db: AsyncSession, projection: Type[P], query: Optional[Select] = None) -> List[P]:
+    """Run a projection's SELECT (or a refinement of it) and build records"""
+    if query is None:
+        query = projection.select()
+    result = await db.execute(query)
+    return [projection(*row) for row in result]
\ No newline at end of file
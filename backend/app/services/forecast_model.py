@@ -0,0 +1,104 @@
+"""
+Daily spending forecast model
+Additive exponential smoothing with weekday seasonality (Holt-Winters
+without a trend term, period 7), fitted to several daily series at once:
+
+    e_t = y_t - level - season[weekday(t)]
+    level          += alpha * e_t
+    season[weekday] += gamma * e_t
+
+Every (alpha, gamma) pair of a small grid runs side by side as array
+columns, and each series keeps the pair with the lowest one-step-ahead
+squared error. Only depends on NumPy so it can run in worker processes.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+ALPHAS = np.linspace(0.05, 0.6, 12)
+GAMMAS = np.linspace(0.0, 0.5, 6)
+SEASON = 7
+# Days used to initialise level and seasonality; their errors are not scored
+WARMUP_DAYS = 14
+
+def _initial_state(series: np.ndarray, first_weekday: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Level and weekday offsets (Monday first) from the first weeks"""
+    warmup = series[:, :WARMUP_DAYS]
+    level = warmup.mean(axis=1)
+    season = np.zeros((series.shape[0], SEASON))
+    weekdays = (first_weekday + np.arange(warmup.shape[1])) % SEASON
+    for weekday in range(SEASON):
+        days = warmup[:, weekdays == weekday]
+        if days.shape[1]:
+            season[:, weekday] = days.mean(axis=1) - level
+    return level, season
+
+def smooth(
+    series: np.ndarray,
+    first_weekday: int,
+    level: np.ndarray,
+    season: np.ndarray,
+    alpha: np.ndarray,
+    gamma: np.ndarray,
+    score_from: int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Run the smoothing recursion over series (S x T) from the given state;
+    level, alpha and gamma broadcast as (S, G), season as (S, G, 7).
+    Returns the final level, season and squared error summed from
+    day score_from"""
+    level = level.copy()
+    season = season.copy()
+    sse = np.zeros(np.broadcast_shapes(level.shape, alpha.shape))
+    for t in range(series.shape[1]):
+        weekday = (first_weekday + t) % SEASON
+        error = series[:, t, None] - level - season[:, :, weekday]
+        if t >= score_from:
+            sse += error ** 2
+        level = level + alpha * error
+        season[:, :, weekday] += gamma * error
+    return level, season, sse
+
+def fit(series: np.ndarray, first_weekday: int) -> Dict[str, np.ndarray]:
+    """Fit every row of series (S x T daily totals, T > WARMUP_DAYS)"""
+    count = series.shape[0]
+    alpha_grid, gamma_grid = (grid.ravel() for grid in np.meshgrid(ALPHAS, GAMMAS))
+    level, season = _initial_state(series, first_weekday)
+    grid_size = len(alpha_grid)
+    
+    final_level, final_season, sse = smooth(
+        series,
+        first_weekday,
+        np.repeat(level[:, None], grid_size, axis=1),
+        np.repeat(season[:, None, :], grid_size, axis=1),
+        alpha_grid[None, :],
+        gamma_grid[None, :],
+        score_from=WARMUP_DAYS
+    )
+    best = sse.argmin(axis=1)
+    rows = np.arange(count)
+    scored_days = series.shape[1] - WARMUP_DAYS
+    return {
+        "alpha": alpha_grid[best],
+        "gamma": gamma_grid[best],
+        "level": final_level[rows, best],
+        "season": final_season[rows, best],
+        "sigma": np.sqrt(sse[rows, best] / scored_days)
+    }
+
+def update(params: Dict[str, np.ndarray], series: np.ndarray, first_weekday: int) -> Dict[str, np.ndarray]:
+    """Fold new days (S x T) into fitted parameters without refitting alpha/gamma"""
+    level, season, _ = smooth(
+        series,
+        first_weekday,
+        params["level"][:, None],
+        params["season"][:, None, :],
+        params["alpha"][:, None],
+        params["gamma"][:, None]
+    )
+    return {**params, "level": level[:, 0], "season": season[:, 0]}
+
+def predict(params: Dict[str, np.ndarray], first_weekday: int, days: int) -> np.ndarray:
+    """Expected spending (S x days) for the days after the fitted ones"""
+    weekdays = (first_weekday + np.arange(days)) % SEASON
+    return np.maximum(params["level"][:, None] + params["season"][:, weekdays], 0.0)
\ No newline at end of file
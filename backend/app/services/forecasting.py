@@ -0,0 +1,361 @@
+"""
+Spending forecasts
+Projects month-end spending per category and overall from a user's daily
+rollups with the model in forecast_model, and how that burns through an
+optional monthly budget.
+
+Full fits run in a process pool with a per-job timeout so they never hold up
+the API workers. Fitted parameters are cached per user: later requests only
+roll the model forward over the days added since (a few array operations),
+and refit from scratch when older days change (backdated or deleted
+expenses), a new category appears, or the fit is FORECAST_REFIT_DAYS old.
+"""
+
+import asyncio
+import calendar
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from . import forecast_model
+from .expense_queries import DailyCategoryTotal, fetch
+from ..models.rollup import ExpenseDailyRollup
+from ..utils.cache import TTLCache
+from ..utils.log import get_logger
+
+logger = get_logger("forecasting")
+
+FORECAST_LOOKBACK_DAYS = int(os.getenv("FORECAST_LOOKBACK_DAYS", "120"))
+FORECAST_REFIT_DAYS = int(os.getenv("FORECAST_REFIT_DAYS", "7"))
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", "2"))
+FORECAST_MAX_PENDING = int(os.getenv("FORECAST_MAX_PENDING", "16"))
+FORECAST_TIMEOUT_SECONDS = float(os.getenv("FORECAST_TIMEOUT_SECONDS", "10"))
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "10000"))
+
+# Complete days of history needed before the model is used instead of the
+# month-to-date run rate
+MIN_HISTORY_DAYS = forecast_model.WARMUP_DAYS + 7
+# Normal quantile for the 80% projection range
+INTERVAL_Z = 1.2816
+
+def _money(value: float) -> float:
+    return round(float(value), 2)
+
+class ForecastUnavailable(Exception):
+    """The forecast could not be fitted in time (or the pool is saturated)"""
+
+class ForecastPool:
+    """Process pool for model fits with a per-job timeout and fail-fast backpressure"""
+    
+    def __init__(self, workers: int, max_pending: int, timeout_seconds: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.failures = 0
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # Spawned workers start clean instead of inheriting the server's
+            # threads, sockets and database connections
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.executor
+    
+    def _release(self, _future=None) -> None:
+        self.pending -= 1
+    
+    async def run(self, func, *args):
+        """Run func in a worker process, or raise ForecastUnavailable"""
+        # Only touched from the event loop thread, so no lock is needed
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ForecastUnavailable("Too many forecasts in progress")
+        self.pending += 1
+        release = True
+        try:
+            future = self._get_executor().submit(func, *args)
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            # A running fit cannot be interrupted; it keeps its worker until
+            # it finishes (its result is dropped), so it stays pending until then
+            self.timeouts += 1
+            loop = asyncio.get_running_loop()
+            future.add_done_callback(lambda done: loop.call_soon_threadsafe(self._release, done))
+            release = False
+            raise ForecastUnavailable(f"Forecast took longer than {self.timeout_seconds:g}s")
+        except BrokenProcessPool:
+            self.failures += 1
+            self.executor = None
+            logger.error("Forecast worker process died; restarting the pool")
+            raise ForecastUnavailable("Forecast worker failed")
+        finally:
+            if release:
+                self._release()
+        self.completed += 1
+        return result
+    
+    async def close(self) -> None:
+        """Shut the worker processes down, cancelling fits not yet started"""
+        executor, self.executor = self.executor, None
+        if executor is not None:
+            await run_in_threadpool(executor.shutdown, wait=True, cancel_futures=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "timeout_seconds": self.timeout_seconds,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "failures": self.failures
+        }
+
+class ForecastState:
+    """A user's fitted model: one row per category, fitted on the days
+    first_day..fitted_through; digest identifies the data it has seen"""
+    
+    __slots__ = ("categories", "params", "first_day", "fitted_through", "fitted_on", "digest")
+    
+    def __init__(
+        self,
+        categories: List[str],
+        params: Dict[str, np.ndarray],
+        first_day: date,
+        fitted_through: date,
+        fitted_on: date,
+        digest: str
+    ):
+        self.categories = categories
+        self.params = params
+        self.first_day = first_day
+        self.fitted_through = fitted_through
+        self.fitted_on = fitted_on
+        self.digest = digest
+
+def _digest(categories: List[str], series: np.ndarray) -> str:
+    digest = hashlib.blake2b("\0".join(categories).encode("utf-8"), digest_size=16)
+    digest.update(np.ascontiguousarray(series).tobytes())
+    return digest.hexdigest()
+
+class DailySeries:
+    """Daily totals per category (rows) for consecutive days from first_day"""
+    
+    def __init__(self, categories: List[str], totals: np.ndarray, first_day: date):
+        self.categories = categories
+        self.totals = totals
+        self.first_day = first_day
+    
+    def days(self, start: date, end: date, categories: Optional[List[str]] = None) -> np.ndarray:
+        """Columns for start..end inclusive, rows in the given category order
+        (zeros for categories without spending)"""
+        columns = slice((start - self.first_day).days, (end - self.first_day).days + 1)
+        rows = {category: i for i, category in enumerate(self.categories)}
+        order = categories if categories is not None else self.categories
+        result = np.zeros((len(order), columns.stop - columns.start))
+        for i, category in enumerate(order):
+            if category in rows:
+                result[i] = self.totals[rows[category], columns]
+        return result
+    
+    def categories_between(self, start: date, end: date) -> List[str]:
+        window = self.days(start, end)
+        return [category for category, row in zip(self.categories, window) if row.any()]
+
+async def load_daily_series(db: AsyncSession, user_id: int, first_day: date, last_day: date) -> DailySeries:
+    rollups = await fetch(db, DailyCategoryTotal, DailyCategoryTotal.select().where(
+        ExpenseDailyRollup.user_id == user_id,
+        ExpenseDailyRollup.day >= first_day,
+        ExpenseDailyRollup.day <= last_day
+    ))
+    categories = sorted({rollup.category for rollup in rollups})
+    rows = {category: i for i, category in enumerate(categories)}
+    totals = np.zeros((len(categories), (last_day - first_day).days + 1))
+    for rollup in rollups:
+        totals[rows[rollup.category], (rollup.day - first_day).days] += rollup.total_amount
+    return DailySeries(categories, totals, first_day)
+
+class ForecastService:
+    """Per-user fitted models and month-end projections"""
+    
+    def __init__(self, pool: ForecastPool, cache_size: int):
+        self.pool = pool
+        self.states = TTLCache(max_size=cache_size, ttl_seconds=None)
+        self.full_fits = 0
+        self.incremental_updates = 0
+        self.reused = 0
+    
+    async def _fitted_state(self, user_id: int, series: DailySeries, today: date) -> Tuple[Optional[ForecastState], str]:
+        """The model fitted through yesterday, and how it was obtained"""
+        yesterday = today - timedelta(days=1)
+        state = self.states.get(user_id)
+        
+        if state is not None and (today - state.fitted_on).days < FORECAST_REFIT_DAYS:
+            seen = series.days(state.first_day, state.fitted_through, state.categories)
+            new_categories = set(series.categories_between(state.first_day, yesterday)) - set(state.categories)
+            if not new_categories and _digest(state.categories, seen) == state.digest:
+                if state.fitted_through == yesterday:
+                    self.reused += 1
+                    return state, "cached"
+                new_days = series.days(state.fitted_through + timedelta(days=1), yesterday, state.categories)
+                params = forecast_model.update(state.params, new_days, (state.fitted_through + timedelta(days=1)).weekday())
+                state = ForecastState(
+                    state.categories, params, state.first_day, yesterday, state.fitted_on,
+                    _digest(state.categories, series.days(state.first_day, yesterday, state.categories))
+                )
+                self.states.set(user_id, state)
+                self.incremental_updates += 1
+                return state, "incremental"
+        
+        # Full fit over the lookback window, from the first day with spending
+        window_start = today - timedelta(days=FORECAST_LOOKBACK_DAYS)
+        window = series.days(window_start, yesterday)
+        active_days = np.flatnonzero(window.any(axis=0))
+        if len(active_days) == 0:
+            return None, "run_rate"
+        first_day = window_start + timedelta(days=int(active_days[0]))
+        if (yesterday - first_day).days + 1 < MIN_HISTORY_DAYS:
+            return None, "run_rate"
+        
+        categories = series.categories_between(first_day, yesterday)
+        history = series.days(first_day, yesterday, categories)
+        params = await self.pool.run(forecast_model.fit, history, first_day.weekday())
+        state = ForecastState(categories, params, first_day, yesterday, today, _digest(categories, history))
+        self.states.set(user_id, state)
+        self.full_fits += 1
+        return state, "full"
+    
+    async def forecast_month(self, db: AsyncSession, user_id: int, budget: Optional[float] = None) -> Dict[str, Any]:
+        """Month-end projection per category and overall, with an 80% range"""
+        today = date.today()
+        month_start = today.replace(day=1)
+        days_in_month = calendar.monthrange(today.year, today.month)[1]
+        month_end = today.replace(day=days_in_month)
+        remaining_days = (month_end - today).days + 1
+        
+        state = self.states.get(user_id)
+        first_day = today - timedelta(days=FORECAST_LOOKBACK_DAYS)
+        if state is not None:
+            first_day = min(first_day, state.first_day)
+        series = await load_daily_series(db, user_id, min(first_day, month_start), today)
+        state, model = await self._fitted_state(user_id, series, today)
+        
+        month_categories = series.categories_between(month_start, today)
+        categories = sorted(set(month_categories) | set(state.categories if state else []))
+        spent = series.days(month_start, today, categories).sum(axis=1)
+        spent_today = series.days(today, today, categories)[:, 0]
+        
+        expected = np.zeros((len(categories), remaining_days))
+        sigma = np.zeros(len(categories))
+        if state is not None:
+            rows = [categories.index(category) for category in state.categories]
+            expected[rows] = forecast_model.predict(state.params, today.weekday(), remaining_days)
+            sigma[rows] = state.params["sigma"]
+            # Today is partly spent already; only the shortfall is still to come
+            expected[:, 0] = np.maximum(expected[:, 0] - spent_today, 0.0)
+        else:
+            # Not enough history: extend the month-to-date daily pace
+            days_elapsed = today.day
+            expected[:] = (spent - spent_today)[:, None] / max(days_elapsed - 1, 1)
+            expected[:, 0] = np.maximum(expected[:, 0] - spent_today, 0.0)
+            # The range comes from how much the completed days varied
+            if days_elapsed > 2:
+                sigma = series.days(month_start, today - timedelta(days=1), categories).std(axis=1, ddof=1)
+        
+        projected = spent + expected.sum(axis=1)
+        daily = expected.sum(axis=0)
+        total_spent = float(spent.sum())
+        total_projected = float(projected.sum())
+        # Category errors treated as independent; remaining days add up in quadrature
+        spread = INTERVAL_Z * float(np.sqrt((sigma ** 2).sum() * remaining_days))
+        
+        result = {
+            "month": month_start.strftime("%Y-%m"),
+            "as_of": today.isoformat(),
+            "days_in_month": days_in_month,
+            "days_remaining": remaining_days,
+            "spent_to_date": _money(total_spent),
+            "projected_total": _money(total_projected),
+            "projected_low": _money(max(total_spent, total_projected - spread)),
+            "projected_high": _money(total_projected + spread),
+            "categories": sorted(
+                (
+                    {
+                        "category": category,
+                        "spent_to_date": _money(spent[i]),
+                        "projected_total": _money(projected[i]),
+                        "projected_remaining": _money(projected[i] - spent[i])
+                    }
+                    for i, category in enumerate(categories)
+                ),
+                key=lambda entry: entry["projected_total"],
+                reverse=True
+            ),
+            "daily_forecast": [
+                {"date": (today + timedelta(days=i)).isoformat(), "amount": _money(amount)}
+                for i, amount in enumerate(daily)
+            ],
+            "model": {
+                "method": "exponential_smoothing" if state is not None else "run_rate",
+                "fit": model,
+                "fitted_through": state.fitted_through.isoformat() if state is not None else None
+            }
+        }
+        if budget is not None:
+            result["budget"] = _budget_burn(budget, total_spent, total_projected, daily, today, remaining_days)
+        return result
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_users": len(self.states),
+            "full_fits": self.full_fits,
+            "incremental_updates": self.incremental_updates,
+            "reused": self.reused,
+            "pool": self.pool.stats()
+        }
+
+def _budget_burn(
+    budget: float,
+    spent: float,
+    projected: float,
+    daily: np.ndarray,
+    today: date,
+    remaining_days: int
+) -> Dict[str, Any]:
+    """How the projected spending uses up a monthly budget"""
+    cumulative = spent + np.cumsum(daily)
+    over = np.flatnonzero(cumulative > budget)
+    if spent > budget:
+        exhausted_on = today
+    elif len(over):
+        exhausted_on = today + timedelta(days=int(over[0]))
+    else:
+        exhausted_on = None
+    return {
+        "amount": _money(budget),
+        "used_percent": round(spent / budget * 100, 1) if budget > 0 else None,
+        "projected_percent": round(projected / budget * 100, 1) if budget > 0 else None,
+        "projected_remaining": _money(budget - projected),
+        "on_track": projected <= budget,
+        "safe_daily_spend": _money(max(budget - spent, 0) / remaining_days),
+        "projected_exhausted_on": exhausted_on.isoformat() if exhausted_on else None
+    }
+
+forecast_pool = ForecastPool(FORECAST_WORKERS, FORECAST_MAX_PENDING, FORECAST_TIMEOUT_SECONDS)
+forecast_service = ForecastService(forecast_pool, FORECAST_CACHE_SIZE)
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""
+Financial insights
+Builds the insights, recommendations and summary shown by GET /ai/insights
+from a user's rollups, month-end forecast, anomaly flags and recurring
+payments. The nightly jobs run the same computation ahead of time and keep
+the result as the user's insight snapshot.
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .ai_service import get_financial_insights
+from .anomalies import flags_query
+from .expense_queries import DailyCategoryTotal, fetch
+from .forecasting import ForecastUnavailable, forecast_service
+from .recurring import list_recurring
+from ..models.database import dialect_insert
+from ..models.insight_snapshot import InsightSnapshot
+from ..models.rollup import ExpenseDailyRollup
+from ..utils.fast_json import dumps
+from ..utils.log import get_logger
+
+logger = get_logger("insights")
+
+async def compute_insights(db: AsyncSession, user_id: int, days: int = 30) -> Dict[str, Any]:
+    """Insights, recommendations and summary over the last `days` days"""
+    
+    # Get per-day, per-category totals for the user from the rollups
+    start_date = datetime.now() - timedelta(days=days)
+    rollups = await fetch(db, DailyCategoryTotal, DailyCategoryTotal.select().where(
+        ExpenseDailyRollup.user_id == user_id,
+        ExpenseDailyRollup.day >= start_date.date()
+    ))
+    
+    if not rollups:
+        return {
+            "insights": ["No expenses found for the specified period"],
+            "recommendations": ["Start tracking your expenses to get personalized insights"],
+            "summary": {"total_expenses": 0, "expense_count": 0, "period_days": days}
+        }
+    
+    # Prepare spending data for AI analysis, one entry per day and category
+    expenses_data = []
+    for rollup in rollups:
+        expenses_data.append({
+            "amount": rollup.total_amount,
+            "category": rollup.category,
+            "date": rollup.day.isoformat(),
+            "expense_count": rollup.expense_count
+        })
+    
+    # Month-end projection for the forecast insights; insights still work without it
+    try:
+        forecast = await forecast_service.forecast_month(db, user_id)
+    except ForecastUnavailable as e:
+        logger.warning("Forecast unavailable for insights", extra={"error": str(e)})
+        forecast = None
+    
+    # Unreviewed anomaly flags raised in the period
+    flags = (await db.execute(flags_query(user_id, start_date).limit(20))).mappings().all()
+    
+    # Subscriptions and other repeating charges that are still running
+    recurring = await list_recurring(db, user_id)
+    
+    # Get AI insights
+    ai_insights = await get_financial_insights(expenses_data, days, forecast, flags, recurring)
+    
+    # Calculate summary statistics
+    total_amount = sum(rollup.total_amount for rollup in rollups)
+    categories = {}
+    for rollup in rollups:
+        categories[rollup.category] = categories.get(rollup.category, 0) + rollup.total_amount
+    
+    summary = {
+        "total_expenses": total_amount,
+        "expense_count": sum(rollup.expense_count for rollup in rollups),
+        "period_days": days,
+        "average_daily_spend": total_amount / days if days > 0 else 0,
+        "category_breakdown": categories,
+        "top_category": max(categories.items(), key=lambda x: x[1])[0] if categories else "None"
+    }
+    if forecast is not None:
+        summary["projected_month_total"] = forecast["projected_total"]
+    if recurring:
+        summary["recurring_monthly_total"] = round(sum(payment["monthly_cost"] for payment in recurring), 2)
+    
+    return {
+        "insights": ai_insights.get("insights", []),
+        "recommendations": ai_insights.get("recommendations", []),
+        "summary": summary
+    }
+
+def store_snapshot(db: Session, user_id: int, days: int, insights: Dict[str, Any], computed_at: datetime) -> None:
+    """Replace the user's insight snapshot. The caller commits."""
+    values = {
+        "user_id": user_id,
+        "period_days": days,
+        "payload": dumps(insights).decode(),
+        "computed_at": computed_at
+    }
+    upsert = dialect_insert(db.get_bind())
+    if upsert is None:
+        db.merge(InsightSnapshot(**values))
+        return
+    statement = upsert(InsightSnapshot).values(**values)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={key: statement.excluded[key] for key in ("period_days", "payload", "computed_at")}
+    ))
+
+async def load_snapshot(db: AsyncSession, user_id: int) -> Optional[Dict[str, Any]]:
+    """The user's latest precomputed insights with when they were computed"""
+    snapshot = await db.scalar(select(InsightSnapshot).where(InsightSnapshot.user_id == user_id))
+    if snapshot is None:
+        return None
+    return {
+        **json.loads(snapshot.payload),
+        "period_days": snapshot.period_days,
+        "computed_at": snapshot.computed_at
+    }
\ No newline at end of file
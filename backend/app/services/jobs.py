@@ -0,0 +1,430 @@
+"""
+Background jobs
+A persistent queue in the application database (the jobs table) and an
+asyncio worker pool that works through it, so precomputation runs outside
+request handlers without an external broker.
+
+- enqueue() adds a job inside the caller's transaction.
+- Workers claim the oldest due job with a conditional UPDATE (only if it is
+  still queued), which is safe between tasks, processes and hosts sharing
+  the database, SQLite included.
+- A failing job is retried with exponential backoff until max_attempts. A
+  job whose worker died is retried once its claim is older than
+  JOB_LEASE_SECONDS.
+- Daily schedules enqueue one job per occurrence, deduplicated by
+  dedupe_key, so every pool can run the scheduler.
+
+The pool runs inside the web process (JOB_RUN_IN_PROCESS) or on its own via
+run_worker.py. Handlers are coroutines taking an AsyncSession and the
+ClaimedJob; blocking work goes through db.run_sync or run_in_threadpool.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.database import AsyncSessionLocal, dialect_insert
+from ..models.job import FINISHED_STATUSES, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, Job
+from ..utils.fast_json import dumps
+from ..utils.log import get_logger
+
+logger = get_logger("jobs")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RUN_IN_PROCESS = os.getenv("JOB_RUN_IN_PROCESS", "true").lower() == "true"
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+# A running job still unfinished this long after its claim is presumed
+# orphaned. Longer than the timeout, because a timed-out handler's blocking
+# work may still be running in its thread.
+JOB_LEASE_SECONDS = JOB_TIMEOUT_SECONDS * 2
+# How often the scheduler enqueues due schedules and recovers expired leases
+SCHEDULER_INTERVAL_SECONDS = 30
+# Due jobs tried per claim, in case another worker wins the first
+CLAIM_CANDIDATES = 5
+
+class ClaimedJob(NamedTuple):
+    id: int
+    kind: str
+    user_id: Optional[int]
+    payload: Dict[str, Any]
+    # Including the current one
+    attempts: int
+    max_attempts: int
+
+JobHandler = Callable[[AsyncSession, ClaimedJob], Awaitable[Optional[Dict[str, Any]]]]
+
+class JobKind(NamedTuple):
+    handler: JobHandler
+    # Whether jobs of this kind need a user_id
+    per_user: bool
+
+class DailySchedule(NamedTuple):
+    kind: str
+    hour: int
+    minute: int = 0
+    
+    def last_due(self, now: datetime) -> datetime:
+        """The most recent occurrence at or before now"""
+        due = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        return due if due <= now else due - timedelta(days=1)
+
+_kinds: Dict[str, JobKind] = {}
+_schedules: List[DailySchedule] = []
+
+def job_handler(kind: str, per_user: bool = False):
+    """Register a coroutine as the handler for a job kind"""
+    def register(handler: JobHandler) -> JobHandler:
+        _kinds[kind] = JobKind(handler, per_user)
+        return handler
+    return register
+
+def job_kinds() -> Dict[str, JobKind]:
+    return dict(_kinds)
+
+def schedule_daily(kind: str, hour: int, minute: int = 0) -> None:
+    """Enqueue a job of this kind once a day at hour:minute (local time). An
+    occurrence missed while nothing was running is enqueued at the next
+    scheduler pass."""
+    _schedules.append(DailySchedule(kind, hour, minute))
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt after `attempts` failures"""
+    return JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+
+def enqueue(
+    db: Session,
+    kind: str,
+    user_id: Optional[int] = None,
+    payload: Optional[Dict[str, Any]] = None,
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+    dedupe_key: Optional[str] = None
+) -> Optional[int]:
+    """Add a job in the caller's transaction. Returns its id, or None if a
+    job with the same dedupe_key exists. The caller commits."""
+    values = {
+        "kind": kind,
+        "user_id": user_id,
+        "payload": dumps(payload or {}).decode(),
+        "status": JOB_QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts or JOB_MAX_ATTEMPTS,
+        "run_at": run_at or datetime.now(),
+        "dedupe_key": dedupe_key
+    }
+    if dedupe_key is None:
+        return db.scalar(insert(Job).values(**values).returning(Job.id))
+    
+    upsert = dialect_insert(db.get_bind())
+    if upsert is None:
+        if db.scalar(select(Job.id).where(Job.dedupe_key == dedupe_key)) is not None:
+            return None
+        return db.scalar(insert(Job).values(**values).returning(Job.id))
+    return db.scalar(upsert(Job).values(**values).on_conflict_do_nothing(
+        index_elements=["dedupe_key"]
+    ).returning(Job.id))
+
+def claim_job(db: Session, worker_id: str, now: Optional[datetime] = None) -> Optional[ClaimedJob]:
+    """Mark the oldest due queued job as running for worker_id and return it"""
+    now = now or datetime.now()
+    candidates = db.scalars(select(Job.id).where(
+        Job.status == JOB_QUEUED,
+        Job.run_at <= now
+    ).order_by(Job.run_at, Job.id).limit(CLAIM_CANDIDATES)).all()
+    
+    for job_id in candidates:
+        # Only one worker's UPDATE still sees the job as queued
+        claimed = db.execute(update(Job).where(
+            Job.id == job_id,
+            Job.status == JOB_QUEUED
+        ).values(
+            status=JOB_RUNNING,
+            attempts=Job.attempts + 1,
+            locked_by=worker_id,
+            locked_at=now,
+            started_at=now
+        ).execution_options(synchronize_session=False))
+        if claimed.rowcount == 1:
+            job = db.execute(select(
+                Job.kind, Job.user_id, Job.payload, Job.attempts, Job.max_attempts
+            ).where(Job.id == job_id)).one()
+            return ClaimedJob(job_id, job.kind, job.user_id, json.loads(job.payload), job.attempts, job.max_attempts)
+    return None
+
+def _update_claimed(db: Session, job: ClaimedJob, **values) -> bool:
+    # (id, attempts) identifies this claim; after an expired lease the job
+    # may already be someone else's
+    updated = db.execute(update(Job).where(
+        Job.id == job.id,
+        Job.status == JOB_RUNNING,
+        Job.attempts == job.attempts
+    ).values(locked_by=None, locked_at=None, **values).execution_options(synchronize_session=False))
+    return updated.rowcount == 1
+
+def finish_job(
+    db: Session,
+    job: ClaimedJob,
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+    now: Optional[datetime] = None
+) -> str:
+    """Record the outcome of a claimed job and return its new status: a
+    failure is queued again after retry_delay while attempts remain"""
+    now = now or datetime.now()
+    if error is None:
+        values = {
+            "status": JOB_SUCCEEDED,
+            "result": None if result is None else dumps(result).decode(),
+            "finished_at": now
+        }
+    elif job.attempts < job.max_attempts:
+        values = {
+            "status": JOB_QUEUED,
+            "run_at": now + timedelta(seconds=retry_delay(job.attempts)),
+            "last_error": error
+        }
+    else:
+        values = {"status": JOB_FAILED, "last_error": error, "finished_at": now}
+    _update_claimed(db, job, **values)
+    return values["status"]
+
+def release_job(db: Session, job: ClaimedJob) -> None:
+    """Put a claimed job back in the queue without counting the attempt"""
+    _update_claimed(db, job, status=JOB_QUEUED, attempts=job.attempts - 1)
+
+def recover_expired_leases(db: Session, now: Optional[datetime] = None) -> int:
+    """Retry (or fail, when out of attempts) running jobs whose claim is
+    older than JOB_LEASE_SECONDS"""
+    now = now or datetime.now()
+    expired = (Job.status == JOB_RUNNING) & (Job.locked_at < now - timedelta(seconds=JOB_LEASE_SECONDS))
+    cleared = {"locked_by": None, "locked_at": None, "last_error": "Worker lease expired"}
+    retried = db.execute(update(Job).where(expired, Job.attempts < Job.max_attempts).values(
+        status=JOB_QUEUED, run_at=now, **cleared
+    ).execution_options(synchronize_session=False))
+    failed = db.execute(update(Job).where(expired, Job.attempts >= Job.max_attempts).values(
+        status=JOB_FAILED, finished_at=now, **cleared
+    ).execution_options(synchronize_session=False))
+    return retried.rowcount + failed.rowcount
+
+def enqueue_due_schedules(db: Session, now: Optional[datetime] = None) -> int:
+    """Enqueue the latest occurrence of every daily schedule not yet enqueued"""
+    now = now or datetime.now()
+    enqueued = 0
+    for schedule in _schedules:
+        due = schedule.last_due(now)
+        job_id = enqueue(
+            db,
+            schedule.kind,
+            payload={"occurrence": due.isoformat()},
+            run_at=due,
+            dedupe_key=f"{schedule.kind}@{due:%Y-%m-%dT%H:%M}"
+        )
+        enqueued += job_id is not None
+    return enqueued
+
+def purge_finished_jobs(db: Session, before: datetime) -> int:
+    """Delete jobs that finished before the given time"""
+    return db.execute(delete(Job).where(
+        Job.status.in_(FINISHED_STATUSES),
+        Job.finished_at < before
+    )).rowcount
+
+def _scheduler_pass(db: Session) -> Tuple[int, int]:
+    return enqueue_due_schedules(db), recover_expired_leases(db)
+
+def job_counts(db: Session) -> Dict[str, Dict[str, int]]:
+    """Number of jobs per kind and status"""
+    counts: Dict[str, Dict[str, int]] = {}
+    for kind, status, count in db.execute(
+        select(Job.kind, Job.status, func.count()).group_by(Job.kind, Job.status)
+    ):
+        counts.setdefault(kind, {})[status] = count
+    return counts
+
+def job_response(job: Job) -> Dict[str, Any]:
+    """A JobResponse-shaped dict"""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "user_id": job.user_id,
+        "payload": json.loads(job.payload),
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "run_at": job.run_at,
+        "locked_by": job.locked_by,
+        "last_error": job.last_error,
+        "result": None if job.result is None else json.loads(job.result),
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+class JobWorkerPool:
+    """Asyncio tasks that claim and run due jobs, plus the scheduler"""
+    
+    def __init__(self, workers: int = JOB_WORKERS, poll_seconds: float = JOB_POLL_SECONDS, session_factory=AsyncSessionLocal):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.session_factory = session_factory
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.running = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.scheduled = 0
+        self.recovered = 0
+        self.errors = 0
+    
+    def start(self) -> None:
+        """Start the workers and the scheduler on the running event loop"""
+        if self._tasks or self.workers <= 0:
+            return
+        self._wake = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._schedule()))
+        logger.info("Job workers started", extra={"workers": self.workers, "worker_id": self.worker_id})
+    
+    async def stop(self, timeout: float = 30) -> None:
+        """Let running jobs finish for up to timeout seconds, then cancel
+        them; cancelled jobs go back to the queue"""
+        if not self._tasks:
+            return
+        self._stopping.set()
+        self._wake.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        logger.info("Job workers stopped", extra={"worker_id": self.worker_id})
+    
+    def wake(self) -> None:
+        """Have idle workers look for jobs now rather than at their next poll"""
+        if self._wake is not None:
+            self._wake.set()
+    
+    async def _idle(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._wake.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        if not self._stopping.is_set():
+            self._wake.clear()
+    
+    async def _in_session(self, func, *args):
+        """Run a sync queue function in a short transaction of its own"""
+        async with self.session_factory() as db:
+            value = await db.run_sync(func, *args)
+            await db.commit()
+            return value
+    
+    async def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await self._in_session(claim_job, self.worker_id)
+            except Exception as e:
+                self.errors += 1
+                logger.error("Error claiming a job", extra={"error": str(e)})
+                job = None
+            if job is None:
+                await self._idle(self.poll_seconds)
+            else:
+                await self._run(job)
+    
+    async def _run(self, job: ClaimedJob) -> None:
+        kind = _kinds.get(job.kind)
+        started = time.perf_counter()
+        result = None
+        error = None
+        self.running += 1
+        try:
+            if kind is None:
+                raise LookupError(f"No handler registered for job kind '{job.kind}'")
+            # The timeout cancels the coroutine; blocking work it started in
+            # a thread runs to completion
+            async with self.session_factory() as db:
+                result = await asyncio.wait_for(kind.handler(db, job), JOB_TIMEOUT_SECONDS)
+                await db.commit()
+        except asyncio.CancelledError:
+            await asyncio.shield(self._in_session(release_job, job))
+            raise
+        except asyncio.TimeoutError:
+            error = f"Timed out after {JOB_TIMEOUT_SECONDS:g} seconds"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            self.running -= 1
+        
+        try:
+            status = await self._in_session(finish_job, job, result, error)
+        except Exception as e:
+            # The lease runs out and the job is retried
+            self.errors += 1
+            logger.error("Error recording a job result", extra={"job_id": job.id, "error": str(e)})
+            return
+        
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        details = {"job_id": job.id, "kind": job.kind, "attempt": job.attempts, "status": status, "duration_ms": duration_ms}
+        if error is None:
+            self.succeeded += 1
+            logger.info("Job succeeded", extra=details)
+            # It may have queued follow-up work
+            self.wake()
+        else:
+            if status == JOB_QUEUED:
+                self.retried += 1
+            else:
+                self.failed += 1
+            logger.warning("Job failed", extra={**details, "error": error})
+    
+    async def _schedule(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                scheduled, recovered = await self._in_session(_scheduler_pass)
+                self.scheduled += scheduled
+                self.recovered += recovered
+                if scheduled or recovered:
+                    self.wake()
+            except Exception as e:
+                self.errors += 1
+                logger.error("Error running the job scheduler", extra={"error": str(e)})
+            try:
+                await asyncio.wait_for(self._stopping.wait(), SCHEDULER_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "workers": self.workers,
+            "started": bool(self._tasks),
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "scheduled": self.scheduled,
+            "recovered": self.recovered,
+            "errors": self.errors,
+            "kinds": sorted(_kinds),
+            "schedules": [f"{schedule.kind} daily at {schedule.hour:02d}:{schedule.minute:02d}" for schedule in _schedules]
+        }
+
+job_pool = JobWorkerPool()
\ No newline at end of file
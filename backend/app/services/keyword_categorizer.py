@@ -0,0 +1,132 @@
+"""
+Keyword rule engine
+Loads keyword rules from keyword_rules.json and compiles each rule set into
+a single trie-shaped regex alternation, so a description is classified in
+one scan instead of a chain of substring checks.
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+RULES_PATH = os.getenv("KEYWORD_RULES_PATH", str(Path(__file__).with_name("keyword_rules.json")))
+
+MATCH_MODES = {
+    "word": (r"\b", r"\b"),
+    "prefix": (r"\b", ""),
+    "substring": ("", "")
+}
+
+def _trie_pattern(keywords: Sequence[str]) -> str:
+    """Build a regex from a prefix trie of keywords
+    
+    Shared prefixes are matched once ("star(?:bucks|gate)") instead of being
+    retried for every alternative, and longer keywords are preferred.
+    """
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+    
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1:
+            body = branches[0]
+            grouped = f"(?:{body})" if len(body) > 1 and terminal else body
+        else:
+            grouped = f"(?:{'|'.join(branches)})"
+        return f"{grouped}?" if terminal else grouped
+    
+    return build(trie)
+
+class KeywordRuleSet:
+    """A compiled set of (keyword -> label, priority) rules
+    
+    When several keywords match, the highest priority wins, then the longest
+    keyword, then the earliest in the text. Within a match mode the longest
+    keyword at a position is matched, so "uber eats" is seen before "uber".
+    """
+    
+    def __init__(self, rules: Sequence[Dict], default: Optional[str] = None):
+        self.default = default
+        self._keywords: Dict[str, Tuple[str, int]] = {}
+        by_mode: Dict[str, List[str]] = {mode: [] for mode in MATCH_MODES}
+        
+        for rule in rules:
+            mode = rule.get("match", "prefix")
+            if mode not in MATCH_MODES:
+                raise ValueError(f"Unknown match mode '{mode}' for rule {rule.get('label')}")
+            priority = int(rule.get("priority", 0))
+            
+            for keyword in rule["keywords"]:
+                keyword = keyword.lower().strip()
+                if not keyword:
+                    continue
+                current = self._keywords.get(keyword)
+                if current is None or priority > current[1]:
+                    self._keywords[keyword] = (rule["label"], priority)
+                by_mode[mode].append(keyword)
+        
+        alternatives = []
+        for mode, keywords in by_mode.items():
+            if keywords:
+                before, after = MATCH_MODES[mode]
+                alternatives.append(f"{before}{_trie_pattern(keywords)}{after}")
+        self._pattern = re.compile("|".join(alternatives) or r"(?!)", re.IGNORECASE)
+    
+    @property
+    def labels(self) -> List[str]:
+        return sorted({label for label, _ in self._keywords.values()})
+    
+    def _best(self, keywords: Sequence[str]) -> Optional[str]:
+        """Pick the winning label among matched keywords, in text order"""
+        best = None
+        best_rank = None
+        for position, keyword in enumerate(keywords):
+            label, priority = self._keywords[keyword.lower()]
+            rank = (priority, len(keyword), -position)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = label, rank
+        return best
+    
+    def classify(self, text: str) -> Optional[str]:
+        """Return the winning label for one text, or the default"""
+        label = self._best(self._pattern.findall(text))
+        return label if label is not None else self.default
+    
+    def classify_batch(self, texts: Sequence[str]) -> List[Optional[str]]:
+        """Classify many texts, scanning each distinct text only once"""
+        findall = self._pattern.findall
+        best = self._best
+        default = self.default
+        
+        labels: Dict[str, Optional[str]] = {}
+        for text in texts:
+            if text not in labels:
+                label = best(findall(text))
+                labels[text] = label if label is not None else default
+        return [labels[text] for text in texts]
+
+def load_rule_sets(path: str = RULES_PATH) -> Dict[str, List[Dict]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+_rules = load_rule_sets()
+
+# Offline expense categorizer and chat intent matcher, compiled once at import
+category_rules = KeywordRuleSet(_rules["categories"], default="Other")
+chat_intent_rules = KeywordRuleSet(_rules.get("chat_intents", []))
+
+def categorize_by_keywords(description: str) -> str:
+    return category_rules.classify(description)
+
+def categorize_by_keywords_batch(descriptions: Sequence[str]) -> List[str]:
+    """Classify thousands of descriptions per call, for imports and backfills"""
+    return category_rules.classify_batch(descriptions)
@@ -0,0 +1,199 @@
+"""
+Local expense categorizer
+A multinomial naive Bayes model over hashed word and character n-grams,
+trained on users' own labeled expenses. It runs in pure Python, classifies
+in microseconds and lets only low-confidence descriptions reach the LLM.
+"""
+
+import gzip
+import json
+import math
+import os
+import threading
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .category_cache import normalize_description
+from ..utils.log import get_logger
+
+logger = get_logger("ml_categorizer")
+
+ML_CATEGORIZER_PATH = os.getenv("ML_CATEGORIZER_PATH", "./categorizer_model.json.gz")
+ML_CATEGORIZER_MIN_CONFIDENCE = float(os.getenv("ML_CATEGORIZER_MIN_CONFIDENCE", "0.85"))
+
+MODEL_VERSION = 1
+DEFAULT_FEATURE_BUCKETS = 2 ** 18
+
+def extract_features(description: str, buckets: int = DEFAULT_FEATURE_BUCKETS) -> List[int]:
+    """Hash words, word bigrams and character trigrams into feature buckets"""
+    words = normalize_description(description).split()
+    grams = [f"w:{word}" for word in words]
+    grams.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+    for word in words:
+        padded = f" {word} "
+        grams.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return [zlib.crc32(gram.encode("utf-8")) % buckets for gram in grams]
+
+class NaiveBayesCategorizer:
+    """Multinomial naive Bayes with additive smoothing over hashed features"""
+    
+    def __init__(
+        self,
+        classes: List[str],
+        log_priors: List[float],
+        unseen_log_probs: List[float],
+        feature_log_probs: Dict[int, List[float]],
+        buckets: int = DEFAULT_FEATURE_BUCKETS,
+        trained_on: int = 0
+    ):
+        self.classes = classes
+        self.log_priors = log_priors
+        self.unseen_log_probs = unseen_log_probs
+        self.feature_log_probs = feature_log_probs
+        self.buckets = buckets
+        self.trained_on = trained_on
+    
+    @classmethod
+    def train(
+        cls,
+        samples: Iterable[Tuple[str, str]],
+        alpha: float = 0.1,
+        buckets: int = DEFAULT_FEATURE_BUCKETS
+    ) -> "NaiveBayesCategorizer":
+        """Fit on (description, category) pairs"""
+        class_counts: Counter = Counter()
+        feature_counts: Dict[str, Counter] = defaultdict(Counter)
+        
+        for description, category in samples:
+            features = extract_features(description, buckets)
+            if not features:
+                continue
+            class_counts[category] += 1
+            feature_counts[category].update(features)
+        
+        if not class_counts:
+            raise ValueError("No labeled expenses to train on")
+        
+        classes = sorted(class_counts)
+        total = sum(class_counts.values())
+        vocabulary = set()
+        for counts in feature_counts.values():
+            vocabulary.update(counts)
+        
+        log_priors = [math.log(class_counts[c] / total) for c in classes]
+        denominators = [
+            sum(feature_counts[c].values()) + alpha * len(vocabulary)
+            for c in classes
+        ]
+        unseen = [math.log(alpha / d) for d in denominators]
+        feature_log_probs = {
+            feature: [
+                math.log((feature_counts[c][feature] + alpha) / d)
+                for c, d in zip(classes, denominators)
+            ]
+            for feature in vocabulary
+        }
+        
+        return cls(classes, log_priors, unseen, feature_log_probs, buckets, total)
+    
+    def predict(self, description: str) -> Tuple[Optional[str], float]:
+        """Return (category, confidence); confidence is the posterior probability"""
+        features = extract_features(description, self.buckets)
+        if not features:
+            return None, 0.0
+        
+        scores = list(self.log_priors)
+        n = len(scores)
+        table = self.feature_log_probs
+        unseen = self.unseen_log_probs
+        for feature in features:
+            row = table.get(feature, unseen)
+            for i in range(n):
+                scores[i] += row[i]
+        
+        best = max(range(n), key=scores.__getitem__)
+        top = scores[best]
+        confidence = 1.0 / sum(math.exp(score - top) for score in scores)
+        return self.classes[best], confidence
+    
+    def predict_batch(self, descriptions: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+        return [self.predict(description) for description in descriptions]
+    
+    def to_dict(self) -> Dict:
+        return {
+            "version": MODEL_VERSION,
+            "buckets": self.buckets,
+            "trained_on": self.trained_on,
+            "classes": self.classes,
+            "log_priors": self.log_priors,
+            "unseen_log_probs": self.unseen_log_probs,
+            "feature_log_probs": {
+                str(feature): [round(value, 5) for value in row]
+                for feature, row in self.feature_log_probs.items()
+            }
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NaiveBayesCategorizer":
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"Unsupported categorizer model version: {data.get('version')}")
+        return cls(
+            classes=data["classes"],
+            log_priors=data["log_priors"],
+            unseen_log_probs=data["unseen_log_probs"],
+            feature_log_probs={int(k): v for k, v in data["feature_log_probs"].items()},
+            buckets=data["buckets"],
+            trained_on=data.get("trained_on", 0)
+        )
+    
+    def save(self, path: str = ML_CATEGORIZER_PATH) -> None:
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str = ML_CATEGORIZER_PATH) -> "NaiveBayesCategorizer":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+_model: Optional[NaiveBayesCategorizer] = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+def load_categorizer_model(path: str = ML_CATEGORIZER_PATH) -> Optional[NaiveBayesCategorizer]:
+    """Load the model from disk once; later calls reuse it"""
+    global _model, _model_loaded
+    with _model_lock:
+        if not _model_loaded:
+            _model_loaded = True
+            if os.path.exists(path):
+                try:
+                    _model = NaiveBayesCategorizer.load(path)
+                    logger.info("Loaded expense categorizer", extra={
+                        "trained_on": _model.trained_on,
+                        "categories": len(_model.classes)
+                    })
+                except Exception as e:
+                    logger.error("Error loading expense categorizer", extra={"error": str(e)})
+        return _model
+
+def set_categorizer_model(model: Optional[NaiveBayesCategorizer]) -> None:
+    """Swap in a freshly trained model without a restart"""
+    global _model, _model_loaded
+    with _model_lock:
+        _model = model
+        _model_loaded = True
+
+def predict_categories(descriptions: Sequence[str]) -> Dict[str, Tuple[str, float]]:
+    """Model predictions for descriptions, or nothing when no model is trained"""
+    model = load_categorizer_model()
+    if model is None:
+        return {}
+    predictions = {}
+    for description in descriptions:
+        category, confidence = model.predict(description)
+        if category is not None:
+            predictions[description] = (category, confidence)
+    return predictions
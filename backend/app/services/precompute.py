@@ -0,0 +1,129 @@
+"""
+Precomputation jobs
+What the job worker pool runs ahead of requests:
+
+- nightly_precompute (daily at PRECOMPUTE_HOUR) queues the per-user jobs
+  below for every active user with expenses and purges old finished jobs.
+- user_rollups rebuilds a user's daily rollups and anomaly statistics from
+  their expenses, repairing any drift in the incrementally kept rows.
+- user_insights computes a user's insights and stores them as their
+  snapshot (GET /ai/insights/daily).
+- recategorize_backfill re-runs categorization over a user's expenses in
+  one category ("Other" by default), e.g. after training the local model.
+
+Importing this module registers the handlers and the schedule; main.py and
+run_worker.py do.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .ai_service import categorize_expenses
+from .anomalies import observe_expense_removed, observe_expenses_imported, rebuild_anomaly_stats
+from .insights import compute_insights, store_snapshot
+from .jobs import JOB_RETENTION_DAYS, ClaimedJob, enqueue, job_handler, purge_finished_jobs, schedule_daily
+from .rollups import rebuild_rollups, record_expense_added, record_expense_removed
+from ..models.expense import Expense
+from ..models.user import User
+from ..utils.response_cache import analytics_cache, user_scope
+
+PRECOMPUTE_HOUR = int(os.getenv("PRECOMPUTE_HOUR", "3"))
+INSIGHTS_PRECOMPUTE_DAYS = int(os.getenv("INSIGHTS_PRECOMPUTE_DAYS", "30"))
+RECATEGORIZE_BATCH_SIZE = 500
+
+NIGHTLY_PRECOMPUTE = "nightly_precompute"
+USER_ROLLUPS = "user_rollups"
+USER_INSIGHTS = "user_insights"
+RECATEGORIZE_BACKFILL = "recategorize_backfill"
+
+def _queue_user_jobs(db: Session, occurrence: str) -> Dict[str, int]:
+    user_ids = db.scalars(select(User.id).where(
+        User.is_active.is_(True),
+        exists().where(Expense.user_id == User.id)
+    )).all()
+    queued = 0
+    for user_id in user_ids:
+        for kind in (USER_ROLLUPS, USER_INSIGHTS):
+            # Per occurrence, so a retried fan-out does not queue twice
+            job_id = enqueue(db, kind, user_id=user_id, dedupe_key=f"{kind}:{user_id}@{occurrence}")
+            queued += job_id is not None
+    purged = purge_finished_jobs(db, datetime.now() - timedelta(days=JOB_RETENTION_DAYS))
+    return {"users": len(user_ids), "queued": queued, "purged": purged}
+
+@job_handler(NIGHTLY_PRECOMPUTE)
+async def nightly_precompute(db: AsyncSession, job: ClaimedJob) -> Dict[str, Any]:
+    occurrence = job.payload.get("occurrence") or f"job-{job.id}"
+    return await db.run_sync(_queue_user_jobs, occurrence)
+
+def _rebuild_user(db: Session, user_id: int) -> Dict[str, int]:
+    return {
+        "rollup_rows": rebuild_rollups(db, user_id),
+        "anomaly_stats_rows": rebuild_anomaly_stats(db, user_id)
+    }
+
+@job_handler(USER_ROLLUPS, per_user=True)
+async def user_rollups(db: AsyncSession, job: ClaimedJob) -> Dict[str, Any]:
+    result = await db.run_sync(_rebuild_user, job.user_id)
+    await db.commit()
+    await analytics_cache.invalidate(user_scope(job.user_id))
+    return result
+
+@job_handler(USER_INSIGHTS, per_user=True)
+async def user_insights(db: AsyncSession, job: ClaimedJob) -> Dict[str, Any]:
+    days = int(job.payload.get("days", INSIGHTS_PRECOMPUTE_DAYS))
+    computed_at = datetime.now()
+    insights = await compute_insights(db, job.user_id, days)
+    await db.run_sync(store_snapshot, job.user_id, days, insights, computed_at)
+    return {"insights": len(insights["insights"]), "recommendations": len(insights["recommendations"])}
+
+def _move_categories(db: Session, user_id: int, moves: List[Tuple[Expense, str]]) -> None:
+    """Change expenses' categories, moving them between rollup buckets and
+    category statistics (without scoring them again, so their flags stay)"""
+    for expense, category in moves:
+        record_expense_removed(db, expense)
+        observe_expense_removed(db, expense, drop_flags=False)
+        expense.category = category
+        record_expense_added(db, expense)
+    observe_expenses_imported(db, user_id, [
+        {"category": expense.category, "amount": expense.amount} for expense, _ in moves
+    ])
+
+@job_handler(RECATEGORIZE_BACKFILL, per_user=True)
+async def recategorize_backfill(db: AsyncSession, job: ClaimedJob) -> Dict[str, Any]:
+    category = job.payload.get("category", "Other")
+    examined = 0
+    changed = 0
+    after_id = 0
+    # Batches commit as they go; a retry finds only what is still left
+    while True:
+        expenses = (await db.scalars(select(Expense).where(
+            Expense.user_id == job.user_id,
+            Expense.category == category,
+            Expense.id > after_id
+        ).order_by(Expense.id).limit(RECATEGORIZE_BATCH_SIZE))).all()
+        if not expenses:
+            break
+        after_id = expenses[-1].id
+        examined += len(expenses)
+        
+        categories = await categorize_expenses([expense.description for expense in expenses], job.user_id)
+        moves = [
+            (expense, new_category)
+            for expense, new_category in zip(expenses, categories)
+            if new_category != category
+        ]
+        if moves:
+            await db.run_sync(_move_categories, job.user_id, moves)
+            await db.commit()
+            changed += len(moves)
+    
+    if changed:
+        await analytics_cache.invalidate(user_scope(job.user_id))
+    return {"category": category, "examined": examined, "recategorized": changed}
+
+schedule_daily(NIGHTLY_PRECOMPUTE, PRECOMPUTE_HOUR)
\ No newline at end of file
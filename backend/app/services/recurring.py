@@ -0,0 +1,415 @@
+"""
+Recurring payment detection
+Finds subscriptions and other repeating charges: expenses with the same
+normalized description that arrive at a steady interval (weekly through
+yearly) for a steady amount, and predicts when each is next due.
+
+Detection is vectorized over every description of a user at once: charges
+are sorted by (description, time), the gaps between neighbours become one
+array, and the per-description medians and agreement ratios come out of a
+few sorts and bincounts instead of a Python loop per merchant.
+
+The scan is incremental. recurring_series keeps, per user and description,
+the latest RECURRING_MAX_HISTORY charges and what was detected from them,
+and recurring_scan_state the highest expense id already folded in. A scan
+reads only the expenses above that watermark and re-analyses only the
+descriptions they touch. Editing or deleting an expense resets the
+watermark, so the next scan rebuilds the user from scratch. Expense ids are
+taken to grow in commit order; a row that commits behind a higher id is
+picked up by the next rebuild.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .category_cache import normalize_description
+from ..models.database import SessionLocal, dialect_insert
+from ..models.expense import Expense
+from ..models.recurring import RecurringScanState, RecurringSeries
+from ..utils.fast_json import dumps
+from ..utils.log import get_logger
+
+logger = get_logger("recurring")
+
+# Charges kept (and analysed) per description
+RECURRING_MAX_HISTORY = int(os.getenv("RECURRING_MAX_HISTORY", "24"))
+# Fraction of gaps that must match the cadence, and of amounts that must be
+# within RECURRING_AMOUNT_TOLERANCE of the typical amount
+RECURRING_MIN_REGULARITY = float(os.getenv("RECURRING_MIN_REGULARITY", "0.75"))
+RECURRING_AMOUNT_TOLERANCE = float(os.getenv("RECURRING_AMOUNT_TOLERANCE", "0.2"))
+
+# (name, period in days, allowed deviation of a gap in days)
+CADENCES = (
+    ("weekly", 7.0, 1.5),
+    ("biweekly", 14.0, 2.5),
+    ("monthly", 30.44, 4.0),
+    ("quarterly", 91.31, 10.0),
+    ("yearly", 365.25, 20.0)
+)
+_PERIODS = np.array([cadence[1] for cadence in CADENCES])
+_TOLERANCES = np.array([cadence[2] for cadence in CADENCES])
+_YEARLY = len(CADENCES) - 1
+MIN_OCCURRENCES = 3
+# A yearly charge seen twice is already worth reporting
+MIN_YEARLY_OCCURRENCES = 2
+# Gaps needed before confidence reaches 1
+CONFIDENT_GAPS = 4
+# A payment counts as lapsed this many periods after it was next expected
+LAPSE_PERIODS = 0.5
+# Fields whose change invalidates the stored history
+SCANNED_FIELDS = ("description", "amount", "date")
+
+DAY_SECONDS = 86400
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+# Keys per IN (...) when loading stored series
+_KEY_CHUNK = 500
+
+def _to_datetime(seconds: float) -> datetime:
+    return _EPOCH + timedelta(seconds=int(seconds))
+
+def _group_bounds(codes: np.ndarray, groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Size and start offset of each group in an array sorted by code"""
+    counts = np.bincount(codes, minlength=groups)
+    return counts, np.cumsum(counts) - counts
+
+def _group_medians(codes: np.ndarray, values: np.ndarray, groups: int) -> np.ndarray:
+    """Median of values per code (NaN for codes with no values)"""
+    ordered = values[np.lexsort((values, codes))]
+    counts, starts = _group_bounds(codes, groups)
+    medians = np.full(groups, np.nan)
+    present = counts > 0
+    low = starts[present] + (counts[present] - 1) // 2
+    high = starts[present] + counts[present] // 2
+    medians[present] = (ordered[low] + ordered[high]) / 2
+    return medians
+
+def detect(codes: np.ndarray, timestamps: np.ndarray, amounts: np.ndarray, groups: int) -> Dict[str, np.ndarray]:
+    """Analyse charges grouped by code (0..groups-1, every code present),
+    timestamps in epoch seconds. Returns per-group arrays; "order" lists the
+    input positions of the charges kept as history, grouped by code and
+    oldest first, with "kept" charges per group."""
+    order = np.lexsort((timestamps, codes))
+    codes = codes[order]
+    counts, starts = _group_bounds(codes, groups)
+    first_seen = timestamps[order[starts]]
+    
+    # Only the latest RECURRING_MAX_HISTORY charges of each group count
+    from_end = np.repeat(starts + counts, counts) - np.arange(len(codes)) - 1
+    latest = from_end < RECURRING_MAX_HISTORY
+    order = order[latest]
+    codes = codes[latest]
+    timestamps = timestamps[order]
+    amounts = amounts[order]
+    kept, starts = _group_bounds(codes, groups)
+    
+    same = codes[1:] == codes[:-1]
+    gap_codes = codes[1:][same]
+    gaps = np.diff(timestamps)[same] / DAY_SECONDS
+    gap_counts = np.bincount(gap_codes, minlength=groups)
+    period = _group_medians(gap_codes, gaps, groups)
+    
+    cadence = np.full(groups, -1)
+    for index in range(len(CADENCES)):
+        matches = (cadence < 0) & (np.abs(period - _PERIODS[index]) <= _TOLERANCES[index])
+        cadence[matches] = index
+    tolerance = np.where(cadence >= 0, _TOLERANCES[cadence], 0.0)
+    regular = np.abs(gaps - period[gap_codes]) <= tolerance[gap_codes]
+    regularity = np.bincount(gap_codes, weights=regular, minlength=groups) / np.maximum(gap_counts, 1)
+    
+    typical = _group_medians(codes, amounts, groups)
+    steady = np.abs(amounts - typical[codes]) <= RECURRING_AMOUNT_TOLERANCE * typical[codes]
+    amount_stability = np.bincount(codes, weights=steady, minlength=groups) / kept
+    
+    last_seen = timestamps[starts + kept - 1]
+    min_occurrences = np.where(cadence == _YEARLY, MIN_YEARLY_OCCURRENCES, MIN_OCCURRENCES)
+    recurring = (
+        (cadence >= 0)
+        & (kept >= min_occurrences)
+        & (regularity >= RECURRING_MIN_REGULARITY)
+        & (amount_stability >= RECURRING_MIN_REGULARITY)
+    )
+    return {
+        "occurrences": counts,
+        "first_seen": first_seen,
+        "last_seen": last_seen,
+        "cadence": cadence,
+        "period_days": period,
+        "typical_amount": typical,
+        "confidence": regularity * amount_stability * np.minimum(gap_counts / CONFIDENT_GAPS, 1.0),
+        "next_expected": last_seen + np.nan_to_num(period) * DAY_SECONDS,
+        "recurring": recurring,
+        "order": order,
+        "kept": kept
+    }
+
+def _locked_state(db: Session, user_id: int) -> RecurringScanState:
+    """The user's scan state, created if missing and locked for the rest of
+    the transaction (FOR UPDATE, where supported)"""
+    query = select(RecurringScanState).where(RecurringScanState.user_id == user_id).with_for_update()
+    state = db.scalars(query).first()
+    if state is not None:
+        return state
+    
+    upsert = dialect_insert(db.get_bind())
+    if upsert is None:
+        state = RecurringScanState(user_id=user_id, last_expense_id=0)
+        db.add(state)
+        return state
+    db.execute(upsert(RecurringScanState).values(
+        user_id=user_id, last_expense_id=0
+    ).on_conflict_do_nothing(index_elements=["user_id"]))
+    return db.scalars(query).one()
+
+def _stored_series(db: Session, user_id: int, keys: List[str]) -> Dict[str, Tuple]:
+    """(occurrences, history, first_seen, last_seen, description, category) by key"""
+    stored = {}
+    for offset in range(0, len(keys), _KEY_CHUNK):
+        rows = db.execute(select(
+            RecurringSeries.description_key,
+            RecurringSeries.occurrences,
+            RecurringSeries.history,
+            RecurringSeries.first_seen,
+            RecurringSeries.last_seen,
+            RecurringSeries.description,
+            RecurringSeries.category
+        ).where(
+            RecurringSeries.user_id == user_id,
+            RecurringSeries.description_key.in_(keys[offset:offset + _KEY_CHUNK])
+        ))
+        for key, *values in rows:
+            stored[key] = tuple(values)
+    return stored
+
+def scan_recurring(db: Session, user_id: int, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Fold the user's expenses above the watermark into recurring_series
+    (all of them if the watermark is 0) and advance it. The caller commits."""
+    state = _locked_state(db, user_id)
+    watermark = state.last_expense_id
+    state.last_run_at = now or datetime.now()
+    rows = db.execute(select(
+        Expense.id, Expense.description, Expense.category, Expense.amount, Expense.date
+    ).where(
+        Expense.user_id == user_id,
+        Expense.id > watermark
+    )).all()
+    result = {"mode": "full" if watermark == 0 else "incremental", "rows": len(rows), "series": 0, "recurring": 0}
+    if watermark == 0:
+        db.execute(delete(RecurringSeries).where(RecurringSeries.user_id == user_id))
+    if not rows:
+        return result
+    
+    # Descriptions repeat a lot, so normalize each distinct one once
+    codes_by_key = {}
+    codes_by_description = {
+        description: codes_by_key.setdefault(normalize_description(description) or description, len(codes_by_key))
+        for description in dict.fromkeys(row[1] for row in rows)
+    }
+    codes = np.fromiter((codes_by_description[row[1]] for row in rows), dtype=np.intp, count=len(rows))
+    timestamps = np.fromiter(((row[4] - _EPOCH) // _SECOND for row in rows), dtype=np.int64, count=len(rows))
+    amounts = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+    keys = list(codes_by_key)
+    
+    # Stored history joins the new rows, after them so positions below
+    # len(rows) are new expenses
+    stored = _stored_series(db, user_id, keys) if watermark else {}
+    previous = defaultdict(int)
+    if stored:
+        history_codes = []
+        history_timestamps = []
+        history_amounts = []
+        for key, (occurrences, history, *_) in stored.items():
+            charges = json.loads(history)
+            previous[codes_by_key[key]] = occurrences - len(charges)
+            history_codes.extend([codes_by_key[key]] * len(charges))
+            history_timestamps.extend(charge[0] for charge in charges)
+            history_amounts.extend(charge[1] for charge in charges)
+        codes = np.concatenate((codes, np.array(history_codes, dtype=np.intp)))
+        timestamps = np.concatenate((timestamps, np.array(history_timestamps, dtype=np.int64)))
+        amounts = np.concatenate((amounts, np.array(history_amounts, dtype=np.float64)))
+    
+    found = detect(codes, timestamps, amounts, len(keys))
+    order = found["order"]
+    ends = np.cumsum(found["kept"])
+    cadence = found["cadence"].tolist()
+    period_days = found["period_days"]
+    typical_amount = found["typical_amount"]
+    recurring = found["recurring"].tolist()
+    confidence = found["confidence"].tolist()
+    first_seen = found["first_seen"].tolist()
+    last_seen = found["last_seen"].tolist()
+    next_expected = found["next_expected"].tolist()
+    occurrences = found["occurrences"].tolist()
+    charge_times = timestamps.tolist()
+    charge_amounts = amounts.tolist()
+    
+    new_series = []
+    changed_series = []
+    start = 0
+    for code, key in enumerate(keys):
+        end = int(ends[code])
+        positions = order[start:end].tolist()
+        start = end
+        latest = positions[-1]
+        if latest < len(rows):
+            description, category = rows[latest][1], rows[latest][2]
+        else:
+            description, category = stored[key][4], stored[key][5]
+        values = {
+            "user_id": user_id,
+            "description_key": key,
+            "description": description,
+            "category": category,
+            "occurrences": previous[code] + occurrences[code],
+            "history": dumps([[charge_times[i], charge_amounts[i]] for i in positions]).decode(),
+            "is_recurring": recurring[code],
+            "cadence": CADENCES[cadence[code]][0] if cadence[code] >= 0 else None,
+            "period_days": round(float(period_days[code]), 2) if cadence[code] >= 0 else None,
+            "typical_amount": round(float(typical_amount[code]), 2) if cadence[code] >= 0 else None,
+            "confidence": round(confidence[code], 3),
+            "first_seen": _to_datetime(first_seen[code]),
+            "last_seen": _to_datetime(last_seen[code]),
+            "next_expected": _to_datetime(next_expected[code]) if recurring[code] else None
+        }
+        if key in stored:
+            # The stored first charge may have dropped out of the history
+            values["first_seen"] = min(values["first_seen"], stored[key][2])
+            changed_series.append(values)
+        else:
+            new_series.append(values)
+    
+    if new_series:
+        # Core insert: the ORM splits rows into batches by which columns are None
+        db.execute(insert(RecurringSeries.__table__), new_series)
+    if changed_series:
+        db.execute(update(RecurringSeries), changed_series)
+    
+    state.last_expense_id = max(row[0] for row in rows)
+    result["series"] = len(keys)
+    result["recurring"] = sum(recurring)
+    return result
+
+def reset_recurring_scan(db: Session, user_id: int) -> None:
+    """Make the next scan rebuild the user's series from scratch; call when
+    an expense's description, amount or date changes or it is deleted"""
+    db.execute(update(RecurringScanState).where(
+        RecurringScanState.user_id == user_id
+    ).values(last_expense_id=0))
+
+def is_active(series: RecurringSeries, now: datetime) -> bool:
+    """Whether the payment has come up recently enough to still be running"""
+    if series.next_expected is None:
+        return False
+    return now <= series.next_expected + timedelta(days=series.period_days * LAPSE_PERIODS)
+
+def payment_response(series: RecurringSeries, now: datetime) -> Dict[str, Any]:
+    """A RecurringPaymentResponse-shaped dict"""
+    return {
+        "description": series.description,
+        "category": series.category,
+        "cadence": series.cadence,
+        "period_days": series.period_days,
+        "typical_amount": series.typical_amount,
+        "monthly_cost": round(series.typical_amount * CADENCES[2][1] / series.period_days, 2),
+        "occurrences": series.occurrences,
+        "confidence": series.confidence,
+        "first_seen": series.first_seen,
+        "last_seen": series.last_seen,
+        "next_expected": series.next_expected,
+        "active": is_active(series, now)
+    }
+
+class RecurringScanner:
+    """Runs scans in their own sessions, one per user at a time"""
+    
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        # user_id -> [lock held while scanning, callers holding or waiting]
+        self._user_locks: Dict[int, list] = {}
+        self.full_scans = 0
+        self.incremental_scans = 0
+        self.rows_scanned = 0
+        self.waited = 0
+        self.failures = 0
+        self.last_duration_ms = 0.0
+    
+    def scan_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Scan one user, after any scan already running for them so that
+        expenses committed before the call are always folded in; returns
+        None if the scan failed"""
+        with self._lock:
+            entry = self._user_locks.setdefault(user_id, [threading.Lock(), 0])
+            entry[1] += 1
+            if entry[0].locked():
+                self.waited += 1
+        
+        try:
+            with entry[0]:
+                return self._scan(user_id)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._user_locks[user_id]
+    
+    def _scan(self, user_id: int) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            with self.session_factory() as db:
+                result = scan_recurring(db, user_id)
+                db.commit()
+        except Exception as e:
+            self.failures += 1
+            logger.error("Recurring payment scan failed", extra={"user_id": user_id, "error": str(e)})
+            return None
+        
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.rows_scanned += result["rows"]
+        if result["mode"] == "full":
+            self.full_scans += 1
+        else:
+            self.incremental_scans += 1
+        return result
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "full_scans": self.full_scans,
+            "incremental_scans": self.incremental_scans,
+            "rows_scanned": self.rows_scanned,
+            "waited": self.waited,
+            "failures": self.failures,
+            "last_duration_ms": self.last_duration_ms
+        }
+
+recurring_scanner = RecurringScanner()
+
+async def list_recurring(
+    db: AsyncSession,
+    user_id: int,
+    include_inactive: bool = False,
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """The user's recurring payments, next due first, after folding in any
+    expenses the background scans have not reached yet"""
+    await run_in_threadpool(recurring_scanner.scan_user, user_id)
+    now = now or datetime.now()
+    series = (await db.scalars(select(RecurringSeries).where(
+        RecurringSeries.user_id == user_id,
+        RecurringSeries.is_recurring.is_(True)
+    ).order_by(RecurringSeries.next_expected))).all()
+    payments = [payment_response(entry, now) for entry in series]
+    if not include_inactive:
+        payments = [payment for payment in payments if payment["active"]]
+    return payments
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Daily expense rollups
+Keeps expense_daily_rollups in step with the expenses table so analytics
+reads scale with the number of days in a range, not the number of rows.
+"""
+
+from datetime import date, datetime
+from typing import Optional, Union
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models.database import dialect_insert
+from ..models.expense import Expense
+from ..models.rollup import ExpenseDailyRollup
+
+def _as_day(value: Union[date, datetime]) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+def _upsert_statement(db: Session, user_id: int, day: date, category: str, amount: float, count: int):
+    """Build an INSERT ... ON CONFLICT that adds to an existing rollup row"""
+    upsert = dialect_insert(db.get_bind())
+    if upsert is None:
+        return None
+    
+    stmt = upsert(ExpenseDailyRollup).values(
+        user_id=user_id,
+        day=day,
+        category=category,
+        total_amount=amount,
+        expense_count=count
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "day", "category"],
+        set_={
+            "total_amount": ExpenseDailyRollup.total_amount + stmt.excluded.total_amount,
+            "expense_count": ExpenseDailyRollup.expense_count + stmt.excluded.expense_count
+        }
+    )
+
+def apply_rollup_delta(
+    db: Session,
+    user_id: int,
+    day: Union[date, datetime],
+    category: str,
+    amount: float,
+    count: int
+) -> None:
+    """Add amount/count to a rollup bucket inside the caller's transaction"""
+    day = _as_day(day)
+    stmt = _upsert_statement(db, user_id, day, category, amount, count)
+    if stmt is not None:
+        db.execute(stmt)
+    else:
+        # Portable fallback for databases without ON CONFLICT
+        key = (
+            ExpenseDailyRollup.user_id == user_id,
+            ExpenseDailyRollup.day == day,
+            ExpenseDailyRollup.category == category
+        )
+        result = db.execute(
+            update(ExpenseDailyRollup).where(*key).values(
+                total_amount=ExpenseDailyRollup.total_amount + amount,
+                expense_count=ExpenseDailyRollup.expense_count + count
+            )
+        )
+        if result.rowcount == 0:
+            db.execute(insert(ExpenseDailyRollup).values(
+                user_id=user_id,
+                day=day,
+                category=category,
+                total_amount=amount,
+                expense_count=count
+            ))
+    
+    if count < 0:
+        # Drop buckets that no longer hold any expenses
+        db.execute(delete(ExpenseDailyRollup).where(
+            ExpenseDailyRollup.user_id == user_id,
+            ExpenseDailyRollup.day == day,
+            ExpenseDailyRollup.category == category,
+            ExpenseDailyRollup.expense_count <= 0
+        ))
+
+def record_expense_added(db: Session, expense: Expense) -> None:
+    if expense.date is None:
+        return
+    apply_rollup_delta(db, expense.user_id, expense.date, expense.category, expense.amount, 1)
+
+def record_expense_removed(db: Session, expense: Expense) -> None:
+    if expense.date is None:
+        return
+    apply_rollup_delta(db, expense.user_id, expense.date, expense.category, -expense.amount, -1)
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute rollups from raw expenses, for one user or everyone
+    
+    Returns the number of rollup rows written. The caller commits.
+    """
+    clear = delete(ExpenseDailyRollup)
+    if user_id is not None:
+        clear = clear.where(ExpenseDailyRollup.user_id == user_id)
+    db.execute(clear)
+    
+    day = func.date(Expense.date)
+    source = select(
+        Expense.user_id,
+        day,
+        Expense.category,
+        func.sum(Expense.amount),
+        func.count(Expense.id)
+    )
+    if user_id is not None:
+        source = source.where(Expense.user_id == user_id)
+    source = source.group_by(Expense.user_id, day, Expense.category)
+    
+    result = db.execute(
+        insert(ExpenseDailyRollup).from_select(
+            ["user_id", "day", "category", "total_amount", "expense_count"],
+            source
+        )
+    )
+    return result.rowcount
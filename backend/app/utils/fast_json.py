@@ -0,0 +1,54 @@
+"""
+Fast JSON responses
+Encodes plain rows (dicts of str/int/float/datetime/None) straight to JSON
+bytes, skipping per-row Pydantic validation and jsonable_encoder. Uses orjson
+when installed and falls back to the stdlib encoder with the same output
+conventions as FastAPI's JSONResponse.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Sequence
+
+from fastapi import Response
+
+from .log import get_logger
+
+logger = get_logger("fast_json")
+
+# Try to import orjson, make it optional
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.info("orjson not available; fast JSON responses use the stdlib encoder")
+
+def _default(value: Any) -> Any:
+    # Pydantic serializes datetimes in ISO 8601, as datetime.isoformat() does
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default
+    ).encode("utf-8")
+
+def rows_to_dicts(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Pair column tuples with response field names, keeping field order"""
+    return [dict(zip(keys, row)) for row in rows]
+
+class FastJSONResponse(Response):
+    """JSONResponse for content that is already plain JSON-able data"""
+    
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
\ No newline at end of file
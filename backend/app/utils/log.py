@@ -0,0 +1,152 @@
+"""
+Structured logging
+JSON log records written off the request path through a queue, per-route
+sampling for request logs, and a dedicated synchronous sink for security
+events so they are never sampled or dropped.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+# Comma-separated path-prefix=rate pairs, e.g. "/api/health=0,/api/v1/expenses=0.1"
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "/api/health=0")
+SECURITY_LOG_FILE = os.getenv("SECURITY_LOG_FILE", "./security.log")
+SECURITY_LOG_FSYNC = os.getenv("SECURITY_LOG_FSYNC", "false").lower() == "true"
+
+APP_LOGGER = "rebel_budget"
+SECURITY_LOGGER = "rebel_budget.security"
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and fields"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: when the queue is full the record is dropped"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class SyncFileHandler(logging.FileHandler):
+    """Writes and flushes (optionally fsyncs) every record before returning"""
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        super().emit(record)
+        if SECURITY_LOG_FSYNC and self.stream is not None:
+            os.fsync(self.stream.fileno())
+
+class RouteSampler:
+    """Per-route sampling rates, matched by longest path prefix"""
+    
+    def __init__(self, rates: str, default_rate: float):
+        self.default_rate = default_rate
+        self.rules: List[Tuple[str, float]] = []
+        for item in rates.split(","):
+            if "=" not in item:
+                continue
+            prefix, rate = item.split("=", 1)
+            self.rules.append((prefix.strip(), float(rate)))
+        self.rules.sort(key=lambda rule: len(rule[0]), reverse=True)
+    
+    def rate_for(self, path: str) -> float:
+        for prefix, rate in self.rules:
+            if path.startswith(prefix):
+                return rate
+        return self.default_rate
+    
+    def should_log(self, path: str) -> bool:
+        rate = self.rate_for(path)
+        return rate >= 1.0 or (rate > 0 and random.random() < rate)
+
+request_sampler = RouteSampler(LOG_SAMPLE_RATES, LOG_SAMPLE_RATE)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+
+def _level(name: str) -> int:
+    if name in ("OFF", "NONE", "DISABLED"):
+        return logging.CRITICAL + 1
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else logging.INFO
+
+def configure_logging() -> None:
+    """Install the queue-backed JSON handler and the security sink (idempotent)"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    
+    formatter = JsonFormatter()
+    
+    # Application logs: callers only enqueue, a background thread writes
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    
+    app_logger = logging.getLogger(APP_LOGGER)
+    app_logger.handlers = [_queue_handler]
+    app_logger.setLevel(_level(LOG_LEVEL))
+    app_logger.propagate = False
+    
+    # Security events: written synchronously to their own file only,
+    # unsampled and independent of LOG_LEVEL. Not propagated, since parent
+    # handlers would copy them to stdout whatever LOG_LEVEL says.
+    security_file = SyncFileHandler(SECURITY_LOG_FILE, encoding="utf-8", delay=True)
+    security_file.setFormatter(formatter)
+    security = logging.getLogger(SECURITY_LOGGER)
+    security.handlers = [security_file]
+    security.setLevel(logging.INFO)
+    security.propagate = False
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the application namespace, e.g. get_logger("auth")"""
+    return logging.getLogger(f"{APP_LOGGER}.{name}")
+
+def get_security_logger() -> logging.Logger:
+    return logging.getLogger(SECURITY_LOGGER)
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "level": LOG_LEVEL,
+        "queue_size": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0
+    }
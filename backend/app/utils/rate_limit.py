@@ -0,0 +1,288 @@
+"""
+Rate limiting
+GCRA (generic cell rate algorithm) limiter: each key stores a single
+"theoretical arrival time", so a check is O(1) in time and memory no matter
+how many requests the window allows. Keys whose TAT has passed carry no
+state and are evicted. State lives in a pluggable backend: in-process
+memory, or a SQLite file shared by every worker on the host.
+"""
+
+import ipaddress
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from .log import get_logger
+
+logger = get_logger("rate_limit")
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "./rate_limits.db")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# "<requests>/<seconds>" per client IP
+RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "10/60")
+RATE_LIMIT_AI = os.getenv("RATE_LIMIT_AI", "30/60")
+# Comma-separated proxy IPs/networks whose X-Forwarded-For is believed.
+# Not needed when uvicorn runs with --proxy-headers and --forwarded-allow-ips,
+# which already rewrites the client address.
+RATE_LIMIT_TRUSTED_PROXIES = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "")
+
+def parse_rate(value: str) -> Tuple[int, float]:
+    """Parse "10/60" into (10 requests, 60 seconds)"""
+    limit, _, window = value.partition("/")
+    return int(limit), float(window or 60)
+
+class RateLimitRule:
+    """A limit of `limit` requests per `window_seconds` for a path prefix"""
+    
+    def __init__(self, name: str, path_prefix: str, limit: int, window_seconds: float, methods: Optional[List[str]] = None):
+        if limit < 1 or window_seconds <= 0:
+            raise ValueError(f"Invalid rate limit for {name}: {limit}/{window_seconds}")
+        self.name = name
+        self.path_prefix = path_prefix
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.methods = {method.upper() for method in methods} if methods else None
+        # One request "costs" this much of the window
+        self.emission_interval = window_seconds / limit
+    
+    def matches(self, path: str, method: str) -> bool:
+        if self.methods is not None and method not in self.methods:
+            return False
+        return path.startswith(self.path_prefix)
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+class MemoryRateLimitBackend:
+    """Per-process state: one float per active key, oldest keys evicted first"""
+    
+    blocking = False
+    
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def acquire(self, key: str, now: float, interval: float, window: float) -> Tuple[bool, float]:
+        """Apply one request; returns (allowed, theoretical arrival time)"""
+        with self._lock:
+            tat = max(self._tats.get(key, now), now) + interval
+            if tat - now > window:
+                return False, tat - interval
+            
+            self._tats[key] = tat
+            self._tats.move_to_end(key)
+            
+            # Least recently used keys sit at the front; drop the idle ones
+            # (TAT in the past means a full allowance again), and the oldest
+            # beyond max_keys, so memory is bounded
+            while self._tats:
+                oldest_key, oldest_tat = next(iter(self._tats.items()))
+                if oldest_tat > now and len(self._tats) <= self.max_keys:
+                    break
+                del self._tats[oldest_key]
+            return True, tat
+    
+    def __len__(self) -> int:
+        return len(self._tats)
+
+class SQLiteRateLimitBackend:
+    """State in a SQLite file, shared by all workers on one host
+    
+    Each check is a single atomic upsert, so concurrent workers never both
+    take the last slot.
+    """
+    
+    blocking = True
+    
+    def __init__(self, path: str, busy_timeout_ms: int = 5000, sweep_every: int = 1000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.sweep_every = sweep_every
+        self._local = threading.local()
+        self._calls = 0
+    
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+            self._local.connection = connection
+        return connection
+    
+    def acquire(self, key: str, now: float, interval: float, window: float) -> Tuple[bool, float]:
+        connection = self._connection()
+        params = {"key": key, "now": now, "interval": interval, "window": window}
+        row = connection.execute(
+            "INSERT INTO rate_limits (key, tat) VALUES (:key, :now + :interval) "
+            "ON CONFLICT (key) DO UPDATE SET tat = max(tat, :now) + :interval "
+            "WHERE max(tat, :now) + :interval - :now <= :window "
+            "RETURNING tat",
+            params
+        ).fetchone()
+        
+        self._calls += 1
+        if self._calls % self.sweep_every == 0:
+            connection.execute("DELETE FROM rate_limits WHERE tat < ?", (now,))
+        
+        if row is not None:
+            return True, row[0]
+        current = connection.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+        return False, current[0] if current else now
+    
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM rate_limits").fetchone()[0]
+
+class RateLimiter:
+    """Matches requests to rules and applies GCRA against the backend"""
+    
+    def __init__(self, backend, rules: List[RateLimitRule]):
+        self.backend = backend
+        # Most specific prefix first
+        self.rules = sorted(rules, key=lambda rule: len(rule.path_prefix), reverse=True)
+        self.allowed = 0
+        self.rejected = 0
+        self.errors = 0
+    
+    def rule_for(self, path: str, method: str) -> Optional[RateLimitRule]:
+        if method == "OPTIONS":
+            return None
+        for rule in self.rules:
+            if rule.matches(path, method):
+                return rule
+        return None
+    
+    def _decide(self, rule: RateLimitRule, allowed: bool, tat: float, now: float) -> RateLimitDecision:
+        if allowed:
+            self.allowed += 1
+            remaining = int((rule.window_seconds - (tat - now)) / rule.emission_interval)
+            return RateLimitDecision(True, max(remaining, 0), 0.0)
+        self.rejected += 1
+        # The next request fits once the TAT has moved back inside the window
+        retry_after = tat + rule.emission_interval - rule.window_seconds - now
+        return RateLimitDecision(False, 0, max(retry_after, 0.0))
+    
+    def check(self, rule: RateLimitRule, key: str) -> RateLimitDecision:
+        now = time.time()
+        allowed, tat = self.backend.acquire(f"{rule.name}:{key}", now, rule.emission_interval, rule.window_seconds)
+        return self._decide(rule, allowed, tat, now)
+    
+    async def hit(self, rule: RateLimitRule, key: str) -> RateLimitDecision:
+        """check() without blocking the event loop on file-backed backends"""
+        try:
+            if self.backend.blocking:
+                return await run_in_threadpool(self.check, rule, key)
+            return self.check(rule, key)
+        except Exception as e:
+            # Fail open: a broken limiter must not take the API down
+            self.errors += 1
+            logger.error("Rate limiter backend error", extra={"error": str(e)})
+            return RateLimitDecision(True, rule.limit, 0.0)
+    
+    def stats(self) -> Dict[str, object]:
+        try:
+            keys = len(self.backend)
+        except Exception:
+            keys = None
+        return {
+            "backend": type(self.backend).__name__,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "keys": keys,
+            "rules": {
+                rule.name: f"{rule.limit}/{rule.window_seconds:g}s {rule.path_prefix}"
+                for rule in self.rules
+            }
+        }
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+def parse_networks(value: str) -> List[Network]:
+    """Parse "10.0.0.2, 172.28.0.0/16" into networks"""
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in value.split(",") if part.strip()]
+
+def _is_trusted(address: str, networks: List[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+def client_address(scope, trusted_proxies: List[Network]) -> str:
+    """The client IP, taken from X-Forwarded-For only when the peer is a
+    trusted proxy: the rightmost hop that is not itself a trusted proxy"""
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if not trusted_proxies or not _is_trusted(peer, trusted_proxies):
+        return peer
+    
+    forwarded = b",".join(value for name, value in scope["headers"] if name == b"x-forwarded-for")
+    hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else peer
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing the limiter's per-route rules by client IP"""
+    
+    def __init__(self, app, limiter: RateLimiter, trusted_proxies: Optional[str] = None):
+        self.app = app
+        self.limiter = limiter
+        self.trusted_proxies = parse_networks(
+            RATE_LIMIT_TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+        )
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        rule = self.limiter.rule_for(scope["path"], scope["method"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+        
+        decision = await self.limiter.hit(rule, client_address(scope, self.trusted_proxies))
+        if decision.allowed:
+            await self.app(scope, receive, send)
+            return
+        
+        response = JSONResponse(
+            {"detail": "Too many requests. Please try again later."},
+            status_code=429,
+            headers={
+                "Retry-After": str(max(1, round(decision.retry_after + 0.5))),
+                "X-RateLimit-Limit": str(rule.limit),
+                "X-RateLimit-Remaining": "0"
+            }
+        )
+        await response(scope, receive, send)
+
+def create_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "sqlite":
+        return SQLiteRateLimitBackend(RATE_LIMIT_SQLITE_PATH)
+    if name == "memory":
+        return MemoryRateLimitBackend(RATE_LIMIT_MAX_KEYS)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{name}' (expected memory or sqlite)")
+
+def default_rules() -> List[RateLimitRule]:
+    return [
+        RateLimitRule("login", "/api/v1/auth/login", *parse_rate(RATE_LIMIT_LOGIN), methods=["POST"]),
+        RateLimitRule("ai", "/api/v1/ai/", *parse_rate(RATE_LIMIT_AI))
+    ]
+
+rate_limiter = RateLimiter(create_backend(), default_rules())
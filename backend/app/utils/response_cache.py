@@ -0,0 +1,242 @@
+"""
+Response caching
+Caches serialized JSON responses by (scope, endpoint, params) with a TTL
+and LRU eviction. Every scope has a version counter that writes bump, so
+invalidation is O(1): entries under an old version are simply never read
+again and age out. Responses carry an ETag, and a matching If-None-Match
+gets a 304 without touching the cached body.
+
+The backend is pluggable: in-process memory by default, or a SQLite file
+shared by every worker on the host, so an invalidation on one worker is
+seen by all of them.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from .cache import TTLCache
+from .log import get_logger
+
+logger = get_logger("response_cache")
+
+ANALYTICS_CACHE_BACKEND = os.getenv("ANALYTICS_CACHE_BACKEND", "memory").lower()
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "5000"))
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+ANALYTICS_CACHE_SQLITE_PATH = os.getenv("ANALYTICS_CACHE_SQLITE_PATH", "./analytics_cache.db")
+
+def user_scope(user_id: int) -> str:
+    return f"user:{user_id}"
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+
+class MemoryResponseCacheBackend:
+    """Per-process entries and version counters"""
+    
+    blocking = False
+    
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.entries = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def lookup(self, scope: str, suffix: str) -> Tuple[int, Optional[CachedResponse]]:
+        version = self._versions.get(scope, 0)
+        return version, self.entries.get((scope, version, suffix))
+    
+    def store(self, scope: str, version: int, suffix: str, entry: CachedResponse) -> None:
+        self.entries.set((scope, version, suffix), entry)
+    
+    def bump(self, scopes) -> None:
+        with self._lock:
+            for scope in scopes:
+                self._versions[scope] = self._versions.get(scope, 0) + 1
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+
+class SQLiteResponseCacheBackend:
+    """Entries and version counters in a SQLite file shared by all workers"""
+    
+    blocking = True
+    
+    def __init__(self, path: str, max_size: int, ttl_seconds: float, sweep_every: int = 200):
+        self.path = path
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.sweep_every = sweep_every
+        self._local = threading.local()
+        self._stores = 0
+    
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache_versions "
+                "(scope TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache "
+                "(key TEXT PRIMARY KEY, etag TEXT NOT NULL, body BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+    
+    def lookup(self, scope: str, suffix: str) -> Tuple[int, Optional[CachedResponse]]:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT version FROM response_cache_versions WHERE scope = ?", (scope,)
+        ).fetchone()
+        version = row[0] if row else 0
+        row = connection.execute(
+            "SELECT etag, body FROM response_cache WHERE key = ? AND expires_at > ?",
+            (f"{scope}|{version}|{suffix}", time.time())
+        ).fetchone()
+        return version, CachedResponse(row[0], bytes(row[1])) if row else None
+    
+    def store(self, scope: str, version: int, suffix: str, entry: CachedResponse) -> None:
+        connection = self._connection()
+        now = time.time()
+        connection.execute(
+            "INSERT OR REPLACE INTO response_cache (key, etag, body, expires_at) VALUES (?, ?, ?, ?)",
+            (f"{scope}|{version}|{suffix}", entry.etag, entry.body, now + self.ttl_seconds)
+        )
+        
+        self._stores += 1
+        if self._stores % self.sweep_every == 0:
+            # Drop expired entries, then the ones closest to expiry beyond max_size
+            connection.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+            connection.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                "SELECT key FROM response_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,)
+            )
+    
+    def bump(self, scopes) -> None:
+        connection = self._connection()
+        connection.executemany(
+            "INSERT INTO response_cache_versions (scope, version) VALUES (?, 1) "
+            "ON CONFLICT (scope) DO UPDATE SET version = version + 1",
+            [(scope,) for scope in scopes]
+        )
+    
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM response_cache").fetchone()[0]
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+class ResponseCache:
+    """Versioned JSON response cache with ETag revalidation"""
+    
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.errors = 0
+    
+    async def _call(self, func, *args):
+        if self.backend.blocking:
+            return await run_in_threadpool(func, *args)
+        return func(*args)
+    
+    async def respond(
+        self,
+        request: Request,
+        scope: str,
+        endpoint: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """Serve a cached response for (scope, endpoint, params), computing it on a miss"""
+        suffix = f"{endpoint}?{urlencode(sorted(params.items()))}"
+        try:
+            version, entry = await self._call(self.backend.lookup, scope, suffix)
+        except Exception as e:
+            self.errors += 1
+            logger.error("Error reading response cache", extra={"error": str(e)})
+            version, entry = None, None
+        
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            # Same encoding as FastAPI's JSONResponse
+            body = json.dumps(
+                jsonable_encoder(await compute()),
+                ensure_ascii=False,
+                allow_nan=False,
+                separators=(",", ":")
+            ).encode("utf-8")
+            entry = CachedResponse(f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"', body)
+            # A write that lands while computing bumps the version, so this
+            # entry is stored under the old one and never served
+            if version is not None:
+                try:
+                    await self._call(self.backend.store, scope, version, suffix, entry)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error("Error writing response cache", extra={"error": str(e)})
+        
+        headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+    
+    async def invalidate(self, *scopes: str) -> None:
+        """Bump the version of each scope so its cached responses are skipped"""
+        try:
+            await self._call(self.backend.bump, scopes)
+            self.invalidations += 1
+        except Exception as e:
+            self.errors += 1
+            logger.error("Error invalidating response cache", extra={"error": str(e)})
+    
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        try:
+            size = len(self.backend)
+        except Exception:
+            size = None
+        return {
+            "backend": type(self.backend).__name__,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+def create_backend(name: str = ANALYTICS_CACHE_BACKEND):
+    if name == "sqlite":
+        return SQLiteResponseCacheBackend(ANALYTICS_CACHE_SQLITE_PATH, ANALYTICS_CACHE_SIZE, ANALYTICS_CACHE_TTL_SECONDS)
+    if name == "memory":
+        return MemoryResponseCacheBackend(ANALYTICS_CACHE_SIZE, ANALYTICS_CACHE_TTL_SECONDS)
+    raise ValueError(f"Unknown ANALYTICS_CACHE_BACKEND '{name}' (expected memory or sqlite)")
+
+analytics_cache = ResponseCache(create_backend())
\ No newline at end of file
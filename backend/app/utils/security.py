@@ -1,13 +1,26 @@
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import hashlib
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 
+from ..models.database import AsyncSessionLocal
+from ..models.revoked_token import RevokedToken
+from .cache import TTLCache
+from .log import get_logger, get_security_logger
+from .rate_limit import MemoryRateLimitBackend
+
 load_dotenv()
 
 # Simple configuration
@@ -15,10 +28,143 @@ SECRET_KEY = os.getenv("SECRET_KEY", "change-this-secret-key-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24  # Longer for better UX since no sensitive bank data
 
-# Password hashing (essential)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Verified token claims are cached until the token expires, keyed by a hash
+# of the token, so repeat requests skip signature checks and claim parsing
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+# How often each worker picks up tokens revoked by other workers
+TOKEN_REVOCATION_REFRESH_SECONDS = float(os.getenv("TOKEN_REVOCATION_REFRESH_SECONDS", "30"))
+
+logger = get_logger("security")
+
+# Password hashing (essential). Hashes made with a different cost factor
+# are upgraded on the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
 security = HTTPBearer()
 
+# bcrypt is deliberately slow CPU work; it runs on its own small thread pool
+# so logins never stall the event loop, and excess work is refused early
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+class PasswordHashPool:
+    """Bounded executor for password hashing with fail-fast backpressure"""
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.failures = 0
+        self.rejected = 0
+    
+    def _release(self, _future=None) -> None:
+        self.pending -= 1
+    
+    async def run(self, func, *args):
+        """Run func in the pool, or raise 503 when too much work is queued"""
+        # Only touched from the event loop thread, so no lock is needed
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"}
+            )
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self.pending -= 1
+            raise
+        # A caller that gives up (client disconnect, timeout) cannot stop a
+        # hash already running, so it stays pending until its thread is done
+        future.add_done_callback(lambda done: loop.call_soon_threadsafe(self._release, done))
+        try:
+            result = await asyncio.wrap_future(future)
+        except Exception:
+            self.failures += 1
+            raise
+        self.completed += 1
+        return result
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "bcrypt_rounds": BCRYPT_ROUNDS
+        }
+
+password_hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+class TokenRevocationList:
+    """Revoked token ids (jti), held in memory and shared through the database
+    
+    Revocations made by this process apply immediately; those made by other
+    workers are picked up by the next periodic refresh.
+    """
+    
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._revoked: Dict[str, datetime] = {}  # jti -> expires_at (UTC)
+        self._watermark: Optional[datetime] = None
+        self._next_refresh = 0.0
+        self._refresh_lock = asyncio.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._revoked)
+    
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._revoked
+    
+    async def refresh_if_stale(self) -> None:
+        """Load revocations recorded since the last refresh, at most once per interval"""
+        if time.monotonic() < self._next_refresh:
+            return
+        async with self._refresh_lock:
+            if time.monotonic() < self._next_refresh:
+                return
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+            
+            now = datetime.utcnow()
+            query = select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > now)
+            if self._watermark is not None:
+                # Overlap a little to cover transactions committed late
+                query = query.where(RevokedToken.revoked_at >= self._watermark - timedelta(seconds=5))
+            try:
+                async with AsyncSessionLocal() as db:
+                    rows = (await db.execute(query)).all()
+            except Exception as e:
+                logger.error("Error refreshing token revocation list", extra={"error": str(e)})
+                return
+            
+            self._watermark = now
+            self._revoked.update(rows)
+            self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items() if expires_at > now}
+    
+    async def revoke(self, db: AsyncSession, jti: str, user_id: Optional[int], expires_at: datetime) -> None:
+        """Record a revocation and drop rows for tokens that have expired anyway"""
+        now = datetime.utcnow()
+        await db.merge(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at, revoked_at=now))
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        await db.commit()
+        self._revoked[jti] = expires_at
+
+token_cache = TTLCache(max_size=JWT_CACHE_SIZE, ttl_seconds=None)
+revocation_list = TokenRevocationList(TOKEN_REVOCATION_REFRESH_SECONDS)
+
 class Auth:
     """Authentication utilities for manual-entry finance apps"""
     
@@ -32,6 +178,21 @@ class Auth:
         """Verify password"""
         return pwd_context.verify(plain_password, hashed_password)
     
+    @staticmethod
+    def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify password; also return a new hash if the stored one is outdated"""
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """Hash password on the password hashing pool"""
+        return await password_hash_pool.run(Auth.hash_password, password)
+    
+    @staticmethod
+    async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """verify_and_update_password on the password hashing pool"""
+        return await password_hash_pool.run(Auth.verify_and_update_password, plain_password, hashed_password)
+    
     @staticmethod
     def create_token(user_data: Dict) -> str:
         """Create JWT token with longer expiry for better UX"""
@@ -40,7 +201,8 @@ class Auth:
             "sub": str(user_data["id"]),
             "email": user_data["email"],
             "is_admin": user_data.get("is_admin", False),
-            "exp": expire
+            "exp": expire,
+            "jti": uuid.uuid4().hex
         }
         return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     
@@ -59,13 +221,39 @@ class Auth:
                     detail="Invalid token"
                 )
             
-            return {"user_id": int(user_id), "email": email, "is_admin": is_admin}
+            return {
+                "user_id": int(user_id),
+                "email": email,
+                "is_admin": is_admin,
+                "jti": payload.get("jti"),
+                "exp": payload.get("exp")
+            }
         
         except JWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token"
             )
+    
+    @staticmethod
+    def verify_token_cached(token: str) -> Dict:
+        """verify_token with a cache of verified claims; still checks revocation"""
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = token_cache.get(key)
+        if claims is None:
+            claims = Auth.verify_token(token)
+            ttl = claims["exp"] - time.time() if claims["exp"] else 0
+            if ttl > 0:
+                token_cache.set(key, claims, ttl_seconds=ttl)
+        
+        if revocation_list.is_revoked(claims["jti"]):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked"
+            )
+        
+        # Callers may modify the result; the cached claims must stay intact
+        return dict(claims)
 
 class Validation:
     """Input validation utilities for manual entry data"""
@@ -127,31 +315,27 @@ class Validation:
         return category
 
 class RateLimit:
-    """Rate limiting utilities for manual entry apps"""
+    """Rate limiting utilities for manual entry apps
+    
+    Backed by the GCRA limiter in utils/rate_limit.py: constant work and one
+    number of state per key, with idle keys evicted.
+    """
     
-    def __init__(self):
-        self.requests = {}
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryRateLimitBackend()
     
     def check_rate_limit(self, key: str, max_requests: int = 100, window_minutes: int = 60) -> bool:
         """Simple rate limiting - 100 requests per hour is generous for manual entry"""
-        now = datetime.utcnow()
-        window_start = now - timedelta(minutes=window_minutes)
-        
-        if key not in self.requests:
-            self.requests[key] = []
-        
-        # Clean old requests
-        self.requests[key] = [req_time for req_time in self.requests[key] if req_time > window_start]
+        window = window_minutes * 60
+        allowed, _ = self.backend.acquire(key, time.time(), window / max_requests, window)
         
         # Check limit
-        if len(self.requests[key]) >= max_requests:
+        if not allowed:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Too many requests. Please try again later."
             )
         
-        # Add current request
-        self.requests[key].append(now)
         return True
 
 # Global instances
@@ -162,7 +346,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     """Get current user from JWT token"""
     try:
         token = credentials.credentials
-        return Auth.verify_token(token)
+        await revocation_list.refresh_if_stale()
+        return Auth.verify_token_cached(token)
     except HTTPException as e:
         # Log the authentication error for debugging
         log_security_event("AUTH_ERROR", None, f"Token verification failed: {e.detail}")
@@ -186,7 +371,8 @@ async def get_current_user_optional(credentials: Optional[HTTPAuthorizationCrede
         if not credentials:
             return None
         token = credentials.credentials
-        return Auth.verify_token(token)
+        await revocation_list.refresh_if_stale()
+        return Auth.verify_token_cached(token)
     except Exception as e:
         log_security_event("AUTH_DEBUG", None, f"Optional auth failed: {str(e)}")
         return None
@@ -209,14 +395,17 @@ def is_password_strong_enough(password: str) -> tuple[bool, str]:
     # Just require length and not being common
     return True, "Password is acceptable"
 
-# Simple logging for security events
+# Security events go to a dedicated, synchronous sink (see utils/log.py)
 def log_security_event(event_type: str, user_id: Optional[int] = None, details: str = ""):
-    """Basic security event logging"""
-    timestamp = datetime.utcnow().isoformat()
-    print(f"[SECURITY] {timestamp} - {event_type} - User: {user_id} - {details}")
-    
-    # In production, log to a file or service
-    # For now, console logging is sufficient
+    """Record a security event; these are never sampled or dropped"""
+    get_security_logger().info(event_type, extra={
+        "event": event_type,
+        "user_id": user_id,
+        "details": details
+    })
+
+def jwt_cache_stats() -> Dict[str, object]:
+    return {**token_cache.stats(), "revoked_tokens": len(revocation_list)}
 
 # Admin utilities
 def require_admin(current_user: dict):
@@ -234,7 +423,8 @@ async def get_admin_user(credentials: HTTPAuthorizationCredentials = Depends(sec
     """Get current user and verify admin status"""
     from fastapi import Depends
     
-    user_data = Auth.verify_token(credentials.credentials)
+    await revocation_list.refresh_if_stale()
+    user_data = Auth.verify_token_cached(credentials.credentials)
     
     # In a real app, you'd fetch the user from database to get is_admin
     # For now, we'll check if it's in the token or assume based on email
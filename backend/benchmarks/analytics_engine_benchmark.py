@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Analytics Engine Benchmark for Rebel Budget
+Computes the same report on 1M synthetic (date, amount, category) rows twice:
+with pure-Python loops and sorted() over the rows, and with the NumPy
+analytics engine (including the conversion of the rows into arrays). The
+report covers summary statistics and percentiles, per-category statistics,
+7/30-day rolling sums, the weekday/hour heatmap and an amount histogram.
+Rows are generated in memory; fetching them from the database costs the same
+either way.
+
+Usage:
+    python benchmarks/analytics_engine_benchmark.py [rows] [runs]
+"""
+
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from app.services.analytics_engine import (
+    PERCENTILES, ROLLING_WINDOWS, ExpenseArrays, amount_histogram, category_stats,
+    rolling_sums, summary_stats, weekday_hour_heatmap
+)
+
+CATEGORIES = ["Food & Dining", "Transportation", "Shopping", "Bills & Utilities", "Entertainment"]
+DAYS = 365
+BINS = 20
+
+def generate(row_count: int):
+    now = datetime.now().replace(microsecond=0)
+    return [
+        (
+            now - timedelta(seconds=random.randint(0, DAYS * 86400)),
+            round(random.lognormvariate(3.5, 1), 2),
+            random.choice(CATEGORIES)
+        )
+        for _ in range(row_count)
+    ]
+
+# Pure-Python versions of each metric
+def py_summary(amounts):
+    ordered = sorted(amounts)
+    n = len(ordered)
+    
+    def percentile(p):
+        # Linear interpolation between closest ranks, as numpy.percentile
+        rank = (n - 1) * p / 100
+        low = math.floor(rank)
+        high = min(low + 1, n - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+    
+    total = sum(ordered)
+    return {
+        "count": n,
+        "total": round(total, 2),
+        "mean": round(total / n, 2),
+        "median": round(statistics.median(ordered), 2),
+        "std": round(statistics.pstdev(ordered), 2),
+        "min": round(ordered[0], 2),
+        "max": round(ordered[-1], 2),
+        "percentiles": {f"p{p}": round(percentile(p), 2) for p in PERCENTILES}
+    }
+
+def py_report(rows, first_day: date):
+    amounts = [amount for _, amount, _ in rows]
+    by_category = defaultdict(list)
+    daily = defaultdict(float)
+    heat_totals = [[0.0] * 24 for _ in range(7)]
+    for when, amount, category in rows:
+        by_category[category].append(amount)
+        daily[when.date()] += amount
+        heat_totals[when.weekday()][when.hour] += amount
+    
+    categories = sorted(
+        ({"category": category, **py_summary(values)} for category, values in by_category.items()),
+        key=lambda entry: entry["total"], reverse=True
+    )
+    
+    rolling = []
+    for i in range(DAYS):
+        day = first_day + timedelta(days=i)
+        entry = {"date": day.isoformat(), "total_amount": round(daily[day], 2)}
+        for window in ROLLING_WINDOWS:
+            entry[f"rolling_{window}d"] = round(sum(daily[day - timedelta(days=k)] for k in range(window)), 2)
+        rolling.append(entry)
+    
+    low, high = min(amounts), max(amounts)
+    width = (high - low) / BINS
+    counts = [0] * BINS
+    for amount in amounts:
+        counts[min(int((amount - low) / width), BINS - 1)] += 1
+    
+    return py_summary(amounts), categories, rolling, heat_totals, counts
+
+def numpy_report(rows, first_day: date):
+    arrays = ExpenseArrays.from_rows(rows)
+    return (
+        summary_stats(arrays.amounts),
+        category_stats(arrays),
+        rolling_sums(arrays, first_day, DAYS),
+        weekday_hour_heatmap(arrays)["total_amount"],
+        [bucket["expense_count"] for bucket in amount_histogram(arrays.amounts, BINS)]
+    )
+
+def timed(func, runs: int, *args):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+def close(a, b, tolerance: float = 0.02) -> bool:
+    """Equal up to cent rounding of float sums"""
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(close(a[key], b[key], tolerance) for key in a)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(close(x, y, tolerance) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return abs(a - b) <= tolerance * max(1, abs(a) / 1e6)
+    return a == b
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    
+    rows = generate(row_count)
+    first_day = datetime.now().date() - timedelta(days=DAYS - 1)
+    
+    print("🎭 Rebel Budget - Analytics Engine Benchmark")
+    print("=" * 40)
+    print(f"Rows:        {row_count} over {DAYS} days, median of {runs} runs")
+    print()
+    
+    python_seconds, expected = timed(py_report, runs, rows, first_day)
+    convert_seconds, arrays = timed(ExpenseArrays.from_rows, runs, rows)
+    numpy_seconds, actual = timed(numpy_report, runs, rows, first_day)
+    
+    labels = ["summary", "categories", "rolling sums", "heatmap", "histogram"]
+    for label, before, after in zip(labels, expected, actual):
+        print(f"Same {label + ':':<14}{close(before, after)}")
+    print()
+    print("Before (pure Python loops)")
+    print(f"  Full report:         {python_seconds * 1000:8.0f} ms")
+    print("After (NumPy engine)")
+    print(f"  Full report:         {numpy_seconds * 1000:8.0f} ms ({python_seconds / numpy_seconds:.1f}x faster)")
+    print(f"  Rows -> arrays:      {convert_seconds * 1000:8.0f} ms of that")
+    
+    print()
+    for label, func in [
+        ("Summary + percentiles", lambda: summary_stats(arrays.amounts)),
+        ("Per-category stats", lambda: category_stats(arrays)),
+        ("Rolling sums", lambda: rolling_sums(arrays, first_day, DAYS)),
+        ("Weekday/hour heatmap", lambda: weekday_hour_heatmap(arrays)),
+        ("Histogram", lambda: amount_histogram(arrays.amounts, BINS))
+    ]:
+        print(f"  {label + ':':<21}{timed(func, runs)[0] * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
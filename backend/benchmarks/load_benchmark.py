@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Concurrent Load Benchmark for Rebel Budget
+Drives GET /expenses with many concurrent requests against one in-process
+app (a single uvicorn worker) and compares the async session path with the
+previous synchronous Session handler, mounted next to it for the run. While
+the load runs, a probe hits /api/health to show how long unrelated requests
+wait on the event loop.
+
+Set DATABASE_URL to benchmark against PostgreSQL instead of a temp SQLite
+file; network round-trips make the difference much larger there.
+
+Usage:
+    python benchmarks/load_benchmark.py [requests] [concurrency] [expenses]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from typing import List
+
+from app.models.database import DATABASE_URL, Base, SessionLocal, engine
+from app.models.expense import Expense, ExpenseResponse
+from app.models.user import User
+from app.services.rollups import rebuild_rollups
+from app.utils.security import Auth, get_current_user
+from main import app
+
+PAGE_SIZE = 100
+RUN_BUDGET_SECONDS = 30
+
+# Same settings as the old get_db engine except a short pool timeout: with
+# more concurrent requests than pooled connections, the sync handler blocks
+# the event loop waiting for a connection that can only be returned by the
+# event loop, and each such request stalls the worker until the timeout
+LEGACY_POOL_TIMEOUT = 2
+legacy_engine = create_engine(
+    DATABASE_URL,
+    pool_timeout=LEGACY_POOL_TIMEOUT,
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+)
+LegacySessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=legacy_engine)
+
+def get_legacy_db():
+    db = LegacySessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@app.get("/bench/sync/expenses", response_model=List[ExpenseResponse])
+async def get_expenses_sync(
+    db: Session = Depends(get_legacy_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """The handler as it was before: sync Session queries inside async def"""
+    return db.query(Expense).filter(
+        Expense.user_id == current_user["user_id"]
+    ).order_by(Expense.date.desc(), Expense.id.asc()).limit(PAGE_SIZE).all()
+
+def seed(expense_count: int) -> str:
+    """Create one user with expense_count expenses and return a token"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email=f"load-{time.time_ns()}@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        
+        now = datetime.now()
+        categories = ["Food & Dining", "Transportation", "Shopping", "Bills & Utilities"]
+        rows = [
+            {
+                "user_id": user.id,
+                "description": f"Expense {i}",
+                "amount": round(random.uniform(1, 200), 2),
+                "category": categories[i % len(categories)],
+                "date": now - timedelta(minutes=i * 37)
+            }
+            for i in range(expense_count)
+        ]
+        db.execute(insert(Expense), rows)
+        rebuild_rollups(db, user.id)
+        db.commit()
+        return Auth.create_token({"id": user.id, "email": user.email})
+    finally:
+        db.close()
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> List[float]:
+    """Latency of a request that never touches the database"""
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/api/health")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+    return latencies
+
+async def run_load(path: str, token: str, total: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    errors = 0
+    
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        # Warm up connections and caches
+        for _ in range(5):
+            await client.get(path, params={"limit": PAGE_SIZE})
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(total):
+            queue.put_nowait(None)
+        
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, params={"limit": PAGE_SIZE})
+                    response.raise_for_status()
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+        
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, stop))
+        started = time.perf_counter()
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        _, stalled = await asyncio.wait(workers, timeout=RUN_BUDGET_SECONDS)
+        elapsed = time.perf_counter() - started
+        for task in stalled:
+            task.cancel()
+        stop.set()
+        probe_latencies = await probe
+    
+    return elapsed, latencies, errors, total - len(latencies) - errors, probe_latencies
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+def report(label: str, elapsed: float, latencies: List[float], errors: int, unfinished: int, probes: List[float]):
+    print(f"{label}")
+    print(f"  Throughput:        {len(latencies) / elapsed:8.0f} req/s ({elapsed:.2f} s)")
+    print(f"  Errors:            {errors:8d}")
+    if unfinished:
+        print(f"  Unfinished:        {unfinished:8d} (stalled past the {RUN_BUDGET_SECONDS} s budget)")
+    if latencies:
+        print(f"  Latency p50 / p95: {statistics.median(latencies) * 1000:8.1f} / {percentile(latencies, 0.95) * 1000:.1f} ms")
+    if probes:
+        print(f"  Health probe p95:  {percentile(probes, 0.95) * 1000:8.1f} ms (max {max(probes) * 1000:.1f} ms)")
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    expense_count = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    
+    token = seed(expense_count)
+    
+    print("🎭 Rebel Budget - Concurrent Load Benchmark")
+    print("=" * 40)
+    print(f"Database:    {engine.url.render_as_string(hide_password=True)}")
+    print(f"Requests:    {total} x GET /expenses (limit={PAGE_SIZE}), concurrency {concurrency}")
+    print(f"Expenses:    {expense_count}")
+    print()
+    
+    sync_run = asyncio.run(run_load("/bench/sync/expenses", token, total, concurrency))
+    async_run = asyncio.run(run_load("/api/v1/expenses/", token, total, concurrency))
+    
+    report("Before (sync Session in async handler)", *sync_run)
+    report("After (AsyncSession)", *async_run)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Login Storm Benchmark for Rebel Budget
+Fires a burst of concurrent logins at one in-process app while a probe
+polls /api/health, and reports the probe's p99 latency. Runs twice: once
+against a copy of the old handler that verifies bcrypt inline on the event
+loop, and once against /auth/login, which uses the password hashing pool.
+
+Usage:
+    python benchmarks/login_benchmark.py [logins] [concurrency]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+from fastapi import Depends, HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.models.database import Base, SessionLocal, engine, get_async_db
+from app.models.user import User, UserLogin
+from app.utils.security import BCRYPT_ROUNDS, Auth, password_hash_pool
+from main import app
+
+PASSWORD = "storm-password-1"
+USERS = 50
+
+@app.post("/bench/inline/login")
+async def login_inline(login_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    """The old login path: bcrypt verification directly in the handler"""
+    user = await db.scalar(select(User).where(User.email == login_data.email))
+    if not user or not Auth.verify_password(login_data.password, user.hashed_password):
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    return {"access_token": Auth.create_token({"id": user.id, "email": user.email})}
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    hashed = Auth.hash_password(PASSWORD)
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [
+            {"email": f"storm{i}@example.com", "hashed_password": hashed, "failed_login_attempts": 0}
+            for i in range(USERS)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> List[float]:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/api/health")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.005)
+    return latencies
+
+async def run_storm(path: str, logins: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    statuses: Counter = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(i: int):
+            async with semaphore:
+                response = await client.post(path, json={
+                    "email": f"storm{i % USERS}@example.com",
+                    "password": PASSWORD
+                })
+                statuses[response.status_code] += 1
+        
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        probe_latencies = await probe
+    
+    return elapsed, statuses, probe_latencies
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+def report(label: str, elapsed: float, statuses: Counter, probes: List[float]):
+    print(label)
+    print(f"  Wall time:            {elapsed:8.2f} s")
+    print(f"  Responses:            {dict(sorted(statuses.items()))}")
+    print(f"  Health probes:        {len(probes):8d}")
+    print(f"  Health p50 / p99:     {statistics.median(probes) * 1000:8.1f} / {percentile(probes, 0.99) * 1000:.1f} ms")
+    print(f"  Health max:           {max(probes) * 1000:8.1f} ms")
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    
+    seed()
+    
+    print("🎭 Rebel Budget - Login Storm Benchmark")
+    print("=" * 40)
+    print(f"Logins:      {logins}, concurrency {concurrency}")
+    print(f"bcrypt:      {BCRYPT_ROUNDS} rounds, {password_hash_pool.workers} hashing threads, "
+          f"max {password_hash_pool.max_pending} pending")
+    print()
+    
+    async def run_both():
+        # One event loop for both runs: pooled async connections belong to it
+        before = await run_storm("/bench/inline/login", logins, concurrency)
+        after = await run_storm("/api/v1/auth/login", logins, concurrency)
+        return before, after
+    
+    before, after = asyncio.run(run_both())
+    report("Before (bcrypt inline on the event loop)", *before)
+    report("After (password hashing pool)", *after)
+
+if __name__ == "__main__":
+    main()
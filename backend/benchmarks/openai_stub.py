@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+OpenAI Stub Server for Rebel Budget
+A tiny stand-in for the OpenAI chat completions API, used to exercise the
+AI service locally without network access or API costs.
+
+Usage:
+    python benchmarks/openai_stub.py [port] [latency_ms]
+
+Then point the backend at it:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub uvicorn main:app
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KEYWORDS = {
+    "Food & Dining": ["coffee", "restaurant", "lunch", "dinner", "starbucks", "pizza"],
+    "Transportation": ["uber", "lyft", "taxi", "bus", "train"],
+    "Entertainment": ["netflix", "spotify", "cinema", "movie"],
+    "Bills & Utilities": ["rent", "electric", "water", "internet", "phone"],
+    "Shopping": ["amazon", "store", "clothes"],
+    "Groceries": ["grocery", "market", "whole foods"],
+    "Gas": ["shell", "chevron", "fuel"],
+}
+
+class StubState:
+    """Counters shared by all request handler threads"""
+    
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.items = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+def _categorize(description: str) -> str:
+    lower = description.lower()
+    for category, words in KEYWORDS.items():
+        if any(word in lower for word in words):
+            return category
+    return "Other"
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+        
+        def do_POST(self):
+            length = int(self.headers.get("content-length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            
+            with state.lock:
+                state.requests += 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                time.sleep(state.latency_seconds)
+                
+                prompt = body.get("messages", [{}])[-1].get("content", "")
+                items = re.findall(r"^\d+\. (.*)$", prompt, flags=re.MULTILINE)
+                if items:
+                    content = json.dumps([_categorize(item) for item in items])
+                    with state.lock:
+                        state.items += len(items)
+                else:
+                    content = "This is a stubbed assistant reply."
+                
+                payload = json.dumps({
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                }).encode("utf-8")
+                
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+    
+    return Handler
+
+def start_stub_server(port: int = 0, latency_ms: float = 200):
+    """Start the stub in a background thread; returns (server, state, base_url)"""
+    state = StubState(latency_ms / 1000)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    return server, state, base_url
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 200
+    server, state, base_url = start_stub_server(port, latency_ms)
+    print(f"🤖 OpenAI stub listening on {base_url} ({latency_ms:.0f} ms latency)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Projection Query Benchmark for Rebel Budget
+Loads every expense of one user with 100k synthetic expenses twice: as full
+Expense entities (what analytics used to scan) and as ExpensePoint records
+from the projection layer, and reports latency and the memory held by the
+result (tracemalloc peak while loading, and what stays alive after).
+
+Usage:
+    python benchmarks/projection_benchmark.py [expenses] [runs]
+"""
+
+import asyncio
+import gc
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from sqlalchemy import insert, select
+
+from app.models.database import AsyncSessionLocal, Base, SessionLocal, engine
+from app.models.expense import Expense
+from app.models.user import User
+from app.services.expense_queries import Projection, fetch
+
+CATEGORIES = ["Food & Dining", "Transportation", "Shopping", "Bills & Utilities", "Entertainment"]
+
+class ExpensePoint(Projection):
+    """What a per-expense aggregation needs from an expense"""
+    
+    __slots__ = ("amount", "category", "date")
+    _columns = (Expense.amount, Expense.category, Expense.date)
+
+def seed(expense_count: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email="projection@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        
+        now = datetime.now()
+        for start in range(0, expense_count, 10000):
+            db.execute(insert(Expense), [
+                {
+                    "user_id": user.id,
+                    "description": f"Purchase {i} at store {i % 300}",
+                    "amount": round(random.uniform(1, 300), 2),
+                    "category": CATEGORIES[i % len(CATEGORIES)],
+                    "date": now - timedelta(minutes=i * 5),
+                    "notes": "Imported from bank statement; reconciled" if i % 3 == 0 else None,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for i in range(start, min(start + 10000, expense_count))
+            ])
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+async def load_entities(user_id: int):
+    async with AsyncSessionLocal() as db:
+        expenses = (await db.scalars(select(Expense).where(Expense.user_id == user_id))).all()
+        # Entities stay in the session's identity map while it is open
+        return sum(expense.amount for expense in expenses), expenses
+
+async def load_points(user_id: int):
+    async with AsyncSessionLocal() as db:
+        points = await fetch(db, ExpensePoint, ExpensePoint.select().where(Expense.user_id == user_id))
+        return sum(point.amount for point in points), points
+
+async def measure(loader, user_id: int, runs: int):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await loader(user_id)
+        timings.append(time.perf_counter() - started)
+    
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    total, rows = await loader(user_id)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return statistics.median(timings), peak - baseline, retained - baseline, total
+
+def report(label: str, seconds: float, peak: int, retained: int, rows: int):
+    print(label)
+    print(f"  Load time (median):  {seconds * 1000:8.0f} ms")
+    print(f"  Peak memory:         {peak / 1024 / 1024:8.1f} MB")
+    print(f"  Retained by result:  {retained / 1024 / 1024:8.1f} MB ({retained / rows:.0f} B/row)")
+
+def main():
+    expense_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    
+    user_id = seed(expense_count)
+    
+    print("🎭 Rebel Budget - Projection Query Benchmark")
+    print("=" * 40)
+    print(f"Expenses:    {expense_count}, median of {runs} runs")
+    print()
+    
+    async def run_both():
+        before = await measure(load_entities, user_id, runs)
+        after = await measure(load_points, user_id, runs)
+        return before, after
+    
+    before, after = asyncio.run(run_both())
+    print(f"Same total:  {abs(before[3] - after[3]) < 0.01}")
+    print()
+    report("Before (full Expense entities)", *before[:3], expense_count)
+    report("After (ExpensePoint projection)", *after[:3], expense_count)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Query Plan Check for Rebel Budget
+Migrates a database to head, seeds it, and EXPLAINs the hot queries to
+check that each one is answered from the expected index rather than a full
+table scan. Exits non-zero if any plan regresses. tests/test_query_plans.py
+runs the same checks against in-memory SQLite under pytest; this script is
+for checking PostgreSQL or a larger seed.
+
+Uses a temp SQLite file by default; set DATABASE_URL to check PostgreSQL
+(sequential scans are disabled for the check there, so a plan that still
+contains one means no usable index exists). On PostgreSQL, run
+partition_expenses.py first to check the partitioned layout.
+
+Usage:
+    python benchmarks/query_plan_check.py [expenses]
+"""
+
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/plans.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from sqlalchemy import and_, func, insert, or_, select, text
+
+from app.models.anomaly import ExpenseFlag
+from app.models.category_cache import CategoryCacheEntry
+from app.models.database import SessionLocal, engine, upgrade_schema
+from app.models.expense import Expense
+from app.models.job import Job, JOB_QUEUED
+from app.models.partitioning import is_partitioned
+from app.models.recurring import RecurringSeries
+from app.models.revoked_token import RevokedToken
+from app.models.rollup import ExpenseDailyRollup
+from app.models.user import User
+from app.services.rollups import rebuild_rollups
+
+CATEGORIES = ["Food & Dining", "Transportation", "Shopping", "Bills & Utilities", "Entertainment"]
+USERS = 20
+
+def seed(expense_count: int):
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [
+            {"email": f"plan{i}@example.com", "hashed_password": "x"} for i in range(USERS)
+        ])
+        user_ids = db.scalars(select(User.id)).all()
+        now = datetime.now()
+        db.execute(insert(Expense), [
+            {
+                "user_id": user_ids[i % USERS],
+                "description": f"Purchase {i}",
+                "amount": round(random.uniform(1, 300), 2),
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "date": now - timedelta(minutes=i * 7)
+            }
+            for i in range(expense_count)
+        ])
+        rebuild_rollups(db, None)
+        db.commit()
+    finally:
+        db.close()
+    # Give the planner real statistics, as a long-running database has
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+def hot_queries() -> List[Tuple[str, object, object]]:
+    """(label, statement, index or indexes expected to serve it)"""
+    user_id = 1
+    since = datetime.now() - timedelta(days=90)
+    return [
+        (
+            "expense list page",
+            select(Expense.id).where(Expense.user_id == user_id)
+            .order_by(Expense.date.desc(), Expense.id.asc()).limit(100),
+            "ix_expenses_user_date_id"
+        ),
+        (
+            "expense list keyset page",
+            select(Expense.id).where(
+                Expense.user_id == user_id,
+                Expense.date <= since,
+                or_(Expense.date < since, and_(Expense.date == since, Expense.id > 10))
+            ).order_by(Expense.date.desc(), Expense.id.asc()).limit(100),
+            "ix_expenses_user_date_id"
+        ),
+        (
+            "expense list by category",
+            select(Expense.id).where(Expense.user_id == user_id, Expense.category == "Shopping")
+            .order_by(Expense.date.desc(), Expense.id.asc()).limit(100),
+            "ix_expenses_user_category_date_id"
+        ),
+        (
+            "per-user date range",
+            select(Expense.amount, Expense.category, Expense.date)
+            .where(Expense.user_id == user_id, Expense.date >= since),
+            "ix_expenses_user_date_id"
+        ),
+        (
+            "analytics overview",
+            select(Expense.category, func.sum(Expense.amount), func.count(Expense.id))
+            .where(Expense.user_id == user_id, Expense.date >= since)
+            .group_by(Expense.category),
+            # Either per-user index works; SQLite picks the category one to skip the GROUP BY sort
+            ("ix_expenses_user_date_id", "ix_expenses_user_category_date_id")
+        ),
+        (
+            "category date range min/max",
+            select(func.min(Expense.amount), func.max(Expense.amount))
+            .where(Expense.user_id == user_id, Expense.category == "Shopping", Expense.date >= since),
+            "ix_expenses_user_category_date_id"
+        ),
+        (
+            "duplicate check window",
+            select(Expense.id).where(
+                Expense.user_id == user_id,
+                Expense.date >= since,
+                Expense.date <= since + timedelta(hours=96),
+                Expense.amount == 12.5
+            ),
+            "ix_expenses_user_date_id"
+        ),
+        (
+            "anomaly flag listing",
+            select(ExpenseFlag.id).where(ExpenseFlag.user_id == user_id, ExpenseFlag.created_at >= since)
+            .order_by(ExpenseFlag.created_at.desc()).limit(50),
+            "ix_expense_flags_user_created"
+        ),
+        (
+            "recurring scan new rows",
+            select(Expense.id, Expense.description, Expense.amount, Expense.date).where(
+                Expense.user_id == user_id,
+                Expense.id > 1000
+            ),
+            # The user's range in either user-leading index, or the id range;
+            # SQLite names the rowid "PRIMARY KEY"
+            ("ix_expenses_user_date_id", "ix_expenses_user_category_date_id", "ix_expenses_id", "PRIMARY KEY")
+        ),
+        (
+            "recurring payment listing",
+            select(RecurringSeries.description).where(
+                RecurringSeries.user_id == user_id,
+                RecurringSeries.is_recurring.is_(True)
+            ).order_by(RecurringSeries.next_expected),
+            "ix_recurring_series_user_recurring"
+        ),
+        (
+            "job claim",
+            select(Job.id).where(Job.status == JOB_QUEUED, Job.run_at <= datetime.now())
+            .order_by(Job.run_at, Job.id).limit(5),
+            "ix_jobs_status_run_at"
+        ),
+        (
+            "rollup range",
+            select(ExpenseDailyRollup.category, func.sum(ExpenseDailyRollup.total_amount))
+            .where(ExpenseDailyRollup.user_id == user_id, ExpenseDailyRollup.day >= since.date())
+            .group_by(ExpenseDailyRollup.category),
+            # SQLite names the primary key index after the table
+            "expense_daily_rollups"
+        ),
+        (
+            "category override lookup",
+            select(CategoryCacheEntry.category).where(
+                CategoryCacheEntry.user_id == user_id,
+                CategoryCacheEntry.description_key == "coffee"
+            ),
+            "category_cache"
+        ),
+        (
+            "login by email",
+            select(User.id).where(User.email == "plan1@example.com"),
+            "ix_users_email"
+        ),
+        (
+            "revocation refresh",
+            select(RevokedToken.jti).where(RevokedToken.revoked_at >= since),
+            "ix_revoked_tokens_revoked_at"
+        )
+    ]
+
+def sqlite_plan(connection, sql: str) -> Tuple[List[str], Callable[[str], bool]]:
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    lines = [row[-1] for row in rows]
+    
+    def uses(index: str) -> bool:
+        # SEARCH = index lookup/range; a bare SCAN of a table is a full scan
+        return any(
+            line.startswith("SEARCH") and index in line for line in lines
+        ) and not any(
+            line.startswith("SCAN") and "USING" not in line and "CONSTANT" not in line
+            for line in lines
+        )
+    return lines, uses
+
+def postgresql_plan(connection, sql: str) -> Tuple[List[str], Callable[[str], bool]]:
+    connection.exec_driver_sql("SET enable_seqscan = off")
+    lines = [row[0] for row in connection.exec_driver_sql(f"EXPLAIN {sql}").all()]
+    
+    partitioned = is_partitioned(connection)
+    
+    def uses(index: str) -> bool:
+        plan = "\n".join(lines)
+        if "Seq Scan" in plan:
+            return False
+        if index in ("expense_daily_rollups", "category_cache"):
+            index = f"{index}_pkey"
+        # Partitions carry their own copies of the index, named by PostgreSQL
+        if partitioned and index.startswith("ix_expenses_"):
+            return "Index" in plan
+        return index in plan
+    return lines, uses
+
+def main():
+    expense_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    
+    upgrade_schema()
+    seed(expense_count)
+    
+    print("🎭 Rebel Budget - Query Plan Check")
+    print("=" * 40)
+    print(f"Database:    {engine.url.render_as_string(hide_password=True)} ({engine.dialect.name})")
+    print(f"Expenses:    {expense_count} across {USERS} users")
+    print()
+    
+    explain = postgresql_plan if engine.dialect.name == "postgresql" else sqlite_plan
+    failures = 0
+    with engine.connect() as connection:
+        for label, statement, indexes in hot_queries():
+            if isinstance(indexes, str):
+                indexes = (indexes,)
+            sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            lines, uses = explain(connection, sql)
+            ok = any(uses(index) for index in indexes)
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {label} (expects {' or '.join(indexes)})")
+            for line in lines:
+                print(f"     {line}")
+    
+    print()
+    if failures:
+        print(f"❌ {failures} hot queries are not served by their index")
+        sys.exit(1)
+    print("✅ All hot queries use index scans")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
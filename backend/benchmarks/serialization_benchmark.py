@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Page Serialization Benchmark for Rebel Budget
+Times turning one page of expenses into JSON bytes, the way GET /expenses
+used to (ORM objects validated through List[ExpenseResponse], then the
+stdlib encoder) against the fast path (column tuples into FastJSONResponse).
+Also times the same page including the fetch from a temp SQLite database,
+and checks that both paths produce identical bytes.
+
+Usage:
+    python benchmarks/serialization_benchmark.py [rows] [iterations]
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from typing import List
+
+from app.models.database import Base, SessionLocal, engine
+from app.models.expense import Expense, ExpenseResponse
+from app.models.user import User
+from app.routers.expenses import EXPENSE_RESPONSE_COLUMNS, EXPENSE_RESPONSE_FIELDS
+from app.utils import fast_json
+from app.utils.fast_json import FastJSONResponse, rows_to_dicts
+
+page_adapter = TypeAdapter(List[ExpenseResponse])
+
+def seed(row_count: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email="serialize@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        
+        now = datetime.now()
+        categories = ["Food & Dining", "Transportation", "Shopping", "Bills & Utilities"]
+        db.execute(insert(Expense), [
+            {
+                "user_id": user.id,
+                "description": f"Café purchase #{i}",
+                "amount": round(random.uniform(1, 500), 2),
+                "category": categories[i % len(categories)],
+                "date": now - timedelta(minutes=i * 37),
+                "notes": "split with roommate" if i % 5 == 0 else None,
+                "created_at": now,
+                "updated_at": now
+            }
+            for i in range(row_count)
+        ])
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+def legacy_render(expenses) -> bytes:
+    """What FastAPI does with response_model=List[ExpenseResponse]"""
+    validated = page_adapter.validate_python(expenses, from_attributes=True)
+    content = page_adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def fast_render(rows) -> bytes:
+    return FastJSONResponse(rows_to_dicts(EXPENSE_RESPONSE_FIELDS, rows)).body
+
+def time_it(func, iterations: int) -> float:
+    """Median milliseconds per call"""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+def report(label: str, before_ms: float, after_ms: float):
+    print(label)
+    print(f"  Before:  {before_ms:8.2f} ms")
+    print(f"  After:   {after_ms:8.2f} ms ({before_ms / after_ms:.1f}x faster)")
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    
+    user_id = seed(row_count)
+    page_query = select(Expense).where(Expense.user_id == user_id).order_by(Expense.date.desc(), Expense.id.asc())
+    tuple_query = select(*EXPENSE_RESPONSE_COLUMNS).where(Expense.user_id == user_id).order_by(Expense.date.desc(), Expense.id.asc())
+    
+    db = SessionLocal()
+    try:
+        expenses = db.scalars(page_query).all()
+        rows = db.execute(tuple_query).all()
+        
+        print("🎭 Rebel Budget - Page Serialization Benchmark")
+        print("=" * 40)
+        print(f"Page:        {row_count} expenses, median of {iterations} runs")
+        print(f"Encoder:     {'orjson' if fast_json.ORJSON_AVAILABLE else 'stdlib json (install orjson for the full speedup)'}")
+        print(f"Identical:   {legacy_render(expenses) == fast_render(rows)}")
+        print()
+        
+        report(
+            "Serialization only",
+            time_it(lambda: legacy_render(expenses), iterations),
+            time_it(lambda: fast_render(rows), iterations)
+        )
+        
+        def legacy_page():
+            db.expunge_all()
+            return legacy_render(db.scalars(page_query).all())
+        
+        def fast_page():
+            return fast_render(db.execute(tuple_query).all())
+        
+        report(
+            "Fetch + serialization",
+            time_it(legacy_page, iterations),
+            time_it(fast_page, iterations)
+        )
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
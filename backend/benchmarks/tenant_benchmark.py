@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Per-User Analytics Benchmark for Rebel Budget
+Seeds 10k synthetic users and times the three analytics reports. "Before" runs
+the queries the endpoints used to issue, which aggregated every user's
+expenses; "After" calls the user-scoped endpoints for random users, with the
+response cache invalidated first so every call hits the database.
+
+Set DATABASE_URL to run against PostgreSQL (after partition_expenses.py, to
+measure the partitioned layout).
+
+Usage:
+    python benchmarks/tenant_benchmark.py [users] [expenses_per_user] [samples]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, time as day_start, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+from sqlalchemy import func, insert, select, text
+from typing import Awaitable, Callable, List
+
+from app.models.database import AsyncSessionLocal, SessionLocal, engine
+from app.models.expense import Expense
+from app.models.rollup import ExpenseDailyRollup
+from app.models.user import User
+from app.services.rollups import rebuild_rollups
+from app.utils.response_cache import analytics_cache, user_scope
+from app.utils.security import Auth
+from main import app
+
+CATEGORIES = ["Food & Dining", "Transportation", "Shopping", "Bills & Utilities", "Entertainment"]
+
+def seed(users: int, per_user: int) -> List[int]:
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [
+            {"email": f"tenant{i}@example.com", "hashed_password": "x"} for i in range(users)
+        ])
+        user_ids = db.scalars(select(User.id)).all()
+        now = datetime.now()
+        rows = []
+        for user_id in user_ids:
+            for _ in range(per_user):
+                rows.append({
+                    "user_id": user_id,
+                    "description": "Synthetic expense",
+                    "amount": round(random.uniform(1, 200), 2),
+                    "category": random.choice(CATEGORIES),
+                    "date": now - timedelta(minutes=random.randint(0, 180 * 24 * 60))
+                })
+            if len(rows) >= 20000:
+                db.execute(insert(Expense), rows)
+                rows = []
+        if rows:
+            db.execute(insert(Expense), rows)
+        rebuild_rollups(db, None)
+        db.commit()
+    finally:
+        db.close()
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    return user_ids
+
+# The statements the reports ran before they were scoped to the caller
+async def legacy_overview():
+    async with AsyncSessionLocal() as db:
+        start_date = datetime.now() - timedelta(days=180)
+        (await db.execute(select(
+            Expense.category, func.sum(Expense.amount), func.count(Expense.id)
+        ).where(Expense.date >= start_date).group_by(Expense.category))).all()
+
+async def legacy_category():
+    async with AsyncSessionLocal() as db:
+        start_day = (datetime.now() - timedelta(days=90)).date()
+        start_date = datetime.combine(start_day, day_start.min)
+        (await db.execute(select(
+            func.sum(ExpenseDailyRollup.total_amount), func.sum(ExpenseDailyRollup.expense_count)
+        ).where(ExpenseDailyRollup.category == "Shopping", ExpenseDailyRollup.day >= start_day))).one()
+        (await db.execute(select(func.min(Expense.amount), func.max(Expense.amount)).where(
+            Expense.category == "Shopping", Expense.date >= start_date
+        ))).one()
+        (await db.execute(select(Expense.description, Expense.amount, Expense.date).where(
+            Expense.category == "Shopping", Expense.date >= start_date
+        ).order_by(Expense.date.desc()).limit(10))).all()
+
+async def legacy_trends():
+    async with AsyncSessionLocal() as db:
+        start_day = (datetime.now() - timedelta(days=30)).date()
+        (await db.execute(select(
+            ExpenseDailyRollup.day,
+            func.sum(ExpenseDailyRollup.total_amount),
+            func.sum(ExpenseDailyRollup.expense_count)
+        ).where(ExpenseDailyRollup.day >= start_day).group_by(ExpenseDailyRollup.day))).all()
+
+async def timed(call: Callable[[], Awaitable], samples: int) -> float:
+    """Median milliseconds per call"""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        await call()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+async def run(user_ids: List[int], samples: int):
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def scoped(path: str):
+            user_id = random.choice(user_ids)
+            await analytics_cache.invalidate(user_scope(user_id))
+            token = Auth.create_token({"id": user_id, "email": f"user{user_id}@example.com"})
+            response = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+            response.raise_for_status()
+        
+        for label, legacy, path in [
+            ("Overview (6 months)", legacy_overview, "/api/v1/analytics/overview?months=6"),
+            ("Category (90 days)", legacy_category, "/api/v1/analytics/category/Shopping?days=90"),
+            ("Daily trends (30 days)", legacy_trends, "/api/v1/analytics/trends/daily?days=30")
+        ]:
+            await legacy()
+            await scoped(path)
+            results.append((label, await timed(legacy, samples), await timed(lambda: scoped(path), samples)))
+    return results
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    samples = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    
+    started = time.perf_counter()
+    user_ids = seed(users, per_user)
+    
+    print("🎭 Rebel Budget - Per-User Analytics Benchmark")
+    print("=" * 40)
+    print(f"Database:    {engine.url.render_as_string(hide_password=True)}")
+    print(f"Data:        {users} users x {per_user} expenses (seeded in {time.perf_counter() - started:.1f} s)")
+    print(f"Samples:     median of {samples}; after = full HTTP request, uncached")
+    print()
+    
+    for label, before_ms, after_ms in asyncio.run(run(user_ids, samples)):
+        print(label)
+        print(f"  Before (all users):  {before_ms:8.2f} ms")
+        print(f"  After (caller only): {after_ms:8.2f} ms ({before_ms / after_ms:.0f}x faster)")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
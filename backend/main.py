@@ -4,23 +4,55 @@ from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from app.routers import expenses, ai_assistant, analytics, auth, admin
-from app.models.database import engine, Base
-from app.services.ai_service import categorize_expense
+from app.routers import expenses, ai_assistant, analytics, anomalies, auth, admin
+from app.models.database import upgrade_schema
+from app.services import precompute  # noqa: F401  (registers the job handlers and schedules)
+from app.services.ai_service import categorization_batcher, categorize_expense
+from app.services.forecasting import forecast_pool
+from app.services.jobs import JOB_RUN_IN_PROCESS, job_pool
+from app.services.ml_categorizer import load_categorizer_model
+from app.utils.log import configure_logging, get_logger, request_sampler
+from app.utils.rate_limit import RATE_LIMIT_ENABLED, RateLimitMiddleware, rate_limiter
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from pathlib import Path
 
 # Load environment variables
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Structured JSON logging, written off the request path
+configure_logging()
+logger = get_logger("http")
+
+# Bring the schema up to date with the Alembic migrations. Deployments that
+# run several workers set DB_AUTO_MIGRATE=false and run
+# `alembic upgrade head` once before starting them.
+if os.getenv("DB_AUTO_MIGRATE", "true").lower() == "true":
+    upgrade_schema()
+
+# Load the local expense categorizer once, if one has been trained
+load_categorizer_model()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background jobs run in this process unless a separate run_worker.py
+    # does (set JOB_RUN_IN_PROCESS=false for multi-worker deployments)
+    if JOB_RUN_IN_PROCESS:
+        job_pool.start()
+    yield
+    await job_pool.stop()
+    await categorization_batcher.close()
+    # Spawned forecast workers would otherwise outlive reloads and tests
+    await forecast_pool.close()
 
 app = FastAPI(
     title="Rebel Budget",
     description="A comprehensive financial management tool powered by AI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Security middleware (only in production)
@@ -33,9 +65,14 @@ if use_https:
     allowed_hosts = os.getenv("ALLOWED_HOSTS", "localhost").split(",")
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=allowed_hosts)
 
+# Per-route rate limits (login, AI). Added before CORS so that CORS wraps
+# it and 429 responses still carry CORS headers.
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # Configure CORS
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
-print(f"🌐 CORS Origins configured: {cors_origins}")
+logger.info("CORS origins configured", extra={"cors_origins": cors_origins})
 
 app.add_middleware(
     CORSMiddleware,
@@ -43,21 +80,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After", "ETag"],
 )
 
-# Request debugging middleware
+# Request logging middleware
 @app.middleware("http")
-async def debug_requests(request: Request, call_next):
-    # Log request details
-    print(f"🔍 {request.method} {request.url.path}")
-    print(f"📍 Client: {request.client.host if request.client else 'Unknown'}")
-    print(f"🏷️ Headers: Origin={request.headers.get('origin')}, User-Agent={request.headers.get('user-agent', 'Unknown')[:50]}")
-    
+async def log_requests(request: Request, call_next):
+    started = time.perf_counter()
     response = await call_next(request)
+    duration_ms = (time.perf_counter() - started) * 1000
     
-    print(f"📤 Response: {response.status_code}")
+    # Errors are always logged; successful requests are sampled per route
+    path = request.url.path
     if response.status_code >= 400:
-        print(f"❌ Error response for {request.method} {request.url.path}")
+        level = logging.WARNING
+    elif request_sampler.should_log(path):
+        level = logging.INFO
+    else:
+        return response
+    
+    if logger.isEnabledFor(level):
+        logger.log(level, "request", extra={
+            "method": request.method,
+            "path": path,
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 2),
+            "client": request.client.host if request.client else None,
+            "origin": request.headers.get("origin"),
+            "user_agent": request.headers.get("user-agent", "")[:100]
+        })
     
     return response
 
@@ -83,6 +134,7 @@ app.include_router(admin.router, prefix="/api/v1")
 app.include_router(expenses.router, prefix="/api/v1")
 app.include_router(ai_assistant.router, prefix="/api/v1")
 app.include_router(analytics.router, prefix="/api/v1")
+app.include_router(anomalies.router, prefix="/api/v1")
 
 
 # Static files and frontend serving (only if built frontend exists)
@@ -0,0 +1,49 @@
+"""
+Alembic environment for Rebel Budget
+Runs migrations over the application's own engine, so DATABASE_URL, pool and
+SQLite settings match the app. Every model module is imported so that
+--autogenerate sees the full metadata.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.models.database import Base, engine
+from app.models import anomaly, category_cache, expense, insight_snapshot, job, recurring, revoked_token, rollup, user  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline():
+    """Emit SQL to stdout instead of running it (alembic upgrade --sql)"""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        compare_type=True,
+        render_as_batch=engine.dialect.name == "sqlite"
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            # SQLite can only alter tables by copying them
+            render_as_batch=connection.dialect.name == "sqlite"
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""Baseline schema, as previously created by Base.metadata.create_all
+
+Databases created before migrations existed already have some or all of
+these tables, so each table and index is only created when missing. After
+this revision every database is at the same known schema. A rollup table
+created here is filled from the existing expenses, since analytics read
+only the rollups.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def _create_table(inspector, name, *columns, **kwargs) -> bool:
+    if inspector.has_table(name):
+        return False
+    op.create_table(name, *columns, **kwargs)
+    return True
+
+def _create_index(inspector, name, table, columns, **kwargs):
+    if name not in {index["name"] for index in inspector.get_indexes(table)}:
+        op.create_index(name, table, columns, **kwargs)
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    
+    _create_table(
+        inspector, "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_verified", sa.Boolean(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        sa.Column("failed_login_attempts", sa.Integer(), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("last_login", sa.DateTime(), nullable=True),
+        sa.Column("password_reset_token", sa.String(), nullable=True),
+        sa.Column("password_reset_expires", sa.DateTime(), nullable=True),
+        sa.Column("privacy_settings", sa.Text(), nullable=True),
+        sa.Column("notification_preferences", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("last_activity", sa.DateTime(), nullable=True)
+    )
+    _create_index(inspector, "ix_users_id", "users", ["id"])
+    _create_index(inspector, "ix_users_email", "users", ["email"], unique=True)
+    
+    _create_table(
+        inspector, "expenses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("date", sa.DateTime(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True)
+    )
+    _create_index(inspector, "ix_expenses_id", "expenses", ["id"])
+    _create_index(inspector, "ix_expenses_user_id", "expenses", ["user_id"])
+    _create_index(
+        inspector, "ix_expenses_user_date_id", "expenses",
+        ["user_id", sa.text("date DESC"), "id"]
+    )
+    
+    rollups_created = _create_table(
+        inspector, "expense_daily_rollups",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+        sa.Column("expense_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "day", "category")
+    )
+    if rollups_created:
+        op.execute(
+            "INSERT INTO expense_daily_rollups (user_id, day, category, total_amount, expense_count) "
+            "SELECT user_id, date(date), category, SUM(amount), COUNT(*) FROM expenses "
+            "WHERE date IS NOT NULL GROUP BY user_id, date(date), category"
+        )
+    
+    _create_table(
+        inspector, "category_cache",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("description_key", sa.String(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("user_id", "description_key")
+    )
+    
+    _create_table(
+        inspector, "revoked_tokens",
+        sa.Column("jti", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(), nullable=False)
+    )
+    _create_index(inspector, "ix_revoked_tokens_user_id", "revoked_tokens", ["user_id"])
+    _create_index(inspector, "ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+    _create_index(inspector, "ix_revoked_tokens_revoked_at", "revoked_tokens", ["revoked_at"])
+
+def downgrade():
+    op.drop_table("revoked_tokens")
+    op.drop_table("category_cache")
+    op.drop_table("expense_daily_rollups")
+    op.drop_table("expenses")
+    op.drop_table("users")
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""Composite expense indexes and fixed-point amounts
+
+- ix_expenses_user_category_date_id (user_id, category, date DESC, id)
+  serves per-user category listings in page order and category date ranges.
+  Per-user date ranges already use ix_expenses_user_date_id.
+- ix_expenses_user_id is dropped. It is a prefix of both composite indexes
+  and only adds write cost.
+- expenses.amount and expense_daily_rollups.total_amount become
+  NUMERIC(12, 2) / NUMERIC(14, 2), so SQL sums are exact.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def _restore_sort_order():
+    """SQLite batch mode copies the table and rebuilds its indexes from
+    reflection, which loses the DESC on ix_expenses_user_date_id"""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.drop_index("ix_expenses_user_date_id", table_name="expenses")
+    op.create_index(
+        "ix_expenses_user_date_id", "expenses",
+        ["user_id", sa.text("date DESC"), "id"]
+    )
+
+def upgrade():
+    op.drop_index("ix_expenses_user_id", table_name="expenses")
+    
+    if op.get_bind().dialect.name == "sqlite":
+        # SQLite keeps values as stored whatever the declared type; round
+        # existing amounts to cents like the USING clauses do on PostgreSQL
+        op.execute("UPDATE expenses SET amount = round(amount, 2)")
+        op.execute("UPDATE expense_daily_rollups SET total_amount = round(total_amount, 2)")
+    
+    with op.batch_alter_table("expenses") as batch:
+        batch.alter_column(
+            "amount",
+            existing_type=sa.Float(),
+            type_=sa.Numeric(12, 2),
+            existing_nullable=False,
+            postgresql_using="round(amount::numeric, 2)"
+        )
+    _restore_sort_order()
+    with op.batch_alter_table("expense_daily_rollups") as batch:
+        batch.alter_column(
+            "total_amount",
+            existing_type=sa.Float(),
+            type_=sa.Numeric(14, 2),
+            existing_nullable=False,
+            postgresql_using="round(total_amount::numeric, 2)"
+        )
+    
+    # Created after the table copy above so SQLite keeps the DESC
+    op.create_index(
+        "ix_expenses_user_category_date_id", "expenses",
+        ["user_id", "category", sa.text("date DESC"), "id"]
+    )
+
+def downgrade():
+    op.drop_index("ix_expenses_user_category_date_id", table_name="expenses")
+    
+    with op.batch_alter_table("expense_daily_rollups") as batch:
+        batch.alter_column(
+            "total_amount",
+            existing_type=sa.Numeric(14, 2),
+            type_=sa.Float(),
+            existing_nullable=False
+        )
+    with op.batch_alter_table("expenses") as batch:
+        batch.alter_column(
+            "amount",
+            existing_type=sa.Numeric(12, 2),
+            type_=sa.Float(),
+            existing_nullable=False
+        )
+    _restore_sort_order()
+    
+    op.create_index("ix_expenses_user_id", "expenses", ["user_id"])
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""Anomaly detection state and flags
+
+- expense_category_stats holds each user's running count, mean and sum of
+  squared deviations (Welford) of log amounts per category, backfilled
+  here from existing expenses.
+- expense_flags records unusual amounts and likely duplicates.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+import math
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def _backfill_stats(stats_table):
+    moments = defaultdict(lambda: (0, 0.0, 0.0))
+    rows = op.get_bind().execute(sa.text("SELECT user_id, category, amount FROM expenses"))
+    for user_id, category, amount in rows:
+        count, mean, m2 = moments[(user_id, category)]
+        # Same signed log transform as app.services.anomalies._value
+        x = math.copysign(math.log1p(abs(float(amount))), float(amount))
+        count += 1
+        delta = x - mean
+        mean += delta / count
+        moments[(user_id, category)] = (count, mean, m2 + delta * (x - mean))
+    if moments:
+        op.bulk_insert(stats_table, [
+            {"user_id": user_id, "category": category, "count": count, "mean": mean, "m2": m2}
+            for (user_id, category), (count, mean, m2) in moments.items()
+        ])
+
+def upgrade():
+    stats_table = op.create_table(
+        "expense_category_stats",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("mean", sa.Float(), nullable=False),
+        sa.Column("m2", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "category")
+    )
+    op.create_table(
+        "expense_flags",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("expense_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("message", sa.String(), nullable=False),
+        sa.Column("related_expense_id", sa.Integer(), nullable=True),
+        sa.Column("dismissed", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True)
+    )
+    op.create_index("ix_expense_flags_expense_id", "expense_flags", ["expense_id"])
+    op.create_index("ix_expense_flags_related_expense_id", "expense_flags", ["related_expense_id"])
+    op.create_index(
+        "ix_expense_flags_user_created", "expense_flags",
+        ["user_id", sa.text("created_at DESC")]
+    )
+    
+    _backfill_stats(stats_table)
+
+def downgrade():
+    op.drop_index("ix_expense_flags_user_created", table_name="expense_flags")
+    op.drop_index("ix_expense_flags_related_expense_id", table_name="expense_flags")
+    op.drop_index("ix_expense_flags_expense_id", table_name="expense_flags")
+    op.drop_table("expense_flags")
+    op.drop_table("expense_category_stats")
\ No newline at end of file
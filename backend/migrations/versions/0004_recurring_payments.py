@@ -0,0 +1,56 @@
+"""Recurring payment detection state
+
+- recurring_series keeps, per user and normalized description, the latest
+  charges and the cadence, typical amount and next due date detected from
+  them.
+- recurring_scan_state records the highest expense id each user's scan has
+  folded in. Nothing is backfilled: a user without a row is rebuilt from
+  their expenses on their first scan.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "recurring_series",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("description_key", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("occurrences", sa.Integer(), nullable=False),
+        sa.Column("history", sa.Text(), nullable=False),
+        sa.Column("is_recurring", sa.Boolean(), nullable=False),
+        sa.Column("cadence", sa.String(), nullable=True),
+        sa.Column("period_days", sa.Float(), nullable=True),
+        sa.Column("typical_amount", sa.Float(), nullable=True),
+        sa.Column("confidence", sa.Float(), nullable=False),
+        sa.Column("first_seen", sa.DateTime(), nullable=False),
+        sa.Column("last_seen", sa.DateTime(), nullable=False),
+        sa.Column("next_expected", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("user_id", "description_key")
+    )
+    op.create_index(
+        "ix_recurring_series_user_recurring", "recurring_series",
+        ["user_id", "is_recurring"]
+    )
+    op.create_table(
+        "recurring_scan_state",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("last_expense_id", sa.Integer(), nullable=False),
+        sa.Column("last_run_at", sa.DateTime(), nullable=True)
+    )
+
+def downgrade():
+    op.drop_table("recurring_scan_state")
+    op.drop_index("ix_recurring_series_user_recurring", table_name="recurring_series")
+    op.drop_table("recurring_series")
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""Expense dates are required
+
+expenses.date becomes NOT NULL, as the partitioned layout already declares
+it (date is part of its partition key). Rows without a date take their
+created_at (or the current time) and are added to the daily rollups, which
+skipped them; users with such rows get their recurring payment scan rebuilt.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+from collections import defaultdict
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+expenses = sa.table(
+    "expenses",
+    sa.column("id", sa.Integer()),
+    sa.column("user_id", sa.Integer()),
+    sa.column("amount", sa.Numeric(12, 2)),
+    sa.column("category", sa.String()),
+    sa.column("date", sa.DateTime()),
+    sa.column("created_at", sa.DateTime())
+)
+rollups = sa.table(
+    "expense_daily_rollups",
+    sa.column("user_id", sa.Integer()),
+    sa.column("day", sa.Date()),
+    sa.column("category", sa.String()),
+    sa.column("total_amount", sa.Numeric(14, 2)),
+    sa.column("expense_count", sa.Integer())
+)
+scan_state = sa.table(
+    "recurring_scan_state",
+    sa.column("user_id", sa.Integer()),
+    sa.column("last_expense_id", sa.Integer())
+)
+
+def _backfill_dates():
+    bind = op.get_bind()
+    now = datetime.now()
+    undated = bind.execute(sa.select(
+        expenses.c.id, expenses.c.user_id, expenses.c.amount, expenses.c.category, expenses.c.created_at
+    ).where(expenses.c.date.is_(None))).all()
+    if not undated:
+        return
+    
+    buckets = defaultdict(lambda: [0.0, 0])
+    for row in undated:
+        value = row.created_at or now
+        bind.execute(expenses.update().where(expenses.c.id == row.id).values(date=value))
+        bucket = buckets[(row.user_id, value.date(), row.category)]
+        bucket[0] += float(row.amount)
+        bucket[1] += 1
+    
+    for (user_id, day, category), (amount, count) in buckets.items():
+        key = (rollups.c.user_id == user_id) & (rollups.c.day == day) & (rollups.c.category == category)
+        updated = bind.execute(rollups.update().where(key).values(
+            total_amount=rollups.c.total_amount + round(amount, 2),
+            expense_count=rollups.c.expense_count + count
+        ))
+        if updated.rowcount == 0:
+            bind.execute(rollups.insert().values(
+                user_id=user_id, day=day, category=category, total_amount=round(amount, 2), expense_count=count
+            ))
+    
+    # The scan only reads dated rows past its watermark
+    bind.execute(scan_state.update().where(
+        scan_state.c.user_id.in_({row.user_id for row in undated})
+    ).values(last_expense_id=0))
+
+def _restore_sort_order():
+    """SQLite batch mode copies the table and rebuilds its indexes from
+    reflection, which loses the DESC on the date indexes"""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.drop_index("ix_expenses_user_date_id", table_name="expenses")
+    op.drop_index("ix_expenses_user_category_date_id", table_name="expenses")
+    op.create_index(
+        "ix_expenses_user_date_id", "expenses",
+        ["user_id", sa.text("date DESC"), "id"]
+    )
+    op.create_index(
+        "ix_expenses_user_category_date_id", "expenses",
+        ["user_id", "category", sa.text("date DESC"), "id"]
+    )
+
+def upgrade():
+    _backfill_dates()
+    with op.batch_alter_table("expenses") as batch:
+        batch.alter_column("date", existing_type=sa.DateTime(), nullable=False)
+    _restore_sort_order()
+
+def downgrade():
+    with op.batch_alter_table("expenses") as batch:
+        batch.alter_column("date", existing_type=sa.DateTime(), nullable=True)
+    _restore_sort_order()
\ No newline at end of file
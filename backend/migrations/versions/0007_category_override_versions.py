@@ -0,0 +1,28 @@
+"""Categorization override versions
+
+category_override_versions holds a counter per user that every correction
+recorded in category_cache bumps. Nothing is backfilled: a user without a
+row is at version 0.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "category_override_versions",
+        sa.Column("user_id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False)
+    )
+
+def downgrade():
+    op.drop_table("category_override_versions")
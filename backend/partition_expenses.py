@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Expense Partitioning Script for Rebel Budget (PostgreSQL only)
+Run this script once to move the expenses table into the partitioned layout
+(hash partitions by user, each split into yearly archive partitions), and
+again after a year ends to archive it.
+
+Usage:
+    python partition_expenses.py [hash_partitions]   # partition (default 16)
+    python partition_expenses.py --archive <year>    # archive a finished year
+
+Partitioning rewrites the whole table under an exclusive lock; run it in a
+maintenance window.
+"""
+
+import sys
+import os
+from datetime import datetime
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from app.models.database import engine, upgrade_schema
+from app.models.partitioning import (
+    DEFAULT_HASH_PARTITIONS, archive_year_statements, hash_partition_count,
+    is_partitioned, partition_statements
+)
+
+def run(statements):
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+
+def partition(hash_partitions: int):
+    with engine.connect() as connection:
+        if is_partitioned(connection):
+            print(f"✅ expenses is already partitioned ({hash_partition_count(connection)} hash partitions)")
+            return
+        first_year = connection.execute(text("SELECT min(extract(year FROM date))::int FROM expenses")).scalar()
+    
+    # Last year stays in the DEFAULT partition until it is archived
+    current_year = datetime.now().year
+    archive_years = list(range(first_year, current_year - 1)) if first_year else []
+    
+    print(f"\nPartitioning expenses into {hash_partitions} hash partitions...")
+    if archive_years:
+        print(f"Archive partitions for {archive_years[0]}-{archive_years[-1]}")
+    run(partition_statements(hash_partitions, archive_years))
+    print("✅ expenses is now partitioned")
+
+def archive(year: int):
+    with engine.connect() as connection:
+        if not is_partitioned(connection):
+            print("❌ expenses is not partitioned yet; run this script without --archive first")
+            sys.exit(1)
+        hash_partitions = hash_partition_count(connection)
+    
+    if year >= datetime.now().year:
+        print(f"❌ {year} has not ended yet")
+        sys.exit(1)
+    
+    print(f"\nArchiving {year} in {hash_partitions} hash partitions...")
+    run(archive_year_statements(hash_partitions, year))
+    print(f"✅ {year} archived")
+
+def main():
+    """Main function"""
+    print("🎭 Rebel Budget - Expense Partitioning")
+    print("=" * 40)
+    
+    if engine.dialect.name != "postgresql":
+        print(f"❌ Partitioning needs PostgreSQL (DATABASE_URL is {engine.dialect.name})")
+        sys.exit(1)
+    
+    try:
+        upgrade_schema()
+        if len(sys.argv) > 2 and sys.argv[1] == "--archive":
+            archive(int(sys.argv[2]))
+        else:
+            partition(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_HASH_PARTITIONS)
+    except ValueError:
+        print(f"❌ Invalid arguments: {' '.join(sys.argv[1:])}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error partitioning expenses: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
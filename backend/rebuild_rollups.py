@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Rollup Rebuild Script for Rebel Budget
+Run this script to backfill or repair the daily expense rollups and the
+anomaly detection statistics.
+
+Usage:
+    python rebuild_rollups.py            # rebuild rollups for every user
+    python rebuild_rollups.py <user_id>  # rebuild rollups for one user
+"""
+
+import sys
+import os
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.database import SessionLocal, upgrade_schema
+from app.models.user import User  # noqa: F401  (Expense.user refers to it by name)
+from app.services.anomalies import rebuild_anomaly_stats
+from app.services.rollups import rebuild_rollups
+
+def main():
+    """Main function"""
+    user_id = None
+    if len(sys.argv) > 1:
+        try:
+            user_id = int(sys.argv[1])
+        except ValueError:
+            print(f"❌ Invalid user id: {sys.argv[1]}")
+            sys.exit(1)
+    
+    print("🎭 Rebel Budget - Rollup Rebuild")
+    print("=" * 40)
+    
+    # Create or upgrade the database schema
+    upgrade_schema()
+    
+    db = SessionLocal()
+    try:
+        scope = f"user {user_id}" if user_id is not None else "all users"
+        print(f"\nRebuilding daily rollups for {scope}...")
+        
+        rows = rebuild_rollups(db, user_id)
+        stats_rows = rebuild_anomaly_stats(db, user_id)
+        db.commit()
+        
+        print(f"✅ Wrote {rows} rollup rows and {stats_rows} anomaly statistics rows")
+    except Exception as e:
+        print(f"❌ Error rebuilding rollups: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
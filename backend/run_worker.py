@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Job Worker Script for Rebel Budget
+Runs the background job workers and scheduler (nightly precomputation,
+recategorization backfills) outside the web app. The web app runs them
+itself by default; when this script runs instead, start the web app with
+JOB_RUN_IN_PROCESS=false.
+
+Usage:
+    python run_worker.py            # JOB_WORKERS workers
+    python run_worker.py <workers>  # a given number of workers
+"""
+
+import asyncio
+import signal
+import sys
+import os
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.database import upgrade_schema
+from app.services import precompute  # noqa: F401  (registers the job handlers and schedules)
+from app.services.jobs import JobWorkerPool, job_kinds
+from app.services.ml_categorizer import load_categorizer_model
+from app.utils.log import configure_logging
+
+async def run(pool: JobWorkerPool):
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    
+    pool.start()
+    await stopping.wait()
+    print("\nStopping, letting running jobs finish...")
+    await pool.stop()
+
+def main():
+    """Main function"""
+    pool = JobWorkerPool()
+    if len(sys.argv) > 1:
+        try:
+            pool.workers = int(sys.argv[1])
+        except ValueError:
+            print(f"❌ Invalid number of workers: {sys.argv[1]}")
+            sys.exit(1)
+    if pool.workers <= 0:
+        print("❌ At least one worker is needed")
+        sys.exit(1)
+    
+    print("🎭 Rebel Budget - Job Worker")
+    print("=" * 40)
+    
+    configure_logging()
+    if os.getenv("DB_AUTO_MIGRATE", "true").lower() == "true":
+        upgrade_schema()
+    load_categorizer_model()
+    
+    print(f"Worker:      {pool.worker_id}")
+    print(f"Workers:     {pool.workers}")
+    print(f"Job kinds:   {', '.join(sorted(job_kinds()))}")
+    print("\n✅ Running jobs, press Ctrl+C to stop")
+    
+    asyncio.run(run(pool))
+    
+    print("✅ Job worker stopped")
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ from sqlalchemy.orm import Session
 # Add the app directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.models.database import SessionLocal, engine, Base
+from app.models.database import SessionLocal, upgrade_schema
 from app.models.user import User
 
 def create_admin_user():
@@ -20,8 +20,8 @@ def create_admin_user():
     print("🎭 Rebel Budget - Admin Setup")
     print("=" * 40)
     
-    # Create database tables if they don't exist
-    Base.metadata.create_all(bind=engine)
+    # Create or upgrade the database schema
+    upgrade_schema()
     
     db = SessionLocal()
     
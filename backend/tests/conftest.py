@@ -0,0 +1,37 @@
+import itertools
+import os
+import sys
+import tempfile
+
+# Before any app import: the engines are created from DATABASE_URL, and the
+# tests never touch a real database. A shared-cache in-memory database, so
+# the sync and async engines see the same one.
+os.environ["DATABASE_URL"] = "sqlite:///file:rebel_budget_tests?mode=memory&cache=shared&uri=true"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["SECURITY_LOG_FILE"] = os.path.join(tempfile.mkdtemp(), "security.log")
+# Many registrations and AI calls from one client address
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+# Keyword and local categorization only
+os.environ["OPENAI_API_KEY"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+_user_numbers = itertools.count(1)
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import main
+    return TestClient(main.app)
+
+@pytest.fixture
+def user(client):
+    """A newly registered user: {"id": ..., "headers": {...}}"""
+    response = client.post("/api/v1/auth/register", json={
+        "email": f"test{next(_user_numbers)}@example.com",
+        "password": "secretpass1"
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return {"id": body["user"]["id"], "headers": {"Authorization": f"Bearer {body['access_token']}"}}
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Analytics engine tests
+Checks the vectorized statistics against plain Python over the same rows.
+"""
+
+import random
+import statistics
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.analytics_engine import (
+    ExpenseArrays, amount_histogram, category_stats, rolling_sums, summary_stats, weekday_hour_heatmap, window_start
+)
+
+CATEGORIES = ["Food & Dining", "Transportation", "Shopping", "Bills & Utilities"]
+
+def _rows(count=400, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2026, 8, 1)
+    return [
+        (
+            start + timedelta(seconds=rng.randrange(75 * 86400)),
+            round(rng.lognormvariate(3, 1), 2),
+            rng.choice(CATEGORIES)
+        )
+        for _ in range(count)
+    ]
+
+def test_from_rows_keeps_every_column():
+    rows = _rows(50)
+    arrays = ExpenseArrays.from_rows(iter(rows))
+    
+    assert len(arrays) == 50
+    assert arrays.amounts.tolist() == [row[1] for row in rows]
+    assert arrays.timestamps.astype(datetime).tolist() == [row[0] for row in rows]
+    assert [arrays.category_names[code] for code in arrays.category_codes] == [row[2] for row in rows]
+
+def test_summary_and_category_stats():
+    rows = _rows()
+    amounts = [row[1] for row in rows]
+    stats = summary_stats(np.array(amounts))
+    
+    assert stats["count"] == len(amounts)
+    assert stats["total"] == pytest.approx(sum(amounts), abs=0.01)
+    assert stats["mean"] == pytest.approx(statistics.fmean(amounts), abs=0.01)
+    assert stats["median"] == pytest.approx(statistics.median(amounts), abs=0.01)
+    assert stats["std"] == pytest.approx(statistics.pstdev(amounts), abs=0.01)
+    assert (stats["min"], stats["max"]) == (min(amounts), max(amounts))
+    assert summary_stats(np.array([]))["count"] == 0
+    
+    by_category = defaultdict(list)
+    for _, amount, category in rows:
+        by_category[category].append(amount)
+    result = category_stats(ExpenseArrays.from_rows(rows))
+    
+    assert [entry["category"] for entry in result] == sorted(by_category, key=lambda c: sum(by_category[c]), reverse=True)
+    for entry in result:
+        assert entry["count"] == len(by_category[entry["category"]])
+        assert entry["total"] == pytest.approx(sum(by_category[entry["category"]]), abs=0.01)
+
+def test_rolling_sums_match_a_loop():
+    rows = _rows()
+    first_day = date(2026, 9, 1)
+    days = 30
+    result = rolling_sums(ExpenseArrays.from_rows(rows), first_day, days)
+    
+    daily = defaultdict(float)
+    for when, amount, _ in rows:
+        daily[when.date()] += amount
+    assert len(result) == days
+    for i, entry in enumerate(result):
+        day = first_day + timedelta(days=i)
+        assert entry["date"] == day.isoformat()
+        assert entry["total_amount"] == pytest.approx(daily[day], abs=0.01)
+        for window in (7, 30):
+            expected = sum(daily[day - timedelta(days=back)] for back in range(window))
+            assert entry[f"rolling_{window}d"] == pytest.approx(expected, abs=0.01)
+
+def test_heatmap_matches_weekday_and_hour():
+    rows = _rows()
+    heatmap = weekday_hour_heatmap(ExpenseArrays.from_rows(rows))
+    
+    counts = np.zeros((7, 24), dtype=int)
+    totals = np.zeros((7, 24))
+    for when, amount, _ in rows:
+        counts[when.weekday(), when.hour] += 1
+        totals[when.weekday(), when.hour] += amount
+    assert heatmap["expense_count"] == counts.tolist()
+    assert np.allclose(heatmap["total_amount"], totals, atol=0.01)
+
+@pytest.mark.parametrize("log_scale", [False, True])
+def test_histogram_covers_every_positive_amount(log_scale):
+    amounts = np.array([row[1] for row in _rows()] + [0.0, -12.0])
+    buckets = amount_histogram(amounts, bins=10, log_scale=log_scale)
+    
+    positive = amounts[amounts > 0]
+    assert len(buckets) == 10
+    assert sum(bucket["expense_count"] for bucket in buckets) == len(positive)
+    assert sum(bucket["total_amount"] for bucket in buckets) == pytest.approx(positive.sum(), abs=0.1)
+    assert buckets[0]["lower"] == round(positive.min(), 2)
+    assert buckets[-1]["upper"] == round(positive.max(), 2)
+    assert amount_histogram(np.array([-1.0])) == []
+
+def test_window_start_includes_today():
+    assert window_start(1, datetime(2026, 10, 17, 15, 30)) == datetime(2026, 10, 17)
+    assert window_start(30, datetime(2026, 10, 17, 15, 30)) == datetime(2026, 9, 18)
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Anomaly statistics tests
+The running per-category moments kept on every write must equal what
+rebuild_anomaly_stats computes from the expenses, negative amounts included.
+"""
+
+import json
+import math
+
+import pytest
+from sqlalchemy import select
+
+from app.models.anomaly import ExpenseCategoryStats
+from app.models.database import SessionLocal
+from app.services.anomalies import _value, rebuild_anomaly_stats, welford_add, welford_merge, welford_remove
+
+AMOUNTS = [12.5, -1.0, 0.0, 40.0, -5.0, 3.25, 980.0, -0.5, 7.0]
+
+def _batch(amounts):
+    values = [_value(amount) for amount in amounts]
+    mean = sum(values) / len(values)
+    return len(values), mean, sum((value - mean) ** 2 for value in values)
+
+def _fold(amounts, moments=(0, 0.0, 0.0)):
+    for amount in amounts:
+        moments = welford_add(*moments, _value(amount))
+    return moments
+
+def test_value_is_defined_for_every_amount():
+    for amount in (-1000.0, -1.0, -0.99, 0.0, 0.99, 1000.0):
+        assert math.isfinite(_value(amount))
+    assert _value(-5.0) == -_value(5.0)
+
+def test_welford_add_remove_merge_match_batch():
+    assert _fold(AMOUNTS) == pytest.approx(_batch(AMOUNTS))
+    
+    merged = welford_merge(_fold(AMOUNTS[:4]), _fold(AMOUNTS[4:]))
+    assert merged == pytest.approx(_batch(AMOUNTS))
+    
+    moments = _fold(AMOUNTS)
+    for amount in (-5.0, 980.0, -1.0):
+        moments = welford_remove(*moments, _value(amount))
+    assert moments == pytest.approx(_batch([12.5, 0.0, 40.0, 3.25, -0.5, 7.0]))
+    
+    for amount in AMOUNTS:
+        moments = welford_remove(*_fold([amount]), _value(amount))
+        assert moments == (0, 0.0, 0.0)
+
+def _stats(db, user_id):
+    rows = db.scalars(select(ExpenseCategoryStats).where(ExpenseCategoryStats.user_id == user_id)).all()
+    return {row.category: (row.count, row.mean, row.m2) for row in rows}
+
+def test_running_stats_match_rebuild(client, user):
+    ids = []
+    for i, amount in enumerate(AMOUNTS):
+        response = client.post("/api/v1/expenses/", headers=user["headers"], json={
+            "description": f"Refund or charge {i}",
+            "amount": amount,
+            "category": "Shopping" if i % 2 else "Food & Dining"
+        })
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    
+    assert client.put(f"/api/v1/expenses/{ids[0]}", headers=user["headers"], json={"amount": -30.0}).status_code == 200
+    assert client.put(f"/api/v1/expenses/{ids[1]}", headers=user["headers"], json={"category": "Food & Dining"}).status_code == 200
+    assert client.delete(f"/api/v1/expenses/{ids[2]}", headers=user["headers"]).status_code == 200
+    
+    body = "\n".join(json.dumps(row) for row in [
+        {"description": "Returned jacket", "amount": -89.99, "category": "Shopping"},
+        {"description": "Bakery", "amount": 4.2, "category": "Food & Dining"},
+        {"description": "Cinema", "amount": 11.0, "category": "Entertainment"}
+    ])
+    response = client.post(
+        "/api/v1/expenses/import?format=ndjson", headers=user["headers"], content=body.encode()
+    )
+    assert response.status_code == 200, response.text
+    
+    with SessionLocal() as db:
+        running = _stats(db, user["id"])
+        rebuild_anomaly_stats(db, user["id"])
+        db.flush()
+        rebuilt = _stats(db, user["id"])
+        db.rollback()
+    
+    assert running.keys() == rebuilt.keys() == {"Food & Dining", "Shopping", "Entertainment"}
+    for category, moments in rebuilt.items():
+        assert running[category] == pytest.approx(moments), category
\ No newline at end of file
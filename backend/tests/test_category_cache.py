@@ -0,0 +1,46 @@
+"""
+Categorization cache tests
+Two cache instances stand in for two worker processes sharing one database.
+"""
+
+from app.models.database import SessionLocal
+from app.services.category_cache import CategorizationCache
+
+def test_override_on_another_worker_applies_at_once(client, user):
+    first, second = CategorizationCache(), CategorizationCache()
+    first.store_many({"CITY CAB #4411": "Transportation"})
+    
+    # The shared mapping is now in the second worker's memory
+    assert second.lookup("City cab 17", user["id"]) == "Transportation"
+    assert second.lookup("City cab 17") == "Transportation"
+    assert second.stats()["memory_hits"] == 1
+    
+    with SessionLocal() as db:
+        first.record_override(db, user["id"], "city cab", "Travel")
+        db.commit()
+    
+    assert second.lookup("CITY CAB 9", user["id"]) == "Travel"
+    # Everyone else keeps the shared mapping
+    assert second.lookup("CITY CAB 9") == "Transportation"
+    assert second.lookup("CITY CAB 9", user["id"] + 1000) == "Transportation"
+
+def test_shared_mapping_served_from_memory_for_a_user(client, user):
+    cache = CategorizationCache()
+    cache.store_many({"CORNER BAKERY 12": "Food & Dining"})
+    
+    assert cache.lookup("Corner bakery", user["id"]) == "Food & Dining"
+    assert cache.lookup("CORNER BAKERY 88", user["id"]) == "Food & Dining"
+    assert cache.stats()["memory_hits"] == 1
+    
+    # A correction only counts once it is committed
+    with SessionLocal() as db:
+        cache.record_override(db, user["id"], "corner bakery", "Shopping")
+        db.rollback()
+    assert cache.lookup("Corner bakery", user["id"]) == "Food & Dining"
+    
+    with SessionLocal() as db:
+        cache.record_override(db, user["id"], "corner bakery", "Shopping")
+        db.commit()
+    assert cache.lookup("Corner bakery", user["id"]) == "Shopping"
+    assert cache.lookup("Corner bakery", user["id"]) == "Shopping"
+    assert cache.stats()["memory_hits"] == 3
@@ -0,0 +1,77 @@
+"""
+Import and export format tests
+Checks that CSV imports follow csv module quoting, and that a columnar
+export decodes back to the rows it was built from.
+"""
+
+import asyncio
+import csv
+import io
+from datetime import datetime
+
+from app.services import expense_io
+from app.services.expense_io import EXPORT_COLUMNS, encode_columnar, iter_csv_rows, read_columnar
+
+def _parse_csv(lines):
+    async def feed():
+        for line in lines:
+            yield line
+    
+    async def collect():
+        return [row async for row in iter_csv_rows(feed())]
+    return asyncio.run(collect())
+
+def _rows():
+    created = datetime(2026, 10, 1, 9, 30, 15, 123456)
+    return [
+        (1, "Coffee", 4.5, "Food & Dining", datetime(2026, 10, 1, 8, 0), None, created, created),
+        (2, "Café crème ☕", 3.2, "Food & Dining", datetime(2026, 10, 2, 8, 5, 0, 1), "oat milk", created, None),
+        (3, "Train ticket", 27.0, "Transportation", None, "", created, created),
+        (4, "Rent", 1250.0, "Bills & Utilities", datetime(1969, 12, 31, 23, 59, 59), "October", None, None),
+        (5, "", 0.01, "Other", datetime(2026, 10, 3), "x" * 5000, created, created)
+    ]
+
+def test_columnar_export_round_trip():
+    rows = _rows()
+    # Blocks of two rows, so the stream has several blocks and dictionaries
+    batches = iter([rows[0:2], rows[2:4], rows[4:], []])
+    stream = io.BytesIO(b"".join(encode_columnar(batches)))
+    
+    decoded = list(read_columnar(stream))
+    
+    assert decoded == [dict(zip(EXPORT_COLUMNS, row)) for row in rows]
+    assert stream.read() == b""
+
+def test_columnar_export_of_nothing():
+    stream = io.BytesIO(b"".join(encode_columnar(iter([]))))
+    assert list(read_columnar(stream)) == []
+
+def test_csv_import_reads_literal_quotes_like_the_csv_module(client, user):
+    body = (
+        "description,amount,category,date\n"
+        'Joe\'s 12" Sub,8.00,Food & Dining,2024-01-01\n'
+        '"Corner ""deli""",4.50,Food & Dining,2024-01-02\n'
+        '"Rent\nOctober",1250,Bills & Utilities,2024-01-03\n'
+    )
+    response = client.post(
+        "/api/v1/expenses/import?format=csv",
+        headers={**user["headers"], "Content-Type": "text/csv"},
+        content=body.encode("utf-8")
+    )
+    
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 3
+    expected = list(csv.reader(io.StringIO(body)))[1:]
+    parsed = [data for _, data, _ in _parse_csv(body.split("\n"))]
+    assert [data["description"] for data in parsed] == [row[0] for row in expected]
+
+def test_csv_record_over_the_limit_is_one_error(monkeypatch):
+    monkeypatch.setattr(expense_io, "MAX_RECORD_CHARS", 100)
+    lines = ["description,amount", '"runaway', *["x" * 30] * 10, 'end",1', "Lunch,9"]
+    
+    rows = _parse_csv(lines)
+    
+    assert rows == [
+        (1, None, "Record longer than 100 characters"),
+        (2, {"description": "Lunch", "amount": "9"}, None)
+    ]
@@ -0,0 +1,60 @@
+"""
+Expense listing tests
+Keyset pagination over a user's expenses, and updates that would break it.
+"""
+
+from datetime import datetime, timedelta
+
+def _create(client, user, count):
+    now = datetime(2026, 10, 15, 12, 0)
+    ids = []
+    for i in range(count):
+        response = client.post("/api/v1/expenses/", headers=user["headers"], json={
+            "description": f"Groceries {i}",
+            "amount": 10 + i,
+            "category": "Food & Dining",
+            # Pairs of expenses share a timestamp, so pages split ties
+            "date": (now - timedelta(days=i // 2)).isoformat()
+        })
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+def _all_pages(client, user, limit):
+    rows, cursor = [], None
+    while True:
+        url = f"/api/v1/expenses/?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url, headers=user["headers"])
+        assert response.status_code == 200, response.text
+        rows += response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return rows
+
+def test_keyset_pages_match_offset_order(client, user):
+    ids = _create(client, user, 9)
+    
+    keyset = [row["id"] for row in _all_pages(client, user, 2)]
+    offset = [row["id"] for row in client.get("/api/v1/expenses/?limit=100", headers=user["headers"]).json()]
+    
+    assert keyset == offset
+    assert sorted(keyset) == sorted(ids)
+
+def test_update_rejects_null_date(client, user):
+    ids = _create(client, user, 3)
+    
+    response = client.put(f"/api/v1/expenses/{ids[-1]}", headers=user["headers"], json={"date": None})
+    assert response.status_code == 422
+    for field in ("description", "amount", "category"):
+        response = client.put(f"/api/v1/expenses/{ids[-1]}", headers=user["headers"], json={field: None})
+        assert response.status_code == 422, field
+    
+    # The last row on the first page is the one the update tried to change
+    assert [row["id"] for row in _all_pages(client, user, 3)] == ids
+    # Omitted fields are still left alone
+    response = client.put(f"/api/v1/expenses/{ids[-1]}", headers=user["headers"], json={"notes": None})
+    assert response.status_code == 200
+
+def test_page_size_must_be_positive(client, user):
+    for limit in (0, -1):
+        assert client.get(f"/api/v1/expenses/?limit={limit}", headers=user["headers"]).status_code == 422
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Forecast model tests
+Fitting, folding in new days and predicting with the weekday smoothing model.
+"""
+
+import numpy as np
+import pytest
+
+from app.services.forecast_model import ALPHAS, GAMMAS, WARMUP_DAYS, _initial_state, fit, predict, smooth, update
+
+# Monday first
+WEEK = np.array([20.0, 15.0, 15.0, 18.0, 40.0, 65.0, 10.0])
+
+def _noisy(days, first_weekday, seed, series=3):
+    rng = np.random.default_rng(seed)
+    weekdays = (first_weekday + np.arange(days)) % 7
+    scale = rng.uniform(0.5, 2.0, size=(series, 1))
+    return scale * WEEK[weekdays] + rng.normal(0, 5, size=(series, days))
+
+def test_fit_recovers_a_weekly_pattern():
+    first_weekday = 2
+    series = WEEK[(first_weekday + np.arange(42)) % 7][None, :]
+    params = fit(series, first_weekday)
+    
+    assert params["sigma"] == pytest.approx([0.0], abs=1e-9)
+    # The next day after 42 is the same weekday as the first
+    assert predict(params, first_weekday, 7)[0] == pytest.approx(np.roll(WEEK, -first_weekday))
+
+def test_fit_picks_the_lowest_error_pair_per_series():
+    first_weekday = 4
+    series = _noisy(70, first_weekday, seed=1)
+    params = fit(series, first_weekday)
+    level, season = _initial_state(series, first_weekday)
+    
+    for row in range(series.shape[0]):
+        errors = {
+            (alpha, gamma): smooth(
+                series[row:row + 1], first_weekday,
+                level[row:row + 1, None], season[row:row + 1, None, :],
+                np.array([[alpha]]), np.array([[gamma]]), score_from=WARMUP_DAYS
+            )[2][0, 0]
+            for alpha in ALPHAS for gamma in GAMMAS
+        }
+        best = min(errors.values())
+        assert errors[(params["alpha"][row], params["gamma"][row])] == pytest.approx(best)
+        assert params["sigma"][row] == pytest.approx(np.sqrt(best / (70 - WARMUP_DAYS)))
+    
+    # Each series is fitted on its own
+    alone = fit(series[1:2], first_weekday)
+    for key in ("alpha", "gamma", "level", "season", "sigma"):
+        assert alone[key][0] == pytest.approx(params[key][1])
+
+def test_update_continues_the_fitted_recursion():
+    first_weekday = 0
+    series = _noisy(60, first_weekday, seed=2)
+    fitted_days = 45
+    params = fit(series[:, :fitted_days], first_weekday)
+    updated = update(params, series[:, fitted_days:], (first_weekday + fitted_days) % 7)
+    
+    level, season = _initial_state(series, first_weekday)
+    expected_level, expected_season, _ = smooth(
+        series, first_weekday, level[:, None], season[:, None, :],
+        params["alpha"][:, None], params["gamma"][:, None]
+    )
+    assert updated["level"] == pytest.approx(expected_level[:, 0])
+    assert updated["season"] == pytest.approx(expected_season[:, 0])
+    assert updated["alpha"] is params["alpha"]
+    assert updated["sigma"] is params["sigma"]
+
+def test_predictions_are_never_negative():
+    params = {"level": np.array([2.0]), "season": np.array([[-5.0, 0, 0, 0, 0, 0, 1.0]])}
+    assert predict(params, 0, 7).tolist() == [[0.0, 2.0, 2.0, 2.0, 2.0, 2.0, 3.0]]
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""
+Forecast pool tests
+Counters and backpressure around fits that time out.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.forecasting import ForecastPool, ForecastUnavailable
+
+def test_timed_out_fit_stays_pending_until_it_finishes():
+    async def scenario():
+        pool = ForecastPool(workers=1, max_pending=1, timeout_seconds=0.05)
+        try:
+            with pytest.raises(ForecastUnavailable):
+                await pool.run(time.sleep, 0.5)
+            # The worker is still busy with the abandoned fit
+            assert pool.stats()["pending"] == 1
+            with pytest.raises(ForecastUnavailable):
+                await pool.run(abs, -1)
+            
+            deadline = time.monotonic() + 30
+            while pool.pending and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            pool.timeout_seconds = 30
+            assert await pool.run(abs, -1) == 1
+            return pool.stats()
+        finally:
+            await pool.close()
+    
+    stats = asyncio.run(scenario())
+    assert stats["pending"] == 0
+    assert stats["completed"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["rejected"] == 1
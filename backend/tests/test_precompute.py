@@ -0,0 +1,49 @@
+"""
+Precomputation job tests
+Runs job handlers directly, as a worker would after claiming the job.
+"""
+
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.models.anomaly import ExpenseFlag, FLAG_POSSIBLE_DUPLICATE
+from app.models.database import AsyncSessionLocal, SessionLocal
+from app.models.expense import Expense
+from app.services.jobs import ClaimedJob
+from app.services.precompute import RECATEGORIZE_BACKFILL, recategorize_backfill
+
+def _run(handler, user_id, payload):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await handler(db, ClaimedJob(1, RECATEGORIZE_BACKFILL, user_id, payload, 1, 3))
+    return asyncio.run(run())
+
+def test_recategorize_backfill_keeps_flags(client, user):
+    ids = []
+    for _ in range(2):
+        response = client.post("/api/v1/expenses/", headers=user["headers"], json={
+            "description": "Uber ride",
+            "amount": 12.0,
+            "category": "Misc",
+            "date": datetime(2026, 10, 10, 18, 0).isoformat()
+        })
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    
+    def flags():
+        with SessionLocal() as db:
+            return db.execute(select(ExpenseFlag.expense_id, ExpenseFlag.kind, ExpenseFlag.related_expense_id).where(
+                ExpenseFlag.user_id == user["id"]
+            )).all()
+    
+    assert flags() == [(ids[1], FLAG_POSSIBLE_DUPLICATE, ids[0])]
+    
+    result = _run(recategorize_backfill, user["id"], {"category": "Misc"})
+    
+    assert result == {"category": "Misc", "examined": 2, "recategorized": 2}
+    with SessionLocal() as db:
+        categories = db.scalars(select(Expense.category).where(Expense.id.in_(ids))).all()
+    assert categories == ["Transportation", "Transportation"]
+    assert flags() == [(ids[1], FLAG_POSSIBLE_DUPLICATE, ids[0])]
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Query plan tests
+Builds an in-memory SQLite database with the Alembic migrations, seeds it,
+and checks that every hot query in benchmarks/query_plan_check.py is
+answered from its expected index rather than a full table scan.
+
+Run from backend/:
+    python -m pytest tests
+"""
+
+import pytest
+
+from app.models.database import engine, upgrade_schema
+from benchmarks.query_plan_check import hot_queries, seed, sqlite_plan
+
+EXPENSES = 20000
+
+@pytest.fixture(scope="module")
+def connection():
+    # The in-memory database lives on this thread's pooled connection, so
+    # the migrations, the seed and the EXPLAINs all see the same one
+    upgrade_schema()
+    seed(EXPENSES)
+    with engine.connect() as connection:
+        yield connection
+
+@pytest.mark.parametrize("label,statement,indexes", hot_queries(), ids=[query[0] for query in hot_queries()])
+def test_hot_query_uses_index(connection, label, statement, indexes):
+    if isinstance(indexes, str):
+        indexes = (indexes,)
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    lines, uses = sqlite_plan(connection, sql)
+    assert any(uses(index) for index in indexes), (
+        f"{label} is not served by {' or '.join(indexes)}:\n" + "\n".join(lines)
+    )
\ No newline at end of file
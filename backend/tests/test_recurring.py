@@ -0,0 +1,108 @@
+"""
+Recurring payment detection tests
+Runs detect over a shuffled mix of charge patterns and checks what it finds
+for each description.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.database import SessionLocal
+from app.services.recurring import CADENCES, DAY_SECONDS, RECURRING_MAX_HISTORY, RecurringScanner, detect
+
+CADENCE_NAMES = [cadence[0] for cadence in CADENCES]
+START = datetime(2025, 1, 6, 9, 0)
+
+def _seconds(when):
+    return (when - datetime(1970, 1, 1)).total_seconds()
+
+def _charges():
+    """{code: [(datetime, amount), ...]}"""
+    monthly = [START + timedelta(days=day) for day in (0, 31, 59, 90, 120, 151)]
+    irregular = [START + timedelta(days=day) for day in (0, 3, 43, 54, 144)]
+    return {
+        0: [(when, 15.99) for when in monthly],
+        1: [(when, 42.0) for when in irregular],
+        # One pricier week still leaves 7 of 8 amounts steady
+        2: [(START + timedelta(weeks=week), 30.0 if week == 3 else 9.5) for week in range(8)],
+        3: [(START, 99.0), (START + timedelta(days=366), 99.0)],
+        4: [(START, 12.0), (START + timedelta(days=30), 12.0)],
+        5: [(START + timedelta(weeks=week), 5.0) for week in range(RECURRING_MAX_HISTORY + 11)]
+    }
+
+@pytest.fixture(scope="module")
+def detected():
+    charges = _charges()
+    rows = [(code, _seconds(when), amount) for code, group in charges.items() for when, amount in group]
+    order = np.random.default_rng(3).permutation(len(rows))
+    rows = [rows[i] for i in order]
+    codes = np.array([row[0] for row in rows])
+    timestamps = np.array([row[1] for row in rows])
+    amounts = np.array([row[2] for row in rows])
+    return charges, timestamps, detect(codes, timestamps, amounts, len(charges))
+
+def _cadence(result, code):
+    index = result["cadence"][code]
+    return CADENCE_NAMES[index] if index >= 0 else None
+
+def test_steady_charges_are_recurring(detected):
+    _, _, result = detected
+    
+    assert result["recurring"].tolist() == [True, False, True, True, False, True]
+    assert [_cadence(result, code) for code in (0, 2, 3, 5)] == ["monthly", "weekly", "yearly", "weekly"]
+    assert _cadence(result, 1) is None
+    assert result["typical_amount"][[0, 2, 3, 5]].tolist() == [15.99, 9.5, 99.0, 5.0]
+    assert result["period_days"][2] == pytest.approx(7.0)
+    # The pricier week lowers the confidence of the first weekly charge
+    assert result["confidence"][5] == pytest.approx(1.0)
+    assert 0 < result["confidence"][2] < 1
+
+def test_first_last_and_next_dates(detected):
+    charges, _, result = detected
+    for code, group in charges.items():
+        assert result["occurrences"][code] == len(group)
+        assert result["first_seen"][code] == _seconds(group[0][0])
+        assert result["last_seen"][code] == _seconds(group[-1][0])
+    assert result["next_expected"][2] == pytest.approx(_seconds(charges[2][-1][0]) + 7 * DAY_SECONDS)
+
+def test_history_keeps_the_latest_charges_in_order(detected):
+    charges, timestamps, result = detected
+    kept = result["kept"]
+    
+    assert kept.tolist() == [min(len(group), RECURRING_MAX_HISTORY) for group in charges.values()]
+    offset = 0
+    for code, group in charges.items():
+        history = timestamps[result["order"][offset:offset + kept[code]]]
+        offset += kept[code]
+        assert history.tolist() == [_seconds(when) for when, _ in group[-kept[code]:]]
+    assert offset == len(result["order"])
+def test_scan_waits_for_the_one_in_flight(client, user):
+    started, release = threading.Event(), threading.Event()
+    
+    def slow_session():
+        started.set()
+        release.wait(10)
+        return SessionLocal()
+    
+    scanner = RecurringScanner(session_factory=slow_session)
+    results = []
+    first = threading.Thread(target=lambda: results.append(scanner.scan_user(user["id"])))
+    first.start()
+    assert started.wait(10)
+    
+    started.clear()
+    second = threading.Thread(target=lambda: results.append(scanner.scan_user(user["id"])))
+    second.start()
+    second.join(0.2)
+    # Queued behind the first scan instead of skipped
+    assert second.is_alive() and not started.is_set()
+    assert scanner.stats()["waited"] == 1
+    
+    release.set()
+    first.join(10)
+    second.join(10)
+    assert len(results) == 2 and None not in results
+    assert scanner._user_locks == {}
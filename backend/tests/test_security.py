@@ -0,0 +1,41 @@
+"""
+Password hash pool tests
+Counters and backpressure around hashes whose callers give up.
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.security import PasswordHashPool
+
+def test_abandoned_hash_stays_pending_until_it_finishes():
+    async def scenario():
+        pool = PasswordHashPool(workers=1, max_pending=1)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(pool.run(time.sleep, 0.5), 0.05)
+            # The thread is still hashing for the caller that gave up
+            assert pool.stats()["pending"] == 1
+            with pytest.raises(HTTPException) as busy:
+                await pool.run(abs, -1)
+            assert busy.value.status_code == 503
+            
+            deadline = time.monotonic() + 10
+            while pool.pending and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            with pytest.raises(ValueError):
+                await pool.run(int, "not a number")
+            assert await pool.run(abs, -1) == 1
+            await asyncio.sleep(0)
+            return pool.stats()
+        finally:
+            pool.executor.shutdown(wait=True)
+    
+    stats = asyncio.run(scenario())
+    assert stats["pending"] == 0
+    assert stats["completed"] == 1
+    assert stats["failures"] == 1
+    assert stats["rejected"] == 1
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Categorizer Training Script for Rebel Budget
+Run this script to (re)train the local expense categorizer from the
+descriptions and categories users have already recorded.
+
+Usage:
+    python train_categorizer.py               # evaluate on a held-out split, then train and save
+    python train_categorizer.py --evaluate    # only report accuracy and latency
+    python train_categorizer.py --holdout 0.3 --min-confidence 0.9
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+
+# Add the app directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.database import SessionLocal
+from app.models.user import User  # noqa: F401  (Expense.user refers to it by name)
+from app.models.expense import Expense
+from app.services.ai_service import EXPENSE_CATEGORIES
+from app.services.ml_categorizer import (
+    ML_CATEGORIZER_MIN_CONFIDENCE, ML_CATEGORIZER_PATH, NaiveBayesCategorizer
+)
+
+def load_samples():
+    """Labeled (description, category) pairs; "Other" carries no signal"""
+    db = SessionLocal()
+    try:
+        rows = db.query(Expense.description, Expense.category).filter(
+            Expense.category.in_([c for c in EXPENSE_CATEGORIES if c != "Other"])
+        ).yield_per(5000)
+        return [(description, category) for description, category in rows if description]
+    finally:
+        db.close()
+
+def evaluate(samples, holdout: float, min_confidence: float):
+    """Train on one split and report accuracy and latency on the other"""
+    random.Random(42).shuffle(samples)
+    split = int(len(samples) * (1 - holdout))
+    train, test = samples[:split], samples[split:]
+    if not train or not test:
+        print("❌ Not enough samples for a held-out evaluation")
+        return
+    
+    started = time.perf_counter()
+    model = NaiveBayesCategorizer.train(train)
+    train_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    predictions = [model.predict(description) for description, _ in test]
+    predict_seconds = time.perf_counter() - started
+    
+    correct = sum(1 for (category, _), (_, actual) in zip(predictions, test) if category == actual)
+    confident = [
+        (category, actual)
+        for (category, confidence), (_, actual) in zip(predictions, test)
+        if confidence >= min_confidence
+    ]
+    confident_correct = sum(1 for category, actual in confident if category == actual)
+    
+    print(f"\n📊 Held-out evaluation ({len(train)} train / {len(test)} test)")
+    print(f"    Training time:        {train_seconds:.2f} s")
+    print(f"    Latency per item:     {predict_seconds / len(test) * 1e6:.1f} µs")
+    print(f"    Accuracy (all):       {correct / len(test):.1%}")
+    print(f"    Confident (>= {min_confidence:.2f}): {len(confident) / len(test):.1%} of items "
+          f"(these skip the LLM)")
+    if confident:
+        print(f"    Accuracy (confident): {confident_correct / len(confident):.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local expense categorizer")
+    parser.add_argument("--evaluate", action="store_true", help="only evaluate, do not save a model")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction held out for evaluation")
+    parser.add_argument("--min-confidence", type=float, default=ML_CATEGORIZER_MIN_CONFIDENCE)
+    parser.add_argument("--output", default=ML_CATEGORIZER_PATH)
+    args = parser.parse_args()
+    
+    print("🎭 Rebel Budget - Categorizer Training")
+    print("=" * 40)
+    
+    samples = load_samples()
+    print(f"\nLoaded {len(samples)} labeled expenses")
+    if not samples:
+        print("❌ Nothing to train on yet")
+        sys.exit(1)
+    
+    if args.holdout > 0:
+        evaluate(list(samples), args.holdout, args.min_confidence)
+    
+    if args.evaluate:
+        return
+    
+    model = NaiveBayesCategorizer.train(samples)
+    model.save(args.output)
+    print(f"\n✅ Saved model trained on {model.trained_on} expenses to {args.output}")
+    print("   Restart the API to pick it up.")
+
+if __name__ == "__main__":
+    main()